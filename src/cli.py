@@ -0,0 +1,410 @@
+"""
+Headless command-line entry point for Project Titan.
+
+Drives the same engines as the GUI (MNDP_Scanner, RouterAuditor, ConfigGenerator,
+Deployer, TrafficPoller) without importing Flet. Every command writes JSON lines to
+stdout, one object per event, so it can be piped into jq or consumed by cron/CI jobs.
+
+    python src/cli.py scan --duration 70
+    python src/cli.py audit 10.0.0.1 10.0.0.2 --user admin
+    python src/cli.py generate --context site.json --output setup.rsc
+    python src/cli.py generate --context site.json --output setup.rsc --profile-output render.folded
+    python src/cli.py deploy 192.168.88.1 --script setup.rsc --target-lan-ip 10.10.0.1
+    python src/cli.py monitor 10.0.0.1 --interface ether1 --count 10
+    python src/cli.py serve --port 8765
+    python src/cli.py simulate --context site.json --flows 1000000
+    python src/cli.py capture --output-dir captures --duration 300
+    python src/cli.py blocklist hosts.txt https://example.org/list.txt --serve --host 0.0.0.0
+
+Passwords can be passed with --password or the TITAN_PASSWORD environment variable.
+Engines are imported inside their command, so `--help` and every command start
+without paying for the ones they do not use.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add src to path to find modules if needed
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+# The engines print diagnostics; while a command runs those go to stderr so
+# stdout carries nothing but JSON lines.
+_out = None
+
+
+def emit(event, **fields):
+    """Writes one JSON line and flushes (consumers read the stream incrementally)."""
+    fields["event"] = event
+    out = _out or sys.stdout
+    out.write(json.dumps(fields, separators=(",", ":"), default=str) + "\n")
+    out.flush()
+
+
+def _password(args):
+    return args.password if args.password is not None else os.environ.get("TITAN_PASSWORD", "")
+
+
+def _read_targets(args):
+    targets = list(args.targets)
+    if args.targets_file:
+        with open(args.targets_file) as f:
+            targets.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return targets
+
+
+# --- Commands ---
+def cmd_scan(args):
+    from discovery.mndp_scanner import MNDP_Scanner
+    scanner = MNDP_Scanner()
+    scanner.start_scan(duration=args.duration)
+    emit("scan_started", duration=args.duration)
+
+    seen = {}
+    try:
+        while True:
+            running = scanner.running
+            for neighbor in scanner.get_neighbors():
+                if seen.get(neighbor.get('mac')) != neighbor:
+                    seen[neighbor.get('mac')] = neighbor
+                    emit("neighbor", **neighbor)
+            if not running:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        scanner.stop_scan()
+    emit("scan_complete", neighbors=len(seen))
+    return 0
+
+
+def cmd_audit(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from logic.auditor import RouterAuditor
+    targets = _read_targets(args)
+    if not targets:
+        emit("error", message="No targets given.")
+        return 2
+
+    password = _password(args)
+    auditor = RouterAuditor()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(args.concurrency, len(targets)))) as pool:
+        for report in pool.map(lambda ip: auditor.run_compliance_scan(ip, args.user, password), targets):
+            if not report.get("passed"):
+                failed += 1
+            emit("audit", **report)
+    emit("audit_complete", targets=len(targets), failed=failed)
+    return 1 if failed else 0
+
+
+def cmd_generate(args):
+    from logic.generator import ConfigGenerator
+    from logic.ipam import IPAM, DEFAULT_IPAM_PATH
+    if args.context == "-":
+        context = json.load(sys.stdin)
+    else:
+        with open(args.context) as f:
+            context = json.load(f)
+
+    if args.model:
+        context["model"] = args.model
+    generator = ConfigGenerator(ipam=IPAM(args.ipam or DEFAULT_IPAM_PATH),
+                                profile=args.profile or bool(args.profile_output))
+    script = generator.generate(
+        context, compact=args.compact or args.strip_comments, strip_comments=args.strip_comments)
+    for warning in generator.last_warnings:
+        emit("warning", message=warning)
+    if args.output:
+        with open(args.output, "w", newline="\n") as f:
+            f.write(script)
+        emit("generated", output=args.output, bytes=len(script.encode("utf-8")))
+    else:
+        emit("generated", script=script)
+    if generator.last_profile is not None:
+        emit("profile", **generator.last_profile.summary())
+        if args.profile_output:
+            with open(args.profile_output, "w", newline="\n") as f:
+                f.write(generator.last_profile.folded())
+            emit("profile_written", output=args.profile_output)
+    return 0
+
+
+def cmd_deploy(args):
+    import asyncio
+    from dataclasses import asdict
+    from logic.deployer import Deployer
+    from logic.journal import DeploymentJournal
+
+    with open(args.script, encoding="utf-8") as f:
+        script = f.read()
+
+    async def run():
+        last_phase = None
+        with DeploymentJournal() as journal:
+            # Close out rollouts a crashed run left in flight before starting a new one
+            for action, records in journal.recover().items():
+                for record in records:
+                    emit("interrupted", **record)
+            deployer = Deployer(journal=journal)
+            async for event in deployer.deploy_configuration_async(
+                ip=args.ip,
+                user=args.user,
+                password=_password(args),
+                script=script,
+                target_lan_ip=args.target_lan_ip,
+                heavy_payload=args.heavy,
+                rollback=not args.no_rollback,
+                confirm_user=args.confirm_user,
+                confirm_password=args.confirm_password,
+            ):
+                emit("deploy", **asdict(event))
+                last_phase = event.phase
+        return last_phase == "done"
+
+    return 0 if asyncio.run(run()) else 1
+
+
+def cmd_monitor(args):
+    from logic.telemetry import TrafficPoller
+    poller = TrafficPoller(args.ip, args.user, _password(args))
+    poller.set_interface(args.interface)
+    poller.start()
+    samples = 0
+    try:
+        while args.count is None or samples < args.count:
+            time.sleep(args.interval)
+            stats = poller.get_stats()
+            emit("traffic", ip=args.ip, interface=args.interface, rx_bps=stats["rx"], tx_bps=stats["tx"])
+            samples += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.stop()
+    return 0
+
+
+def cmd_serve(args):
+    from discovery.mndp_scanner import MNDP_Scanner
+    from discovery.health_sweeper import HealthSweeper
+    from logic.ipam import IPAM, DEFAULT_IPAM_PATH
+    from logic.journal import DeploymentJournal
+    from server.api_server import ApiServer
+    journal = DeploymentJournal()
+    for action, records in journal.recover().items():
+        for record in records:
+            emit("interrupted", **record)
+    scanner = MNDP_Scanner()
+    health = HealthSweeper(scanner=scanner)
+    health.start()
+    api = ApiServer(scanner=scanner, health=health, host=args.host, port=args.port,
+                    token=args.token or os.environ.get("TITAN_API_TOKEN"),
+                    max_requests=args.max_requests, ipam=IPAM(DEFAULT_IPAM_PATH), journal=journal)
+    api.start()
+    if api.generated_token:
+        emit("serving", url=api.url(), token=api.token)
+    else:
+        emit("serving", url=api.url())
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        health.stop()
+        journal.close()
+    return 0
+
+
+def cmd_simulate(args):
+    from logic.firewall_sim import FirewallSimulator
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = f.read()
+    else:
+        from logic.generator import ConfigGenerator
+        with open(args.context) as f:
+            context = json.load(f)
+        script = ConfigGenerator().generate(context)
+
+    sim = FirewallSimulator(script)
+    for warning in sim.warnings:
+        emit("warning", message=warning)
+    flows = sim.make_flows(args.flows, seed=args.seed)
+    result = sim.evaluate(flows)
+    for row in sim.hit_report(result["hits"]):
+        emit("rule_hits", **row)
+    for suggestion in sim.suggest_order(result["hits"]):
+        emit("reorder", **suggestion)
+
+    # What new connections arriving on WAN interfaces can reach on the router itself
+    for interface in sim.list_members("WAN"):
+        probe = sim.make_flows(args.flows, seed=args.seed, chain="input", in_interface=interface, state="new")
+        emit("wan_input", interface=interface, exposed=sim.exposed_services(probe, sim.evaluate(probe)))
+    return 0
+
+
+def cmd_capture(args):
+    from discovery.tzsp_receiver import TZSPReceiver, PcapRingWriter
+    writer = None
+    if args.output_dir:
+        writer = PcapRingWriter(args.output_dir, format=args.format,
+                                max_bytes=args.max_mb * 1024 * 1024, max_files=args.max_files)
+    receiver = TZSPReceiver(host=args.host, port=args.port, writer=writer)
+    receiver.start()
+    emit("capture_started", port=receiver.port, output_dir=args.output_dir)
+    started = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - started < args.duration:
+            time.sleep(args.interval if args.duration is None else
+                       max(0.0, min(args.interval, args.duration - (time.monotonic() - started))))
+            emit("capture_stats", **receiver.get_stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop()
+    emit("capture_complete", packets=receiver.get_stats()["packets"], files=writer.files if writer else [])
+    return 0
+
+
+def cmd_blocklist(args):
+    from logic.blocklist import BlocklistCompiler, DEFAULT_FEED_URL, TIERS, MIRROR_PATH
+    compiler = BlocklistCompiler()
+    feeds = []
+    for source in args.sources or [DEFAULT_FEED_URL]:
+        feeds.append(compiler.load(source))
+        emit("feed_loaded", source=source)
+    result = compiler.compile(feeds)
+    emit("blocklist", domains=len(result["domains"]), source_count=result["source_count"],
+         duplicates=result["duplicates"], covered=result["covered"])
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for tier, body in compiler.tiers(result["domains"]).items():
+            path = os.path.join(args.output_dir, f"{tier}.txt")
+            with open(path, "w", newline="\n") as f:
+                f.write(body)
+            emit("tier_written", tier=tier, output=path, entries=body.count("\n"))
+
+    if not args.serve:
+        return 0
+    from server.asset_server import AssetServer
+    server = AssetServer(host=args.host, port=args.port)
+    counts = compiler.publish(server, result["domains"])
+    server.start()
+    for _, tier, _ in TIERS:
+        emit("tier_published", tier=tier, url=server.url(MIRROR_PATH.format(tier=tier)), entries=counts[tier])
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="titan", description="Project Titan headless mode (JSON lines on stdout).")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    def add_credentials(p):
+        p.add_argument("--user", default="admin", help="SSH user (default: admin)")
+        p.add_argument("--password", help="SSH password (default: $TITAN_PASSWORD)")
+
+    p = sub.add_parser("scan", help="Discover MikroTik neighbors via MNDP")
+    p.add_argument("--duration", type=float, default=65, help="Seconds to listen (default: 65)")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("audit", help="Run compliance checks against one or more routers")
+    p.add_argument("targets", nargs="*", help="Router IPs")
+    p.add_argument("--targets-file", help="File with one IP per line")
+    p.add_argument("--concurrency", type=int, default=16, help="Routers audited in parallel")
+    add_credentials(p)
+    p.set_defaults(func=cmd_audit)
+
+    p = sub.add_parser("generate", help="Render a configuration script from a JSON context")
+    p.add_argument("--context", required=True, help="JSON context file ('-' for stdin)")
+    p.add_argument("--output", help="Write the script here instead of embedding it in the JSON line")
+    p.add_argument("--compact", action="store_true", help="Group commands by menu and fold regular runs into loops")
+    p.add_argument("--strip-comments", action="store_true", help="Compact and drop comments/blank lines")
+    p.add_argument("--ipam", help="IPAM allocations file (default: ~/.titan/ipam.json)")
+    p.add_argument("--model", help="Target board name (overrides the context's 'model'); enables hardware checks")
+    p.add_argument("--profile", action="store_true", help="Time templates, loops and filters; emits a 'profile' event")
+    p.add_argument("--profile-output", help="With profiling, write folded stacks here (flamegraph.pl / speedscope)")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("deploy", help="Upload and apply a script with rollback protection")
+    p.add_argument("ip", help="Current router IP")
+    p.add_argument("--script", required=True, help="RouterOS script (.rsc)")
+    p.add_argument("--target-lan-ip", required=True, help="IP the router answers on after the import")
+    p.add_argument("--heavy", action="store_true", help="Script installs containers (longer reboot wait)")
+    p.add_argument("--no-rollback", action="store_true", help="Skip the snapshot/rollback scheduler")
+    p.add_argument("--confirm-user", help="User that confirms the new config (default: --user)")
+    p.add_argument("--confirm-password", help="Password for --confirm-user")
+    add_credentials(p)
+    p.set_defaults(func=cmd_deploy)
+
+    p = sub.add_parser("monitor", help="Stream interface traffic")
+    p.add_argument("ip", help="Router IP")
+    p.add_argument("--interface", default="ether1")
+    p.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    p.add_argument("--count", type=int, help="Stop after this many samples")
+    add_credentials(p)
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("serve", help="Run the local HTTP/JSON API for automation")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--token", help="Bearer token clients must send (default: $TITAN_API_TOKEN, else a random one)")
+    p.add_argument("--max-requests", type=int, default=32, help="Concurrent requests before answering 429")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("simulate", help="Run synthetic flows through a config's firewall (needs NumPy)")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--context", help="JSON context to render first")
+    source.add_argument("--script", help="Rendered RouterOS script (.rsc)")
+    p.add_argument("--flows", type=int, default=1000000, help="Random flows to evaluate (default: 1000000)")
+    p.add_argument("--seed", type=int, help="Random seed (repeatable runs)")
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser("capture", help="Receive RouterOS sniffer streams (TZSP) into a pcap ring")
+    p.add_argument("--host", default="0.0.0.0", help="Bind address (default: all interfaces)")
+    p.add_argument("--port", type=int, default=37008, help="TZSP UDP port (default: 37008)")
+    p.add_argument("--output-dir", help="Write rotating capture files here (counters only when omitted)")
+    p.add_argument("--format", choices=("pcapng", "pcap"), default="pcapng")
+    p.add_argument("--max-mb", type=int, default=64, help="Rotate files at this size (default: 64)")
+    p.add_argument("--max-files", type=int, default=8, help="Files kept in the ring (default: 8)")
+    p.add_argument("--duration", type=float, help="Stop after this many seconds")
+    p.add_argument("--interval", type=float, default=5.0, help="Seconds between capture_stats lines")
+    p.set_defaults(func=cmd_capture)
+
+    p = sub.add_parser("blocklist", help="Compile AdList blocklists per RAM tier and optionally mirror them")
+    p.add_argument("sources", nargs="*", help="Feed files or URLs (default: the StevenBlack hosts file)")
+    p.add_argument("--output-dir", help="Write one hosts file per tier (s/m/l/xl.txt) here")
+    p.add_argument("--serve", action="store_true", help="Serve the tiers at /adlist/<tier>.txt (context adblock_mirror)")
+    p.add_argument("--host", default="0.0.0.0", help="Mirror bind address (default: all interfaces)")
+    p.add_argument("--port", type=int, default=8080)
+    p.set_defaults(func=cmd_blocklist)
+
+    return parser
+
+
+def main(argv=None):
+    global _out
+    args = build_parser().parse_args(argv)
+    _out, sys.stdout = sys.stdout, sys.stderr
+    try:
+        return args.func(args)
+    except (OSError, ValueError, ImportError) as e:
+        emit("error", command=args.command, message=str(e))
+        return 1
+    finally:
+        sys.stdout, _out = _out, None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+
+class HealthSweeper:
+    """
+    Background reachability sweeper for known routers.
+
+    Probes every MNDP neighbor (from an attached MNDP_Scanner) plus manually added
+    inventory with cheap concurrent TCP connects to the management ports. A refused
+    connection still proves the host is alive; only timeouts/unreachable count as down.
+    (ICMP would need raw sockets, i.e. admin rights, so it is not used.)
+
+    Intervals adapt per device: every probe that confirms the previous state doubles
+    the interval up to max_interval, any state change drops it back to min_interval.
+    """
+
+    PROBE_PORTS = (22, 8291) # SSH, Winbox
+    TICK = 0.5 # Scheduler resolution (seconds)
+    # is_reachable() only trusts verdicts this recent; backed-off ones can be a minute old
+    FRESH_FOR = 10.0
+
+    def __init__(self, scanner=None, probe_timeout=1.0, min_interval=2.0, max_interval=60.0, concurrency=64):
+        self.scanner = scanner
+        self.probe_timeout = probe_timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.concurrency = concurrency
+        self.running = False
+        self._inventory = set()
+        self._health = {} # Keyed by IP
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # --- Inventory ---
+    def add_device(self, ip):
+        """Adds a manually managed device (e.g. from the login form or an inventory file)."""
+        with self._lock:
+            self._inventory.add(ip)
+
+    def remove_device(self, ip):
+        with self._lock:
+            self._inventory.discard(ip)
+            self._health.pop(ip, None)
+
+    def _known_devices(self):
+        ips = set()
+        if self.scanner:
+            ips.update(n.get('ip') for n in self.scanner.get_neighbors())
+        with self._lock:
+            ips.update(self._inventory)
+        ips.discard(None)
+        ips.discard("0.0.0.0")
+        return ips
+
+    # --- Queries ---
+    def get_health(self, ip):
+        """Returns a copy of the health record for `ip`, or None if never probed."""
+        with self._lock:
+            entry = self._health.get(ip)
+            return dict(entry) if entry else None
+
+    def get_health_map(self):
+        """Returns {ip: state} for every probed device ('up' / 'down')."""
+        with self._lock:
+            return {ip: entry["state"] for ip, entry in self._health.items()}
+
+    def is_reachable(self, ip, max_age=None):
+        """
+        True/False from the last probe, None if the device has not been probed yet or the
+        last probe is older than `max_age` seconds (default FRESH_FOR). Callers fail fast
+        only on False, so a router that just came back is never refused on an old verdict;
+        a stale entry is also moved to the front of the probe queue.
+        """
+        max_age = self.FRESH_FOR if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            entry = self._health.get(ip)
+            if not entry:
+                return None
+            if now - entry["last_checked"] > max_age:
+                entry["next_check"] = now
+                return None
+            return entry["state"] == "up"
+
+    # --- Probing ---
+    async def probe(self, ip):
+        """
+        Returns (is_up, rtt_ms). Ports are tried in order; the first port that
+        answers (accept or refuse) decides.
+        """
+        for port in self.PROBE_PORTS:
+            start = time.monotonic()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=self.probe_timeout)
+                writer.close()
+                return True, (time.monotonic() - start) * 1000
+            except ConnectionRefusedError:
+                return True, (time.monotonic() - start) * 1000
+            except (asyncio.TimeoutError, OSError):
+                continue
+        return False, None
+
+    def _record(self, ip, is_up, rtt_ms, now):
+        state = "up" if is_up else "down"
+        with self._lock:
+            entry = self._health.get(ip)
+            if entry is None or entry["state"] != state:
+                interval = self.min_interval
+                changed_at = now
+            else:
+                interval = min(entry["interval"] * 2, self.max_interval)
+                changed_at = entry["changed_at"]
+            self._health[ip] = {
+                "state": state,
+                "rtt_ms": rtt_ms,
+                "last_checked": now,
+                "changed_at": changed_at,
+                "interval": interval,
+                "next_check": now + interval,
+            }
+
+    async def sweep_once(self, force=False):
+        """
+        Probes every device that is due (or all of them when force=True).
+        Returns the number of devices probed.
+        """
+        now = time.time()
+        with self._lock:
+            health = dict(self._health)
+        due = [ip for ip in self._known_devices()
+               if force or ip not in health or health[ip]["next_check"] <= now]
+        if not due:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(ip):
+            async with semaphore:
+                is_up, rtt_ms = await self.probe(ip)
+            self._record(ip, is_up, rtt_ms, time.time())
+
+        await asyncio.gather(*(check(ip) for ip in due))
+        return len(due)
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts sweeping in a background thread."""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._sweep_loop()), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=self.probe_timeout * len(self.PROBE_PORTS) + 1)
+
+    async def _sweep_loop(self):
+        while self.running:
+            try:
+                await self.sweep_once()
+            except Exception as e:
+                print(f"Health Sweep Error: {e}")
+            await asyncio.sleep(self.TICK)
@@ -2,8 +2,28 @@ import threading
 import struct
 import socket
 import time
-from scapy.all import sniff, UDP, IP, Ether
-from scapy.config import conf
+import ipaddress
+
+# Scapy is imported on first use: 'scapy.all' costs over a second of startup.
+# The names below are bound into this module's globals by _load_scapy(), which
+# leaves any existing binding alone (so tests can patch e.g. 'sniff').
+_SCAPY_NAMES = ("sniff", "UDP", "IP", "Ether")
+
+
+def _load_scapy():
+    missing = [name for name in _SCAPY_NAMES if name not in globals()]
+    if missing:
+        import scapy.all
+        for name in missing:
+            globals()[name] = getattr(scapy.all, name)
+
+
+def __getattr__(name):
+    # Module-level access (e.g. mock.patch('discovery.mndp_scanner.sniff')) loads Scapy lazily
+    if name in _SCAPY_NAMES:
+        _load_scapy()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class MNDP_Scanner:
     """
@@ -21,21 +41,38 @@ class MNDP_Scanner:
     TLV_VERSION = 7
     TLV_PLATFORM = 8
     TLV_UPTIME = 10
+    TLV_BOARD = 12
     TLV_INTERFACE_NAME = 16
 
+    # RouterOS announces MNDP every 60s, so a bounded scan needs a little longer than that
+    DEFAULT_SCAN_DURATION = 65
+
     def __init__(self):
         self.neighbors = {} # Keyed by MAC to avoid duplicates
         self.running = False
+        self.generation = 0 # Bumped whenever the neighbor table changes
+        self.duration = None
+        self.started_at = None
         self._lock = threading.Lock()
         self._sniff_thread = None
 
-    def start_scan(self):
-        """Starts the scanning process in a background thread."""
+    def start_scan(self, duration=None):
+        """
+        Starts the scanning process in a background thread.
+
+        Args:
+            duration: Seconds to listen before the scan finishes on its own.
+                      None keeps sniffing until stop_scan().
+        """
         if self.running:
             return
             
         self.running = True
-        self.neighbors = {} # Clear previous results
+        self.duration = duration
+        self.started_at = time.monotonic()
+        with self._lock:
+            self.neighbors = {} # Clear previous results
+            self.generation += 1
         
         # Start sniffing in a separate thread
         self._sniff_thread = threading.Thread(target=self._sniff_packet, daemon=True)
@@ -46,18 +83,39 @@ class MNDP_Scanner:
         """Stops the scanning process."""
         self.running = False
 
+    def get_progress(self):
+        """
+        Returns the scan state for progress displays:
+            {"running": bool, "elapsed": s, "duration": s or None,
+             "fraction": 0..1 or None, "neighbors": count}
+        """
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        fraction = None
+        if self.duration:
+            fraction = 1.0 if not self.running else min(elapsed / self.duration, 1.0)
+        with self._lock:
+            count = len(self.neighbors)
+        return {"running": self.running, "elapsed": elapsed, "duration": self.duration,
+                "fraction": fraction, "neighbors": count}
+
     def _sniff_packet(self):
         """Scapy sniff loop."""
         # filter: UDP port 5678
         # stop_filter: check self.running
         try:
+            _load_scapy()
             sniff(filter=f"udp port {self.MNDP_PORT}", 
                   prn=self._process_packet, 
                   store=0, 
+                  timeout=self.duration,
                   stop_filter=lambda x: not self.running)
         except Exception as e:
             print(f"Scapy Sniff Error: {e}")
             self.running = False
+        else:
+            if self.duration:
+                # sniff() returned on its timeout: the scan is complete
+                self.running = False
 
     def _process_packet(self, packet):
         """
@@ -67,6 +125,7 @@ class MNDP_Scanner:
         if not self.running:
             return
 
+        _load_scapy()
         if UDP in packet and packet[UDP].dport == self.MNDP_PORT:
             try:
                 payload = bytes(packet[UDP].payload)
@@ -82,8 +141,10 @@ class MNDP_Scanner:
                 # Use MAC as unique key
                 if 'mac' in info:
                     with self._lock:
-                        # Update or add neighbor
-                        self.neighbors[info['mac']] = info
+                        # Update or add neighbor (repeat announcements change nothing)
+                        if self.neighbors.get(info['mac']) != info:
+                            self.neighbors[info['mac']] = info
+                            self.generation += 1
             except Exception as e:
                 print(f"Error parsing packet: {e}")
 
@@ -121,6 +182,10 @@ class MNDP_Scanner:
             elif tlv_type == self.TLV_PLATFORM:
                 info['platform'] = value_bytes.decode('utf-8', errors='ignore')
                 
+            elif tlv_type == self.TLV_BOARD:
+                # Board name (e.g. RB5009UG+S+), keys the hardware capability DB
+                info['board'] = value_bytes.decode('utf-8', errors='ignore')
+
             elif tlv_type == self.TLV_INTERFACE_NAME:
                 info['interface'] = value_bytes.decode('utf-8', errors='ignore')
                 
@@ -139,50 +204,99 @@ class MNDP_Scanner:
         with self._lock:
             return list(self.neighbors.values())
 
-    def get_neighbors_json(self):
+    # Above this many device nodes, the largest subnets collapse into aggregate nodes
+    MAX_GRAPH_NODES = 2000
+
+    def get_topology_elements(self, health=None, max_nodes=None):
         """
-        Returns neighbors formatted for Cytoscape.js (Node List).
+        Builds the Cytoscape.js element list for the current neighbor table.
+
+        Devices are grouped into one compound node per /24 subnet (the PC links to the
+        subnet, not to every device). If there are more than `max_nodes` devices, the
+        largest subnets are replaced by a single aggregate node with a device count.
+
+        Args:
+            health: Optional {ip: 'up'|'down'} map (HealthSweeper.get_health_map()).
+                    Each node gets a 'health' field the graph colours by.
+            max_nodes: Device node cap (defaults to MAX_GRAPH_NODES).
         """
-        import json
-        nodes = []
-        edges = []
-        
+        health = health or {}
+        max_nodes = self.MAX_GRAPH_NODES if max_nodes is None else max_nodes
+
         # Central node (The PC running the app)
-        nodes.append({"data": {"id": "PC", "label": "Titan Commander", "color": "#555"}})
-        
+        elements = [{"data": {"id": "PC", "label": "Titan Commander", "color": "#555"}}]
+
+        subnets = {}
         with self._lock:
             for neighbor in self.neighbors.values():
-                mac = neighbor.get('mac', 'Unknown')
-                identity = neighbor.get('identity', mac)
-                version = neighbor.get('version', '?')
-                ip = neighbor.get('ip', '0.0.0.0')
-                
-                # Color logic based on version
-                color = "#ff8c00" # Orange (v6/Legacy default)
-                if "v7" in version or version.startswith("7"):
-                    color = "#007acc" # Blue (v7)
-                
-                node_id = mac
-                label = f"{identity}\n{ip}\n{version}"
-                
-                nodes.append({
-                    "data": {
-                        "id": node_id,
-                        "label": label,
-                        "color": color,
-                        "info": neighbor # Store full info for click handler
-                    }
-                })
-                
-                # Edge from PC to Node
-                edges.append({
-                    "data": {
-                        "source": "PC",
-                        "target": node_id
-                    }
-                })
-                
-        return json.dumps(nodes + edges)
+                subnets.setdefault(self._subnet_of(neighbor.get('ip', '0.0.0.0')), []).append(neighbor)
+
+        # Collapse the biggest subnets first until the device count fits the cap
+        aggregated = set()
+        shown = sum(len(members) for members in subnets.values())
+        for subnet, members in sorted(subnets.items(), key=lambda kv: -len(kv[1])):
+            if shown <= max_nodes:
+                break
+            aggregated.add(subnet)
+            shown -= len(members) - 1
+
+        for subnet in sorted(subnets):
+            members = subnets[subnet]
+            if subnet in aggregated:
+                agg_id = f"agg:{subnet}"
+                down = sum(1 for n in members if health.get(n.get('ip')) == "down")
+                elements.append({"data": {
+                    "id": agg_id,
+                    "label": f"{subnet}\n{len(members)} devices" + (f" ({down} down)" if down else ""),
+                    "color": "#888",
+                    "aggregate": True,
+                    "count": len(members),
+                    "health": "down" if down == len(members) else ("up" if not down else "unknown"),
+                }})
+                elements.append({"data": {"id": f"e:{agg_id}", "source": "PC", "target": agg_id}})
+                continue
+
+            cluster_id = f"subnet:{subnet}"
+            elements.append({"data": {"id": cluster_id, "label": f"{subnet} ({len(members)})", "cluster": True}})
+            elements.append({"data": {"id": f"e:{cluster_id}", "source": "PC", "target": cluster_id}})
+            for neighbor in members:
+                elements.append({"data": self._node_data(neighbor, health, cluster_id)})
+
+        return elements
+
+    def _subnet_of(self, ip):
+        # MNDP carries no netmask; /24 is the grouping granularity
+        try:
+            return str(ipaddress.ip_network(f"{ip}/24", strict=False)) if ip != "0.0.0.0" else "unknown"
+        except ValueError:
+            return "unknown"
+
+    def _node_data(self, neighbor, health, parent):
+        mac = neighbor.get('mac', 'Unknown')
+        identity = neighbor.get('identity', mac)
+        version = neighbor.get('version', '?')
+        ip = neighbor.get('ip', '0.0.0.0')
+
+        # Color logic based on version
+        color = "#ff8c00" # Orange (v6/Legacy default)
+        if "v7" in version or version.startswith("7"):
+            color = "#007acc" # Blue (v7)
+
+        return {
+            "id": mac,
+            "label": f"{identity}\n{ip}\n{version}",
+            "color": color,
+            "health": health.get(ip, "unknown"),
+            "parent": parent,
+            "info": neighbor # Store full info for click handler
+        }
+
+    def get_neighbors_json(self, health=None):
+        """
+        Returns neighbors formatted for Cytoscape.js (see get_topology_elements()).
+        """
+        import json
+        return json.dumps(self.get_topology_elements(health=health))
 
 if __name__ == "__main__":
     # Test run
@@ -0,0 +1,133 @@
+import bisect
+import ipaddress
+import re
+
+
+class NeighborIndex:
+    """
+    Sorted, searchable view over the MNDP neighbor table (for the inventory list).
+
+    Every sortable column keeps a pre-sorted list of row positions, and identity and
+    version keep a sorted (lowercased key, position) list, so a prefix search is two
+    bisects instead of a scan over every device. Rows are rebuilt only when the
+    scanner's generation counter moves.
+    """
+
+    COLUMNS = ("identity", "ip", "mac", "version", "platform", "board", "uptime", "health", "last_audit")
+    PREFIX_COLUMNS = ("identity", "version")
+
+    def __init__(self):
+        self.rows = []
+        self.generation = None
+        self._order = {} # column -> row positions in ascending order
+        self._prefix = {} # column -> sorted [(lowercased value, position)]
+        self._keys = {} # column -> sorted keys (parallel to _prefix, for bisect)
+
+    def rebuild(self, neighbors, health=None, audits=None, generation=None):
+        """
+        Replaces the indexed rows.
+
+        Args:
+            neighbors: MNDP_Scanner.get_neighbors() output.
+            health: Optional {ip: 'up'|'down'} map.
+            audits: Optional {ip: summary string} of the last audit per device.
+            generation: Scanner generation the rows were built from (see is_stale()).
+        """
+        health = health or {}
+        audits = audits or {}
+        rows = []
+        for neighbor in neighbors:
+            ip = neighbor.get('ip', '0.0.0.0')
+            rows.append({
+                "identity": neighbor.get('identity', ''),
+                "ip": ip,
+                "mac": neighbor.get('mac', ''),
+                "version": neighbor.get('version', ''),
+                "platform": neighbor.get('platform', ''),
+                "board": neighbor.get('board', ''),
+                "uptime": neighbor.get('uptime'),
+                "health": health.get(ip, "unknown"),
+                "last_audit": audits.get(ip, ""),
+            })
+        self.rows = rows
+        self.generation = generation
+        self._order = {}
+        self._prefix = {}
+        self._keys = {}
+        for column in self.PREFIX_COLUMNS:
+            pairs = sorted((str(row[column]).lower(), i) for i, row in enumerate(rows))
+            self._prefix[column] = pairs
+            self._keys[column] = [key for key, _ in pairs]
+
+    VERSION_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)(.*)$')
+
+    def is_stale(self, generation):
+        return generation is None or generation != self.generation
+
+    def _sort_key(self, column):
+        if column == "ip":
+            def key(i):
+                try:
+                    return int(ipaddress.ip_address(self.rows[i]["ip"]))
+                except ValueError:
+                    return -1
+            return key
+        if column == "uptime":
+            return lambda i: self.rows[i]["uptime"] or 0
+        if column == "version":
+            # Numeric parts compare as numbers (7.10 after 7.9); '7.12beta3' -> ((7, 12), 'beta3')
+            def key(i):
+                version = str(self.rows[i]["version"]).strip().lower()
+                match = self.VERSION_PATTERN.match(version)
+                if not match:
+                    return (), version
+                return tuple(int(part) for part in match.group(1).split('.')), match.group(2).strip()
+            return key
+        return lambda i: str(self.rows[i][column]).lower()
+
+    def order(self, column):
+        """Row positions sorted by `column` (computed once per rebuild)."""
+        if column not in self.COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+        if column not in self._order:
+            self._order[column] = sorted(range(len(self.rows)), key=self._sort_key(column))
+        return self._order[column]
+
+    def prefix_matches(self, column, prefix):
+        """Set of row positions whose `column` starts with `prefix` (case-insensitive)."""
+        prefix = prefix.lower()
+        keys = self._keys[column]
+        start = bisect.bisect_left(keys, prefix)
+        # Every string with this prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(keys, prefix + "\U0010ffff", start)
+        return {position for _, position in self._prefix[column][start:end]}
+
+    def query(self, identity=None, version=None, sort="identity", descending=False):
+        """
+        Returns row positions matching the filters, in sort order.
+
+        Args:
+            identity: Identity prefix (case-insensitive), or None.
+            version: Version prefix, e.g. '7' or '7.15', or None.
+            sort: Column to sort by (see COLUMNS).
+            descending: Reverse the sort.
+        """
+        matches = None
+        for column, prefix in (("identity", identity), ("version", version)):
+            if prefix:
+                found = self.prefix_matches(column, prefix)
+                matches = found if matches is None else matches & found
+        ordered = self.order(sort)
+        if descending:
+            ordered = ordered[::-1]
+        if matches is None:
+            return list(ordered)
+        if len(matches) * 8 < len(ordered):
+            # Few hits: sorting them is cheaper than walking the whole column order
+            hits = sorted(sorted(matches), key=self._sort_key(sort))
+            return hits[::-1] if descending else hits
+        return [i for i in ordered if i in matches]
+
+    def window(self, positions, offset, limit):
+        """The rows for positions[offset:offset + limit]."""
+        return [self.rows[i] for i in positions[offset:offset + limit]]
@@ -0,0 +1,355 @@
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+# TZSP encapsulation -> pcap LINKTYPE
+TZSP_LINKTYPES = {
+    1: 1, # Ethernet
+    18: 105, # IEEE 802.11
+    119: 119, # Prism header
+    127: 163, # WLAN AVS
+}
+
+# TZSP tagged fields: PADDING and END are one byte, every other tag is tag/length/value
+TZSP_TAG_PADDING = 0
+TZSP_TAG_END = 1
+
+_IP_PROTOCOLS = {1: "icmp", 2: "igmp", 6: "tcp", 17: "udp", 47: "gre", 50: "esp", 58: "icmpv6", 89: "ospf", 132: "sctp"}
+_ETHERTYPES = {0x0806: "arp", 0x8863: "pppoe-discovery", 0x8864: "pppoe", 0x88CC: "lldp", 0x8847: "mpls", 0x888E: "eapol"}
+_VLAN_TAGS = (0x8100, 0x88A8, 0x9100)
+
+
+def decapsulate(data, length):
+    """
+    Parses a TZSP header.
+
+    Args:
+        data: bytes / bytearray / memoryview holding the datagram.
+        length: Datagram length (the buffer may be larger).
+
+    Returns:
+        tuple: (encapsulation, payload offset), or None if the datagram is not a
+               TZSP 'received packet' frame.
+    """
+    if length < 5 or data[0] != 1 or data[1] != 0:
+        return None
+    encapsulation = (data[2] << 8) | data[3]
+    offset = 4
+    while offset < length:
+        tag = data[offset]
+        if tag == TZSP_TAG_END:
+            return encapsulation, offset + 1
+        if tag == TZSP_TAG_PADDING:
+            offset += 1
+            continue
+        if offset + 1 >= length:
+            return None
+        offset += 2 + data[offset + 1]
+    return None
+
+
+def classify(data, start, end):
+    """Protocol name of an Ethernet frame in data[start:end] (VLAN tags are skipped)."""
+    if end - start < 14:
+        return "malformed"
+    offset = start + 12
+    ethertype = (data[offset] << 8) | data[offset + 1]
+    while ethertype in _VLAN_TAGS and offset + 6 <= end:
+        offset += 4
+        ethertype = (data[offset] << 8) | data[offset + 1]
+    offset += 2
+    if ethertype == 0x0800:
+        if offset + 10 > end:
+            return "ipv4"
+        return _IP_PROTOCOLS.get(data[offset + 9], "ipv4")
+    if ethertype == 0x86DD:
+        if offset + 7 > end:
+            return "ipv6"
+        return _IP_PROTOCOLS.get(data[offset + 6], "ipv6")
+    return _ETHERTYPES.get(ethertype, f"0x{ethertype:04x}")
+
+
+class PcapRingWriter:
+    """
+    Rotating capture files: a new file is started once the current one reaches
+    max_bytes, and the oldest file is deleted when there are more than max_files, so a
+    capture can run unattended without filling the disk.
+
+    format='pcapng' (default) records each (router, link type) pair as its own
+    interface, named after the router, so one ring holds captures from many routers.
+    format='pcap' writes classic libpcap files; a file has a single link type, set by
+    its first packet, and packets of another link type are counted in `skipped`.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    DEFAULT_MAX_FILES = 8
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, directory, prefix="titan", format="pcapng", max_bytes=DEFAULT_MAX_BYTES,
+                 max_files=DEFAULT_MAX_FILES, snaplen=65535):
+        if format not in ("pcap", "pcapng"):
+            raise ValueError(f"Unknown capture format '{format}' (pcap or pcapng).")
+        self.directory = directory
+        self.prefix = prefix
+        self.format = format
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.snaplen = snaplen
+        self.files = [] # Paths in the ring, oldest first
+        self.skipped = 0
+        self._interfaces = {} # (source, linktype) -> pcapng interface id
+        self._linktype = None # Link type of the current pcap file
+        self._file = None
+        self._size = 0
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Files ---
+    def _open(self):
+        self.close()
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{self._sequence:05d}_{stamp}.{self.format}")
+        self._file = open(path, "wb", buffering=self.BUFFER_SIZE)
+        self._size = 0
+        self._linktype = None
+        self.files.append(path)
+        while len(self.files) > self.max_files:
+            try:
+                os.remove(self.files.pop(0))
+            except OSError:
+                pass
+        if self.format == "pcapng":
+            # Section header, then every interface seen so far (ids stay valid across files)
+            self._write(struct.pack("<IIIHHqI", 0x0A0D0D0A, 28, 0x1A2B3C4D, 1, 0, -1, 28))
+            for (source, linktype), _ in sorted(self._interfaces.items(), key=lambda item: item[1]):
+                self._write(self._interface_block(source, linktype))
+
+    def _write(self, data):
+        self._file.write(data)
+        self._size += len(data)
+
+    def _interface_block(self, source, linktype):
+        name = source.encode("utf-8")
+        padded = name + b"\0" * (-len(name) % 4)
+        options = struct.pack("<HH", 2, len(name)) + padded + struct.pack("<HH", 0, 0) # if_name, opt_endofopt
+        length = 20 + len(options)
+        return struct.pack("<IIHHI", 1, length, linktype, 0, self.snaplen) + options + struct.pack("<I", length)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # --- Packets ---
+    def write(self, source, linktype, timestamp_us, data):
+        """
+        Appends one packet.
+
+        Args:
+            source (str): Router the packet came from (pcapng interface name).
+            linktype (int): pcap LINKTYPE of `data`.
+            timestamp_us (int): Capture time in microseconds since the epoch.
+            data: bytes-like packet (e.g. a memoryview into the receive buffer).
+        """
+        if self._file is None or self._size >= self.max_bytes:
+            self._open()
+        captured = data[:self.snaplen]
+        length = len(captured)
+        if self.format == "pcap":
+            if self._linktype is None:
+                self._linktype = linktype
+                self._write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, self.snaplen, linktype))
+            elif linktype != self._linktype:
+                self.skipped += 1
+                return
+            self._write(struct.pack("<IIII", timestamp_us // 1000000, timestamp_us % 1000000, length, len(data)))
+            self._write(captured)
+            return
+
+        key = (source, linktype)
+        interface = self._interfaces.get(key)
+        if interface is None:
+            interface = self._interfaces[key] = len(self._interfaces)
+            self._write(self._interface_block(source, linktype))
+        padding = -length % 4
+        block_length = 32 + length + padding
+        self._write(struct.pack("<IIIIIII", 6, block_length, interface, timestamp_us >> 32,
+                                timestamp_us & 0xFFFFFFFF, length, len(data)))
+        self._write(captured)
+        self._write(b"\0" * padding + struct.pack("<I", block_length))
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+
+class TZSPReceiver:
+    """
+    Receives the TZSP stream of RouterOS '/tool sniffer' (UDP 37008), so Titan can
+    capture from many routers at once without Wireshark.
+
+    The socket is drained in batches: after select() reports data, up to `batch`
+    datagrams are read back-to-back with recvfrom_into() into preallocated buffers
+    (the closest Python gets to recvmmsg), then the whole batch is decapsulated,
+    counted and written. Counters are merged under the lock once per batch, and
+    packets are never copied between the socket and the capture file.
+    """
+
+    DEFAULT_PORT = 37008
+    BUFFER_SIZE = 65535 # Largest UDP datagram
+    RECV_BUFFER = 8 * 1024 * 1024 # Kernel socket buffer; absorbs bursts between batches
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, writer=None, batch=64):
+        self.host = host
+        self.port = port
+        self.writer = writer
+        self.batch = batch
+        self.running = False
+        self._buffers = [bytearray(self.BUFFER_SIZE) for _ in range(batch)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._packets = 0
+        self._bytes = 0
+        self._malformed = 0
+        self._protocols = {} # name -> [packets, bytes]
+        self._sources = {} # router IP -> packets
+        self._started_at = time.time()
+
+    # --- Socket ---
+    def bind(self):
+        """Opens the UDP socket (port 0 picks a free port). Returns the bound port."""
+        if self._sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RECV_BUFFER)
+            except OSError:
+                pass # Capped by the OS (net.core.rmem_max); the default still works
+            sock.bind((self.host, self.port))
+            sock.setblocking(False)
+            self._sock = sock
+            self.port = sock.getsockname()[1]
+        return self.port
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    # --- Receiving ---
+    def receive_batch(self, timeout=0.5):
+        """
+        Waits up to `timeout` for data, then drains up to `batch` datagrams and
+        processes them. Returns the number of datagrams handled.
+        """
+        if self._sock is None:
+            self.bind()
+        sock = self._sock
+        if not select.select([sock], [], [], timeout)[0]:
+            return 0
+        received = []
+        for view in self._views:
+            try:
+                length, address = sock.recvfrom_into(view)
+            except (BlockingIOError, InterruptedError):
+                break
+            received.append((view, length, address[0]))
+        if received:
+            self._process(received)
+        return len(received)
+
+    def _process(self, received):
+        timestamp_us = time.time_ns() // 1000 # One clock read per batch
+        protocols = {}
+        sources = {}
+        packets = size = malformed = 0
+        writer = self.writer
+        for view, length, source in received:
+            header = decapsulate(view, length)
+            if header is None:
+                malformed += 1
+                continue
+            encapsulation, offset = header
+            linktype = TZSP_LINKTYPES.get(encapsulation)
+            frame_length = length - offset
+            name = classify(view, offset, length) if linktype == 1 else f"encap-{encapsulation}"
+            counter = protocols.get(name)
+            if counter is None:
+                counter = protocols[name] = [0, 0]
+            counter[0] += 1
+            counter[1] += frame_length
+            sources[source] = sources.get(source, 0) + 1
+            packets += 1
+            size += frame_length
+            if writer is not None and linktype is not None:
+                writer.write(source, linktype, timestamp_us, view[offset:length])
+
+        with self._lock:
+            self._packets += packets
+            self._bytes += size
+            self._malformed += malformed
+            for name, (count, nbytes) in protocols.items():
+                counter = self._protocols.setdefault(name, [0, 0])
+                counter[0] += count
+                counter[1] += nbytes
+            for source, count in sources.items():
+                self._sources[source] = self._sources.get(source, 0) + count
+
+    # --- Queries ---
+    def get_stats(self):
+        """
+        Returns a snapshot: packets, bytes, malformed, pps/bps since start,
+        protocols ({name: {"packets", "bytes"}}) and sources ({router IP: packets}).
+        """
+        with self._lock:
+            elapsed = max(time.time() - self._started_at, 1e-6)
+            return {
+                "packets": self._packets,
+                "bytes": self._bytes,
+                "malformed": self._malformed,
+                "pps": self._packets / elapsed,
+                "bps": self._bytes * 8 / elapsed,
+                "protocols": {name: {"packets": c[0], "bytes": c[1]} for name, c in self._protocols.items()},
+                "sources": dict(self._sources),
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_stats()
+
+    # --- Lifecycle ---
+    def start(self):
+        """Binds and receives in a background thread. Returns the bound port."""
+        if self.running:
+            return self.port
+        self.bind()
+        self.running = True
+        self._thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._thread.start()
+        print(f"TZSP receiver listening on UDP {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.close()
+        if self.writer:
+            self.writer.close()
+
+    def _receive_loop(self):
+        while self.running:
+            try:
+                if not self.receive_batch(timeout=0.2) and self.writer:
+                    self.writer.flush() # Idle: make the capture readable on disk
+            except Exception as e:
+                print(f"TZSP Receive Error: {e}")
@@ -0,0 +1,138 @@
+import ipaddress
+import re
+
+# Networks that must never appear as a source on the WAN side (Team Cymru "fullbogons"
+# minus unallocated space, which changes too often to hard-code, and minus PRIVATE_V4).
+BOGONS_V4 = [
+    "0.0.0.0/8",        # "This" network
+    "127.0.0.0/8",      # Loopback
+    "169.254.0.0/16",   # Link local
+    "192.0.0.0/24",     # IETF protocol assignments
+    "192.0.2.0/24",     # TEST-NET-1
+    "198.18.0.0/15",    # Benchmarking
+    "198.51.100.0/24",  # TEST-NET-2
+    "203.0.113.0/24",   # TEST-NET-3
+    "224.0.0.0/4",      # Multicast
+    "240.0.0.0/4",      # Reserved + broadcast
+]
+
+# Default management networks (what security_hardening.j2 used to hard-code)
+RFC1918 = ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]
+
+# Bogons only on a public uplink: behind a modem or carrier NAT the WAN's own gateway,
+# DHCP server and neighbours use these addresses.
+PRIVATE_V4 = RFC1918 + ["100.64.0.0/10"] # + CGNAT
+
+
+def _interval(entry):
+    """Parses 'a.b.c.d', 'a.b.c.d/nn' or 'start-end' into (version, first, last)."""
+    entry = entry.strip()
+    if '-' in entry and '/' not in entry:
+        first, _, last = entry.partition('-')
+        first, last = ipaddress.ip_address(first.strip()), ipaddress.ip_address(last.strip())
+        if first.version != last.version or first > last:
+            raise ValueError(f"Invalid range '{entry}'.")
+        return first.version, int(first), int(last)
+    network = ipaddress.ip_network(entry, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+def _to_cidrs(first, last, bits):
+    """Minimal CIDR cover of [first, last]: repeatedly take the largest aligned block."""
+    cidrs = []
+    while first <= last:
+        # Largest block aligned at `first` (lowest set bit) that still fits in the range
+        size = (first & -first) if first else 1 << bits
+        while size > last - first + 1:
+            size >>= 1
+        cidrs.append((first, bits - size.bit_length() + 1))
+        first += size
+    return cidrs
+
+
+def aggregate(entries):
+    """
+    Merges addresses, CIDRs and ranges into the minimal equivalent CIDR list.
+
+    Intervals are sorted once and merged in a single pass (overlapping or adjacent
+    intervals join), then each merged interval is split into aligned blocks. IPv4
+    sorts before IPv6; the output is deterministic for any input order.
+
+    Raises:
+        ValueError: An entry is not an address, network or range.
+    """
+    intervals = sorted(_interval(entry) for entry in entries if entry and entry.strip())
+    merged = []
+    for version, first, last in intervals:
+        if merged and merged[-1][0] == version and first <= merged[-1][2] + 1:
+            if last > merged[-1][2]:
+                merged[-1][2] = last
+        else:
+            merged.append([version, first, last])
+
+    result = []
+    for version, first, last in merged:
+        bits = 32 if version == 4 else 128
+        address = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+        for start, prefixlen in _to_cidrs(first, last, bits):
+            result.append(f"{address(start)}/{prefixlen}")
+    return result
+
+
+def parse_feed(text):
+    """
+    Extracts entries from a blocklist feed: one entry per line, '#' and ';' start
+    comments (Spamhaus DROP style: '1.10.16.0/20 ; SBL256894').
+    """
+    entries = []
+    for line in text.splitlines():
+        entry = re.split(r'[#;]', line, 1)[0].strip()
+        if entry:
+            entries.append(entry.split()[0])
+    return entries
+
+
+class AddressListCompiler:
+    """
+    Compiles named address lists for the templates.
+
+    Each list is aggregated to its minimal CIDR set, split by IP version (RouterOS
+    keeps separate /ip and /ipv6 address lists) and cut into chunks. Every chunk is
+    rendered as its own ':do { } on-error={}' block by address_lists.j2, so one bad
+    entry only costs its chunk, and the router parses many small blocks instead of one
+    huge menu section.
+    """
+
+    CHUNK_SIZE = 1000
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,63}$')
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def compile(self, lists):
+        """
+        Args:
+            lists (dict): {list name: iterable of addresses / CIDRs / ranges}.
+
+        Returns:
+            list: One dict per list and IP version: name, family ('ip' or 'ipv6'),
+                  entries (aggregated CIDRs), chunks (lists of CIDRs) and source_count.
+        """
+        compiled = []
+        for name, entries in lists.items():
+            if not self.NAME_PATTERN.match(name):
+                raise ValueError(f"Invalid address-list name '{name}'.")
+            entries = list(entries)
+            cidrs = aggregate(entries)
+            for family, version in (("ip", 4), ("ipv6", 6)):
+                selected = [c for c in cidrs if (':' in c) == (version == 6)]
+                if not selected:
+                    continue
+                compiled.append({
+                    "name": name,
+                    "family": family,
+                    "entries": selected,
+                    "chunks": [selected[i:i + self.chunk_size] for i in range(0, len(selected), self.chunk_size)],
+                    "source_count": len(entries),
+                })
+        return compiled
@@ -5,8 +5,13 @@ class RouterAuditor:
     """
     Connects to a MikroTik router via SSH and performs compliance checks.
     """
-    def __init__(self):
-        pass
+    def __init__(self, health=None):
+        """
+        Args:
+            health: Optional HealthSweeper; devices it reports as down fail immediately
+                    instead of waiting for the SSH connect timeout.
+        """
+        self.health = health
 
     def _create_ssh_client(self, ip, user, password):
         client = paramiko.SSHClient()
@@ -30,6 +35,11 @@ class RouterAuditor:
             "checks": []
         }
         
+        if self.health and self.health.is_reachable(ip) is False:
+            report["passed"] = False
+            report["error"] = "Device is unreachable (health sweeper)."
+            return report
+
         client = self._create_ssh_client(ip, user, password)
         if not client:
             report["passed"] = False
@@ -0,0 +1,160 @@
+import re
+import urllib.request
+
+from logic.hardware_db import get_hardware_db
+
+# What routeros_v7_base.j2 fetched before the mirror existed (still the fallback)
+DEFAULT_FEED_URL = "https://raw.githubusercontent.com/StevenBlack/hosts/master/hosts"
+
+# URL path of each tier on the asset server: <mirror>/adlist/<tier>.txt
+MIRROR_PATH = "/adlist/{tier}.txt"
+
+# (max RAM in MB, tier name, max entries), smallest first. An adlist entry costs the
+# DNS service roughly 100-150 bytes, so every tier stays well under 10% of RAM.
+TIERS = [
+    (64, "s", 25000),
+    (256, "m", 100000),
+    (1024, "l", 500000),
+    (None, "xl", 2000000),
+]
+
+
+def tier_for(model):
+    """
+    Tier name for a board (MNDP board name). Unknown boards get the smallest tier: a
+    list that is too short costs some blocking, one that is too long can run a 32 MB
+    hAP lite out of memory.
+    """
+    profile = get_hardware_db().lookup(model)
+    if profile is None:
+        return TIERS[0][1]
+    for max_ram, name, _ in TIERS:
+        if max_ram is None or profile.ram_mb <= max_ram:
+            return name
+    return TIERS[-1][1]
+
+
+def mirror_url(mirror, model):
+    """Adlist URL of `model`'s tier on a mirror ('http://10.0.0.5:8080')."""
+    return mirror.rstrip("/") + MIRROR_PATH.format(tier=tier_for(model))
+
+
+class BlocklistCompiler:
+    """
+    Merges hosts-style blocklists into one compact list per RAM tier.
+
+    Accepted line formats: hosts files ('0.0.0.0 ads.example.com'), plain domain
+    lists and AdBlock network rules ('||ads.example.com^'). Names are lower-cased and
+    deduplicated, and subdomains of a listed domain are dropped because the router's
+    adlist already blocks them through the parent. Domains listed by more sources are
+    ranked first, so cutting the list to a tier keeps the most widely agreed entries;
+    a parent ranks as high as the best-ranked subdomain it absorbs.
+    """
+
+    DOMAIN = re.compile(r'^(?=.{1,253}$)(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\.)+[a-z][a-z0-9-]{1,62}$')
+    ADDRESSES = ("0.0.0.0", "127.0.0.1", "::", "::1", "::0")
+    IGNORED = {"localhost", "localhost.localdomain", "local", "broadcasthost", "ip6-localhost",
+               "ip6-loopback", "0.0.0.0"}
+
+    def parse(self, text):
+        """Returns the valid domains of one feed, in file order (duplicates included)."""
+        domains = []
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if not line or line.startswith('!') or line.startswith('['):
+                continue
+            if line.startswith('||'):
+                line = line[2:].split('^', 1)[0]
+                words = [line]
+            else:
+                words = line.split()
+                if words[0] in self.ADDRESSES:
+                    words = words[1:]
+                elif len(words) > 1:
+                    continue # Hosts entry pointing somewhere real; not a block
+            for word in words:
+                domain = word.lower().rstrip('.')
+                if domain not in self.IGNORED and self.DOMAIN.match(domain):
+                    domains.append(domain)
+        return domains
+
+    def compile(self, feeds):
+        """
+        Args:
+            feeds (list): Feed texts (see load()), highest priority first.
+
+        Returns:
+            dict: domains (ranked, compressed), source_count (domains read),
+                  duplicates and covered (subdomains dropped) counts.
+        """
+        votes = {} # domain -> number of feeds listing it, in first-seen order
+        source_count = 0
+        for text in feeds:
+            domains = self.parse(text)
+            source_count += len(domains)
+            for domain in dict.fromkeys(domains):
+                votes[domain] = votes.get(domain, 0) + 1
+
+        # Rank: more votes first, then first-seen order
+        rank = {domain: (count, -index) for index, (domain, count) in enumerate(votes.items())}
+        kept = []
+        for domain in votes:
+            root = self._covering(domain, votes)
+            if root is None:
+                kept.append(domain)
+            else:
+                # The subdomain is only blocked through its parent, so the parent must make
+                # every tier the subdomain would have made
+                rank[root] = max(rank[root], rank[domain])
+        kept.sort(key=rank.__getitem__, reverse=True)
+        return {
+            "domains": kept,
+            "source_count": source_count,
+            "duplicates": source_count - len(votes),
+            "covered": len(votes) - len(kept),
+        }
+
+    @staticmethod
+    def _covering(domain, listed):
+        """The topmost listed parent domain (at least two labels), or None."""
+        root = None
+        dot = domain.find('.')
+        while dot != -1:
+            parent = domain[dot + 1:]
+            if '.' not in parent:
+                break
+            if parent in listed:
+                root = parent
+            dot = domain.find('.', dot + 1)
+        return root
+
+    def tiers(self, domains):
+        """Returns {tier name: hosts-file text} with each tier cut to its entry budget."""
+        result = {}
+        for _, name, max_entries in TIERS:
+            selected = sorted(domains[:max_entries])
+            result[name] = "".join(f"0.0.0.0 {domain}\n" for domain in selected)
+        return result
+
+    def load(self, source, timeout=60):
+        """Reads a feed from a local file or an http(s) URL."""
+        if source.startswith(("http://", "https://")):
+            request = urllib.request.Request(source, headers={"User-Agent": "Project-Titan"})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read().decode("utf-8", errors="replace")
+        with open(source, encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    def publish(self, asset_server, domains):
+        """
+        Publishes every tier on an AssetServer (MIRROR_PATH); the server answers routers'
+        conditional GETs with 304 while the list is unchanged.
+
+        Returns:
+            dict: {tier name: entry count}
+        """
+        counts = {}
+        for name, body in self.tiers(domains).items():
+            asset_server.add(MIRROR_PATH.format(tier=name), body, content_type="text/plain; charset=utf-8")
+            counts[name] = body.count("\n")
+        return counts
@@ -0,0 +1,341 @@
+import ipaddress
+import re
+
+
+class ScriptCompactor:
+    """
+    Post-render pass that shrinks a RouterOS script without changing what it does.
+
+    1. Consecutive commands under the same menu are grouped: the menu path is written
+       once ("/ip address") and the commands follow as relative lines ("add ...").
+    2. Runs of commands that repeat with only numbers / IPv4 addresses changing become
+       one loop. Values that step by a constant are computed from the loop index
+       (':for i from=0 to=N'); one free-form value (e.g. a VLAN ID list) is iterated
+       with ':foreach i,v in={...}'.
+    3. Trailing ';', trailing blanks and repeated blank lines are removed; comments and
+       blank lines go too with strip_comments=True.
+
+    Anything the compactor does not fully understand is copied verbatim: ':' commands,
+    multi-line blocks ({ ... } bodies are never touched), continuation lines, commands
+    without a known verb, and quoted strings (numbers inside quotes never vary in a loop).
+    """
+
+    # Verbs that end the menu path of an absolute command ("/ip address add ...")
+    VERBS = ("add", "set", "remove", "enable", "disable", "unset", "comment", "move")
+    MIN_LOOP = 8 # Repetitions before a loop beats the unrolled lines
+    MAX_PERIOD = 4 # Lines per loop iteration
+
+    PATH_WORD = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+    NUMBER = re.compile(r'("(?:[^"\\]|\\.)*")|(?<![\w.])(\d{1,3}(?:\.\d{1,3}){3})(?![\w.])|(?<![\d.])(0|[1-9]\d*)(?![\d.])')
+
+    def compact(self, script, strip_comments=False, loops=True):
+        """
+        Args:
+            script (str): Rendered RouterOS script.
+            strip_comments (bool): Also drop '#' comment lines and blank lines.
+            loops (bool): Fold regular runs into :for / :foreach loops.
+
+        Returns:
+            str: The compacted script.
+        """
+        items = self._parse(script, strip_comments)
+        if loops:
+            items = self._fold_loops(items)
+        return self._emit(items)
+
+    def commands(self, script):
+        """
+        Returns (menu path, tokens) for every command the parser understands, with
+        relative lines resolved to their menu, e.g. ('/ip firewall filter', ['add',
+        'chain=input', ...]). Commands inside { } blocks and ':' commands are skipped.
+        """
+        return [(item[1], item[2]) for item in self._parse(script, True) if item[0] == "cmd"]
+
+    # --- Parsing ---
+    @staticmethod
+    def _split(line):
+        """Splits on whitespace outside quotes. Returns None for unbalanced quotes."""
+        if '"' not in line:
+            return line.split()
+        tokens, current, quoted, escaped = [], [], False, False
+        for ch in line:
+            if escaped:
+                current.append(ch)
+                escaped = False
+            elif ch == '\\' and quoted:
+                current.append(ch)
+                escaped = True
+            elif ch == '"':
+                current.append(ch)
+                quoted = not quoted
+            elif ch in ' \t' and not quoted:
+                if current:
+                    tokens.append(''.join(current))
+                    current = []
+            else:
+                current.append(ch)
+        if quoted:
+            return None
+        if current:
+            tokens.append(''.join(current))
+        return tokens
+
+    @staticmethod
+    def _brace_delta(line):
+        if '"' not in line:
+            return line.count('{') - line.count('}')
+        depth, quoted, escaped = 0, False, False
+        for ch in line:
+            if escaped:
+                escaped = False
+            elif ch == '\\' and quoted:
+                escaped = True
+            elif ch == '"':
+                quoted = not quoted
+            elif not quoted:
+                if ch == '{':
+                    depth += 1
+                elif ch == '}':
+                    depth -= 1
+        return depth
+
+    def _parse(self, script, strip_comments):
+        """
+        Returns a list of items:
+            ("cmd", path, tokens)  a command under menu `path`
+            ("raw", text)          copied verbatim (context-changing or not understood)
+            ("note", text)         comment / blank line (does not affect the menu)
+        """
+        lines = [line.rstrip() for line in script.splitlines()]
+        items = []
+        context = None # Menu the source is in (set by a bare path line)
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            stripped = line.strip()
+            i += 1
+
+            if not stripped or stripped.startswith('#'):
+                if strip_comments:
+                    continue
+                if not stripped and items and items[-1] == ("note", ""):
+                    continue # Collapse blank runs
+                items.append(("note", stripped))
+                continue
+
+            # Multi-line blocks and continuations are copied as one raw item
+            depth = self._brace_delta(stripped)
+            if depth > 0 or stripped.endswith('\\'):
+                block = [line]
+                while i < len(lines) and (depth > 0 or block[-1].rstrip().endswith('\\')):
+                    block.append(lines[i])
+                    depth += self._brace_delta(lines[i])
+                    i += 1
+                items.append(("raw", "\n".join(block)))
+                continue
+
+            if stripped.endswith(';') and self._split(stripped) is not None:
+                stripped = stripped[:-1].rstrip()
+            tokens = self._split(stripped)
+            if not tokens or depth != 0 or '{' in stripped:
+                items.append(("raw", stripped))
+                continue
+
+            if tokens[0].startswith('/'):
+                words = [tokens[0][1:]] + tokens[1:]
+                verb_at = next((n for n, word in enumerate(words) if word in self.VERBS), None)
+                path_words = words if verb_at is None else words[:verb_at]
+                if not path_words or not all(self.PATH_WORD.match(w) for w in path_words):
+                    items.append(("raw", stripped))
+                    continue
+                path = "/" + " ".join(path_words)
+                if verb_at is None:
+                    # Bare menu line: only a context switch if relative commands follow
+                    if self._next_is_relative(lines, i):
+                        context = path
+                    else:
+                        items.append(("raw", stripped))
+                    continue
+                items.append(("cmd", path, words[verb_at:]))
+            elif context and not stripped.startswith(':'):
+                items.append(("cmd", context, tokens))
+            else:
+                items.append(("raw", stripped))
+        return items
+
+    def _next_is_relative(self, lines, i):
+        while i < len(lines):
+            stripped = lines[i].strip()
+            i += 1
+            if not stripped or stripped.startswith('#'):
+                continue
+            return stripped[0] not in '/:{}'
+        return False
+
+    # --- Loops ---
+    def _signature(self, item):
+        """
+        Splits a command into a template and its numbers. Returns (signature, values);
+        two commands with the same signature differ only in those numbers.
+
+        The template is the command text with each number / IPv4 address replaced by
+        a NUL placeholder; quoted strings are matched first so they stay literal.
+        """
+        if item[0] != "cmd":
+            return None, None
+        kinds, values = [], []
+
+        def placeholder(match):
+            if match.group(2):
+                octets = [int(o) for o in match.group(2).split('.')]
+                if max(octets) > 255:
+                    return match.group(0) # e.g. 300.1.1.1 stays literal
+                kinds.append("ip")
+                values.append((octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3])
+            elif match.group(3):
+                kinds.append("num")
+                values.append(int(match.group(3)))
+            else:
+                return match.group(0)
+            return "\0"
+
+        template = self.NUMBER.sub(placeholder, " ".join(item[2]))
+        return (item[1], template, tuple(kinds)), values
+
+    def _fold_loops(self, items):
+        # Blank lines between two commands would break every run (templates emit one per loop pass)
+        items = [
+            item for n, item in enumerate(items)
+            if item != ("note", "") or not (0 < n < len(items) - 1 and items[n - 1][0] == "cmd" and items[n + 1][0] == "cmd")
+        ]
+        signatures = [self._signature(item) for item in items]
+        out = []
+        i = 0
+        while i < len(items):
+            best = None
+            if signatures[i][0] is not None:
+                for period in range(1, self.MAX_PERIOD + 1):
+                    reps = self._repetitions(signatures, i, period)
+                    if reps >= self.MIN_LOOP and (best is None or reps * period > best[0] * best[1]):
+                        best = (reps, period)
+            if best:
+                reps, period = best
+                loop = self._build_loop(items, signatures, i, reps, period)
+                if loop:
+                    out.append(("raw", loop))
+                else:
+                    out.extend(items[i:i + reps * period])
+                i += reps * period
+                continue
+            out.append(items[i])
+            i += 1
+        return out
+
+    @staticmethod
+    def _repetitions(signatures, start, period):
+        head = [signatures[start + j][0] for j in range(period) if start + j < len(signatures)]
+        if len(head) < period or None in head:
+            return 0
+        reps = 1
+        while True:
+            base = start + reps * period
+            if base + period > len(signatures):
+                return reps
+            if any(signatures[base + j][0] != head[j] for j in range(period)):
+                return reps
+            reps += 1
+
+    def _build_loop(self, items, signatures, start, reps, period):
+        """Returns the loop text, or None if the varying values are not regular."""
+        body = []
+        driver = None # Values iterated by :foreach
+        uses_index = False
+        for j in range(period):
+            signature, _ = signatures[start + j]
+            path, template, kinds = signature
+            columns = list(zip(*(signatures[start + r * period + j][1] for r in range(reps))))
+            exprs = []
+            for kind, column in zip(kinds, columns):
+                first, step = column[0], column[1] - column[0]
+                if all(value == first + step * r for r, value in enumerate(column)):
+                    exprs.append(self._affine(kind, first, step))
+                    uses_index = uses_index or step != 0
+                elif driver is None or driver == (kind, column):
+                    driver = (kind, column)
+                    exprs.append("$v")
+                else:
+                    return None
+            body.append(f"{path} {self._render(template, exprs)}")
+
+        lines = "\n".join("    " + line for line in body)
+        if driver is None:
+            return f":for i from=0 to={reps - 1} do={{\n{lines}\n}}"
+        kind, column = driver
+        values = ";".join(str(ipaddress.IPv4Address(v)) if kind == "ip" else str(v) for v in column)
+        loop_vars = "i,v" if uses_index else "v"
+        return f":foreach {loop_vars} in={{{values}}} do={{\n{lines}\n}}"
+
+    @staticmethod
+    def _affine(kind, first, step):
+        literal = str(ipaddress.IPv4Address(first)) if kind == "ip" else str(first)
+        if step == 0:
+            return literal
+        if kind == "num" and first == 0 and step == 1:
+            return "$i"
+        scaled = "$i" if abs(step) == 1 else f"($i * {abs(step)})"
+        return f"({literal} {'+' if step > 0 else '-'} {scaled})"
+
+    def _render(self, template, exprs):
+        """Fills the placeholders; values mixing text and expressions become '.' concatenations."""
+        exprs = iter(exprs)
+        tokens = []
+        for token in self._split(template):
+            if "\0" not in token:
+                tokens.append(token)
+                continue
+            pieces = [] # (dynamic, text), adjacent literals merged
+            for n, part in enumerate(token.split("\0")):
+                if n:
+                    text = next(exprs)
+                    dynamic = text[0] in "($"
+                    if not dynamic and pieces and not pieces[-1][0]:
+                        pieces[-1] = (False, pieces[-1][1] + text)
+                    else:
+                        pieces.append((dynamic, text))
+                if part:
+                    if pieces and not pieces[-1][0]:
+                        pieces[-1] = (False, pieces[-1][1] + part)
+                    else:
+                        pieces.append((False, part))
+            prefix = ""
+            if pieces and not pieces[0][0] and '=' in pieces[0][1]:
+                # key= never varies; keep it outside the expression
+                prefix, _, rest = pieces[0][1].partition('=')
+                prefix += '='
+                pieces = ([(False, rest)] if rest else []) + pieces[1:]
+            if not any(dynamic for dynamic, _ in pieces):
+                value = "".join(text for _, text in pieces)
+            elif len(pieces) == 1:
+                value = pieces[0][1]
+            else:
+                value = "(" + " . ".join(text if dynamic else f'"{text}"' for dynamic, text in pieces) + ")"
+            tokens.append(prefix + value)
+        return " ".join(tokens)
+
+    # --- Output ---
+    def _emit(self, items):
+        out = []
+        menu = None # Menu the output is in
+        for item in items:
+            if item[0] == "cmd":
+                _, path, tokens = item
+                if path != menu:
+                    out.append(path)
+                    menu = path
+                out.append(" ".join(tokens))
+            elif item[0] == "note":
+                out.append(item[1])
+            else:
+                out.append(item[1])
+                menu = None
+        return "\n".join(out).strip("\n") + "\n"
@@ -0,0 +1,175 @@
+import ipaddress
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class ConfigForm:
+    """
+    Wizard form state, independent of any Flet control.
+
+    The Wizard binds each field to one widget and writes through on change, so
+    generating a config never has to scrape the UI. validate() checks the values for
+    the selected scenario/WAN type and to_context() produces the ConfigGenerator context.
+    """
+
+    scenario_mode: str = "simple"
+    model: str = "" # Board name (MNDP 'board'); empty skips the hardware checks
+
+    # Basic
+    role: str = "Home Router"
+    wan_type: str = "dhcp"
+    wan_ip: str = ""
+    wan_subnet: str = "24"
+    wan_gateway: str = ""
+    pppoe_user: str = ""
+    pppoe_pass: str = ""
+    lan_ip: str = "192.168.88.1"
+    wifi_ssid: str = ""
+    wifi_pass: str = ""
+    admin_user: str = "titan_admin"
+    admin_pass: str = ""
+    vpn_enabled: bool = False
+
+    # Scenario
+    wan2_interface: str = ""
+    vlan_ids: str = "" # Comma separated, as typed
+    hq_wg_pubkey: str = ""
+    site_id: str = "" # IPAM key prefix for branch VLAN subnets
+    mgmt_ip: str = ""
+    ospf_area: str = "0.0.0.0"
+
+    # Routing
+    ospf_enabled: bool = False
+    bgp_enabled: bool = False
+    bgp_asn: str = "65000"
+
+    # Services
+    container_enabled: bool = False
+    adblock_enabled: bool = False
+    hotspot_enabled: bool = False
+
+    # QoS
+    qos_type: str = "none"
+    voip_enabled: bool = False
+
+    SCENARIOS = ("simple", "branch", "wisp")
+    WAN_TYPES = ("dhcp", "static", "pppoe")
+
+    def set(self, name, value):
+        """Assigns one field, coercing it to the field's declared type."""
+        field_types = {f.name: f.type for f in fields(self)}
+        if name not in field_types:
+            raise AttributeError(f"Unknown form field: {name}")
+        if field_types[name] in (bool, "bool"):
+            value = bool(value)
+        else:
+            value = "" if value is None else str(value)
+        setattr(self, name, value)
+
+    def vlan_list(self):
+        return [v.strip() for v in self.vlan_ids.split(',') if v.strip()]
+
+    def validate(self):
+        """
+        Returns:
+            dict: {field name: error message}; empty when the form is valid.
+        """
+        errors = {}
+
+        def check_ip(name, required=True, network=False):
+            value = getattr(self, name).strip()
+            if not value:
+                if required:
+                    errors[name] = "Required."
+                return
+            try:
+                if network:
+                    ipaddress.ip_network(value, strict=False)
+                else:
+                    ipaddress.ip_address(value)
+            except ValueError:
+                errors[name] = f"'{value}' is not a valid {'network' if network else 'IP address'}."
+
+        if self.scenario_mode not in self.SCENARIOS:
+            errors["scenario_mode"] = f"Unknown scenario '{self.scenario_mode}'."
+        if self.wan_type not in self.WAN_TYPES:
+            errors["wan_type"] = f"Unknown WAN type '{self.wan_type}'."
+
+        check_ip("lan_ip")
+        if self.wan_type == "static":
+            check_ip("wan_ip")
+            check_ip("wan_gateway")
+            if not self.wan_subnet.isdigit() or not 0 <= int(self.wan_subnet) <= 32:
+                errors["wan_subnet"] = "Prefix length must be 0-32."
+        elif self.wan_type == "pppoe" and not self.pppoe_user.strip():
+            errors["pppoe_user"] = "Required for PPPoE."
+
+        if not self.admin_pass:
+            errors["admin_pass"] = "Required."
+        if self.wifi_pass and len(self.wifi_pass) < 8:
+            errors["wifi_pass"] = "WPA2 needs at least 8 characters."
+        if self.bgp_enabled and not (self.bgp_asn.isdigit() and 1 <= int(self.bgp_asn) <= 4294967295):
+            errors["bgp_asn"] = "ASN must be 1-4294967295."
+
+        if self.scenario_mode == "branch":
+            bad = [v for v in self.vlan_list() if not (v.isdigit() and 1 <= int(v) <= 4094)]
+            if bad:
+                errors["vlan_ids"] = f"Invalid VLAN ID(s): {', '.join(bad)}."
+            if not self.site_id.strip():
+                errors["site_id"] = "Required for branch (keeps VLAN subnets unique across sites)."
+            elif not self.site_id.strip().replace('-', '').replace('_', '').isalnum():
+                errors["site_id"] = "Letters, digits, '-' and '_' only."
+        elif self.scenario_mode == "wisp":
+            check_ip("mgmt_ip", required=False, network=True)
+            check_ip("ospf_area")
+
+        return errors
+
+    def to_context(self):
+        """Builds the ConfigGenerator context."""
+        return {
+            "model": self.model.strip(),
+            "role": self.role,
+            "wan_type": self.wan_type,
+            "wan_ip": self.wan_ip,
+            "wan_subnet": self.wan_subnet,
+            "wan_gateway": self.wan_gateway,
+            "pppoe_user": self.pppoe_user,
+            "pppoe_pass": self.pppoe_pass,
+            "lan_ip": self.lan_ip,
+            "wifi_ssid": self.wifi_ssid,
+            "wifi_pass": self.wifi_pass,
+            # Basic
+            "vpn_enabled": self.vpn_enabled,
+            "admin_user": self.admin_user,
+            "admin_pass": self.admin_pass,
+            # Routing
+            "ospf_enabled": self.ospf_enabled,
+            "bgp_enabled": self.bgp_enabled,
+            "bgp_asn": self.bgp_asn,
+            # Services
+            "container_enabled": self.container_enabled,
+            "adblock_enabled": self.adblock_enabled,
+            "hotspot_enabled": self.hotspot_enabled,
+            # QoS
+            "qos_type": self.qos_type,
+            "voip_enabled": self.voip_enabled,
+
+            # Scenario Data
+            "scenario_mode": self.scenario_mode,
+            "wan2_interface": self.wan2_interface,
+            "vlan_ids": self.vlan_list(),
+            "hq_wg_pubkey": self.hq_wg_pubkey,
+            "site_id": self.site_id.strip(),
+            "mgmt_ip": self.mgmt_ip,
+            "ospf_area": self.ospf_area,
+            "wan1_gateway": self.wan_gateway, # Reusing wan_gateway for scenario
+            "wan1_ip": self.wan_ip, # Mapping for Scenario Branch
+
+            "dns_redirect": True, # Default to true for hardening
+
+            # WireGuard Defaults for generation (would be dynamic in real app)
+            "wg_peer_public_key": "ReplaceWithClientPubKey",
+            "wg_peer_allowed_ips": "10.0.100.2/32",
+            "wg_interface_ip": "10.0.100.1/24"
+        }
@@ -1,12 +1,61 @@
+import asyncio
+import concurrent.futures
+import io
 import time
 import os
-import socket
+from dataclasses import dataclass
+from typing import Optional
 import paramiko
 from paramiko.ssh_exception import SSHException
+from logic.hardware_validator import HardwareValidator
+
+
+@dataclass
+class DeployEvent:
+    """
+    Structured progress event emitted by Deployer.deploy_configuration_async().
+
+    Phases (in order): connect, storage, upload, snapshot, schedule, wait, confirm, done.
+    'snapshot' and 'confirm' only occur when the rollback transaction is enabled.
+    A failed deployment ends with a single 'failed' event instead of 'done'.
+    """
+    phase: str
+    message: str = ""
+    bytes_sent: int = 0
+    bytes_total: int = 0
+    elapsed: float = 0.0
+    eta: Optional[float] = None
+
 
 class Deployer:
-    def __init__(self):
-        pass
+    # Minimum spacing between 'upload'/'wait' progress events (seconds)
+    PROGRESS_INTERVAL = 0.25
+    # Buffer size used when streaming a chunked script to SFTP
+    STREAM_CHUNK_SIZE = 32 * 1024
+    # Rollback transaction: snapshot file and the scheduler that restores it
+    SNAPSHOT_NAME = "titan_pre_deploy"
+    ROLLBACK_SCHEDULER = "TITAN_ROLLBACK"
+    # Extra time after the availability timeout before the restore fires (seconds)
+    ROLLBACK_GRACE = 120
+    # How long to wait for the router on its new address, and how often to probe (seconds)
+    AVAILABILITY_TIMEOUT = 120
+    HEAVY_AVAILABILITY_TIMEOUT = 300
+    POLL_INTERVAL = 2
+
+    def __init__(self, journal=None, health=None):
+        """
+        Args:
+            journal: Optional DeploymentJournal; every state transition is appended to it
+                     so interrupted rollouts can be resumed or reconciled after a crash.
+            health: Optional HealthSweeper; routers it reports as down fail immediately
+                    instead of waiting for the SSH connect timeout.
+        """
+        self.journal = journal
+        self.health = health
+
+    def _journal(self, device, state, sync=False, **detail):
+        if self.journal:
+            self.journal.record(device, state, sync=sync, **detail)
 
     def _create_ssh_client(self, ip, user, password):
         client = paramiko.SSHClient()
@@ -29,92 +78,314 @@ class Deployer:
             pass
         return ""
 
-    def deploy_configuration(self, ip, user, password, local_rsc_path, target_lan_ip, status_callback=None, heavy_payload=False):
+    def deploy_configuration(self, ip, user, password, script, target_lan_ip, status_callback=None, heavy_payload=False,
+                             rollback=True, confirm_user=None, confirm_password=None, device_id=None):
         """
         Uploads the script and schedules it for execution.
         
+        Blocking wrapper around deploy_configuration_async() for thread-based callers.
+        Safe to call from inside a running event loop: the pipeline then runs on a
+        private loop in a worker thread (the caller still blocks until it finishes).
+
         Args:
             ip: Current Router IP.
             user: Current Router User.
             password: Current Router Password.
-            local_rsc_path: Path to the generated .rsc file.
+            script: The generated script. Accepts str or bytes (script content), a binary
+                    file object, an iterable of str/bytes chunks (e.g. ConfigGenerator.generate_stream())
+                    or an os.PathLike pointing at an existing .rsc file. Nothing is written locally.
+                    A str is always script text: to upload a file pass pathlib.Path(path). A
+                    one-line str that names an existing file (the old local_rsc_path argument)
+                    is rejected rather than uploaded as the script.
             target_lan_ip: The new IP the router will have after config.
             status_callback: Function to call with status updates (str).
             heavy_payload: If True, increases schedule delay to allow for large downloads (e.g. Containers).
+            rollback: If True, wraps the apply in a snapshot/restore transaction (see deploy_configuration_async()).
+            confirm_user: Login used to confirm the new config. Defaults to `user`.
+            confirm_password: Password used to confirm the new config. Defaults to `password`.
+            device_id: Journal key for this router. Defaults to `ip`.
+
+        Returns:
+            bool: True once the router answered on target_lan_ip (and, with rollback, the
+                  new config was confirmed). Timing out while waiting for it is a failure.
         """
-        def log(msg):
-            print(msg)
-            if status_callback:
-                status_callback(msg)
+        async def consume():
+            last = None
+            async for event in self.deploy_configuration_async(
+                ip, user, password, script, target_lan_ip, heavy_payload=heavy_payload,
+                rollback=rollback, confirm_user=confirm_user, confirm_password=confirm_password,
+                device_id=device_id
+            ):
+                print(event.message)
+                if status_callback:
+                    status_callback(event.message)
+                last = event
+            return last is not None and last.phase == "done"
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(consume())
+        # asyncio.run() refuses to nest inside a running loop
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, consume()).result()
+
+    async def deploy_configuration_async(self, ip, user, password, script, target_lan_ip, heavy_payload=False,
+                                         rollback=True, confirm_user=None, confirm_password=None, device_id=None):
+        """
+        Asyncio deployment pipeline. Yields DeployEvent objects as it progresses.
+
+        Blocking SSH/SFTP calls run in the default executor, so many deployments can
+        share one event loop (e.g. via asyncio.gather over several consumers).
+
+        Cancellation: cancel the consuming task (or aclose() the generator). The SSH
+        session is closed immediately; an in-flight upload aborts with it. Once the
+        'schedule' phase has completed the router applies the config on its own,
+        so cancelling afterwards only stops waiting for it to come back.
+
+        Rollback transaction: before the import is scheduled the running config is saved
+        with /system backup and a scheduler is armed to restore it. Once the router answers
+        on target_lan_ip we log in with the confirm credentials and disarm the scheduler.
+        If the router never comes back, or the new config locks us out, the snapshot is
+        restored automatically and the router returns on its previous address.
+
+        Journal states (when a journal is attached): started, uploaded, snapshot,
+        scheduled, online, confirmed | failed | cancelled. A cancel after 'scheduled' is
+        not journaled as terminal, since the router will still apply the config.
+
+        Args: see deploy_configuration().
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        device = device_id or ip
+        applied = False
+
+        def event(phase, message, **kwargs):
+            return DeployEvent(phase, message, elapsed=time.monotonic() - start, **kwargs)
 
         client = None
         try:
-            log(f"Connecting to {ip}...")
-            client = self._create_ssh_client(ip, user, password)
-            
+            # Validated before connecting, so a bad argument never touches the router
+            payload, total = self._prepare_payload(script)
+            if self.health and self.health.is_reachable(ip) is False:
+                raise Exception(f"{ip} is unreachable (health sweeper)")
+            self._journal(device, "started", ip=ip, target=target_lan_ip)
+            yield event("connect", f"Connecting to {ip}...")
+            client = await loop.run_in_executor(None, self._create_ssh_client, ip, user, password)
+
             # 1. Detect Storage
-            prefix = self.detect_flash_path(client)
-            # Ensure file is named setup.rsc on remote to match strict requirements if needed,
-            # though prompt says "If flash/ exists, all uploads must go to flash/setup.rsc. If not, use setup.rsc."
+            prefix = await loop.run_in_executor(None, self.detect_flash_path, client)
+            # If flash/ exists, all uploads must go to flash/setup.rsc. If not, use setup.rsc.
             remote_filename = "setup.rsc"
             remote_path = f"{prefix}{remote_filename}"
-            log(f"Detected storage path: {prefix}")
-            
-            # 2. Upload File
-            log(f"Uploading {remote_filename} to {remote_path}...")
-            sftp = client.open_sftp()
-            sftp.put(local_rsc_path, remote_path)
-            sftp.close()
-            
-            # 3. Schedule Execution (Fire-and-Forget)
-            # We use [/system clock get time] to run it "now" (plus the script's internal delay).
+            yield event("storage", f"Detected storage path: {prefix}")
+
+            # 2. Upload File (progress is reported by paramiko from the executor thread).
+            # Streamed scripts have no known size up front, so bytes_total stays 0.
+            progress = [0, total]
+
+            def on_progress(sent, size):
+                progress[0], progress[1] = sent, size
+
+            yield event("upload", f"Uploading {remote_filename} to {remote_path}...", bytes_total=total)
+            upload = loop.run_in_executor(None, self._upload_payload, client, payload, remote_path, on_progress)
+            upload_start = time.monotonic()
+            last_sent = 0
+            while True:
+                done, _ = await asyncio.wait({upload}, timeout=self.PROGRESS_INTERVAL)
+                sent, size = progress
+                if sent != last_sent:
+                    last_sent = sent
+                    if size:
+                        rate = sent / max(time.monotonic() - upload_start, 1e-6)
+                        eta = (size - sent) / rate if rate > 0 else None
+                        message = f"Uploading {remote_filename}... {100 * sent // size}%"
+                    else:
+                        eta = None
+                        message = f"Uploading {remote_filename}... {sent // 1024} KiB"
+                    yield event("upload", message, bytes_sent=sent, bytes_total=size, eta=eta)
+                if done:
+                    upload.result()
+                    break
+            self._journal(device, "uploaded", remote_path=remote_path)
+
+            # If heavy payload, we might need to wait longer for it to boot/download
+            timeout = self.HEAVY_AVAILABILITY_TIMEOUT if heavy_payload else self.AVAILABILITY_TIMEOUT
+
+            # 3. Snapshot + arm the restore scheduler (must happen before the import is scheduled)
+            if rollback:
+                snapshot = f"{prefix}{self.SNAPSHOT_NAME}"
+                rollback_delay = timeout + self.ROLLBACK_GRACE
+                yield event("snapshot", f"Saving rollback snapshot {snapshot}.backup...")
+                await loop.run_in_executor(None, self._arm_rollback, client, snapshot, rollback_delay)
+                self._journal(device, "snapshot", snapshot=snapshot, rollback_delay=rollback_delay)
+                yield event("snapshot", f"Rollback armed: snapshot restores in {rollback_delay}s unless confirmed.")
+
+            # 4. Schedule Execution (Fire-and-Forget)
             # Note: The internal script delay (15s) prevents interface flapping from killing the script immediately.
-            # We use interval=0 to run once.
-            log("Scheduling configuration apply...")
-            
-            # Check for heavy payload (Containers)
-            # If heavy, we delay the start time significantly to ensure we are disconnected or to just give buffer?
-            # Actually, the prompt says "increase the script_run_delay to 60 seconds". 
-            # This usually implies the delay INSIDE the script, or the delay before it runs.
-            # Given "Script Injection" strategy runs locally, the *execution* time doesn't matter to us once disconnected.
-            # However, if the prompt implies we should wait longer to poll, or if we should schedule it later...
-            # "If 'Containers' are enabled, increase the script_run_delay to 60 seconds"
-            # Let's increase the schedule start offset.
-            
+            # Heavy payloads (Containers) get a longer start offset to leave room for large downloads.
             offset_seconds = "00:01:00" if heavy_payload else "00:00:02"
-            
-            # Remove existing schedule if any to avoid error
-            client.exec_command("/system scheduler remove [find name=TITAN_DEPLOY]")
-            
-            # Schedule slightly in the future to allow clean disconnect
-            cmd = (
-                f'/system scheduler add name=TITAN_DEPLOY '
-                f'on-event="/import file={remote_path} verbose=yes" '
-                f'start-time=([/system clock get time] + {offset_seconds}) interval=0'
-            )
-            
-            stdin, stdout, stderr = client.exec_command(cmd)
-            error = stderr.read().decode().strip()
-            if error:
-                raise Exception(f"Scheduler Error: {error}")
-            
-            log(f"Configuration scheduled (Offset: {offset_seconds}). Disconnecting...")
+            yield event("schedule", "Scheduling configuration apply...")
+            await loop.run_in_executor(None, self._schedule_import, client, remote_path, offset_seconds)
+            applied = True
+            self._journal(device, "scheduled", sync=True, offset=offset_seconds)
+
+            yield event("schedule", f"Configuration scheduled (Offset: {offset_seconds}). Disconnecting...")
             client.close()
-            
-            # 4. Poll for return
-            # If heavy payload, we might need to wait longer for it to boot/download
-            timeout = 300 if heavy_payload else 120
-            log(f"Waiting for router at {target_lan_ip} (Timeout: {timeout}s)...")
-            self._poll_for_availability(target_lan_ip, log, timeout=timeout)
-            
-            log("Deployment Successful!")
-            return True
+            client = None
+
+            # 5. Poll for return
+            yield event("wait", f"Waiting for router at {target_lan_ip} (Timeout: {timeout}s)...")
+            wait_start = time.monotonic()
+            online = False
+            while time.monotonic() - wait_start < timeout:
+                if await self._probe_ssh(target_lan_ip):
+                    online = True
+                    break
+                remaining = timeout - (time.monotonic() - wait_start)
+                yield event("wait", f"Waiting for router at {target_lan_ip}...", eta=max(remaining, 0.0))
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+            if not online:
+                message = f"Deployment Failed: Timed out waiting for {target_lan_ip}"
+                if rollback:
+                    message += f". Snapshot restore is armed; expect the router back on {ip}."
+                self._journal(device, "failed", sync=True, message=message)
+                yield event("failed", message)
+                return
+
+            self._journal(device, "online")
+            yield event("wait", f"Target {target_lan_ip} is online!")
 
+            # 6. Confirm the new config is manageable, then disarm the restore
+            if rollback:
+                yield event("confirm", f"Confirming management access on {target_lan_ip}...")
+                try:
+                    await loop.run_in_executor(
+                        None, self._disarm_rollback, target_lan_ip,
+                        confirm_user or user,
+                        password if confirm_password is None else confirm_password
+                    )
+                except Exception as e:
+                    message = (f"Deployment Failed: Could not confirm new config ({e}). "
+                               f"Snapshot restore is armed; expect the router back on {ip}.")
+                    self._journal(device, "failed", sync=True, message=message)
+                    yield event("failed", message)
+                    return
+                yield event("confirm", "Rollback disarmed.")
+
+            self._journal(device, "confirmed", sync=True)
+            yield event("done", "Deployment Successful!")
+
+        except (asyncio.CancelledError, GeneratorExit):
+            if not applied:
+                self._journal(device, "cancelled", sync=True)
+            raise
         except Exception as e:
-            log(f"Deployment Failed: {e}")
+            self._journal(device, "failed", sync=True, message=str(e))
+            yield event("failed", f"Deployment Failed: {e}")
+        finally:
             if client:
                 client.close()
-            return False
+
+    def _prepare_payload(self, script):
+        """
+        Normalizes the script argument into something _upload_payload() can send.
+        Returns (payload, total_bytes); total_bytes is 0 when the size is unknown.
+
+        Raises:
+            ValueError: `script` is a str that looks like a file path rather than a script.
+        """
+        if isinstance(script, os.PathLike):
+            return script, os.path.getsize(script)
+        if isinstance(script, str):
+            line = script.strip()
+            if "\n" not in line and (os.path.isfile(line) or (line.endswith(".rsc") and " " not in line)):
+                raise ValueError(
+                    f"Script '{line}' is a file path, not a script; pass pathlib.Path('{line}') to upload the file."
+                )
+            script = script.encode("utf-8")
+        if isinstance(script, (bytes, bytearray)):
+            return io.BytesIO(script), len(script)
+        return script, 0
+
+    def _upload_payload(self, client, payload, remote_path, callback=None):
+        sftp = client.open_sftp()
+        try:
+            if isinstance(payload, os.PathLike):
+                sftp.put(os.fspath(payload), remote_path, callback=callback)
+            elif hasattr(payload, "read"):
+                sftp.putfo(payload, remote_path, callback=callback)
+            else:
+                self._stream_chunks(sftp, payload, remote_path, callback)
+        finally:
+            sftp.close()
+
+    def _stream_chunks(self, sftp, chunks, remote_path, callback=None):
+        """
+        Writes an iterable of str/bytes chunks straight into the remote file.
+        Rendering (when chunks come from a generator) overlaps with the upload.
+        """
+        sent = 0
+        buffer = bytearray()
+        with sftp.open(remote_path, "wb") as remote:
+            remote.set_pipelined(True)
+            for chunk in chunks:
+                buffer += chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                if len(buffer) >= self.STREAM_CHUNK_SIZE:
+                    remote.write(bytes(buffer))
+                    sent += len(buffer)
+                    buffer.clear()
+                    if callback:
+                        callback(sent, 0)
+            if buffer:
+                remote.write(bytes(buffer))
+                sent += len(buffer)
+        if callback:
+            callback(sent, sent)
+
+    def _run_command(self, client, cmd):
+        """Runs a command to completion and raises if RouterOS reports an error."""
+        stdin, stdout, stderr = client.exec_command(cmd)
+        output = stdout.read().decode().strip()
+        error = stderr.read().decode().strip()
+        if error or output.startswith(("failure:", "syntax error", "expected ")):
+            raise Exception(error or output)
+        return output
+
+    def _arm_rollback(self, client, snapshot, delay_seconds):
+        validator = HardwareValidator()
+        # A stale scheduler from an interrupted run would restore an older snapshot
+        self._run_command(client, validator.generate_rollback_disarm(self.ROLLBACK_SCHEDULER))
+        for cmd in validator.generate_snapshot_commands(snapshot):
+            self._run_command(client, cmd)
+        self._run_command(client, validator.generate_rollback_arm(
+            snapshot, self.ROLLBACK_SCHEDULER, f"{delay_seconds}s"
+        ))
+
+    def _disarm_rollback(self, ip, user, password):
+        client = self._create_ssh_client(ip, user, password)
+        try:
+            self._run_command(client, HardwareValidator().generate_rollback_disarm(self.ROLLBACK_SCHEDULER))
+        finally:
+            client.close()
+
+    def _schedule_import(self, client, remote_path, offset_seconds):
+        """Arms a run-once scheduler that imports the uploaded script."""
+        # Remove existing schedule if any to avoid error
+        client.exec_command("/system scheduler remove [find name=TITAN_DEPLOY]")
+
+        # Schedule slightly in the future to allow clean disconnect
+        cmd = (
+            f'/system scheduler add name=TITAN_DEPLOY '
+            f'on-event="/import file={remote_path} verbose=yes" '
+            f'start-time=([/system clock get time] + {offset_seconds}) interval=0'
+        )
+
+        stdin, stdout, stderr = client.exec_command(cmd)
+        error = stderr.read().decode().strip()
+        if error:
+            raise Exception(f"Scheduler Error: {error}")
 
     def perform_factory_reset(self, ip, user, password, status_callback=None):
         """
@@ -155,21 +426,13 @@ class Deployer:
             if client:
                 client.close()
 
-    def _poll_for_availability(self, ip, log_func, timeout=120):
+    async def _probe_ssh(self, ip, port=22, timeout=2):
         """
-        Pings/Connects to the target IP until available or timeout.
+        Returns True if a TCP connection to the SSH port succeeds.
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                # Simple socket connect check to SSH port
-                sock = socket.create_connection((ip, 22), timeout=2)
-                sock.close()
-                log_func(f"Target {ip} is online!")
-                return
-            except (socket.timeout, ConnectionRefusedError, OSError):
-                pass
-            
-            time.sleep(2)
-            
-        log_func(f"Warning: Timed out waiting for {ip}")
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+        except (asyncio.TimeoutError, OSError):
+            return False
+        writer.close()
+        return True
@@ -0,0 +1,577 @@
+import ipaddress
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np # Optional: pip install numpy (or project-titan[sim])
+except ImportError:
+    np = None
+
+from logic.address_lists import aggregate
+from logic.compactor import ScriptCompactor
+
+CHAINS = ("input", "forward", "output")
+STATES = ("new", "established", "related", "invalid", "untracked")
+PROTOCOLS = {"icmp": 1, "igmp": 2, "tcp": 6, "udp": 17, "gre": 47, "ipsec-esp": 50, "ipsec-ah": 51,
+             "icmpv6": 58, "ospf": 89, "sctp": 132}
+
+DROP, ACCEPT = 0, 1
+_UNDECIDED = -1
+_DROPPING = ("drop", "reject", "tarpit")
+_TERMINAL = {"accept": ACCEPT, "fasttrack-connection": ACCEPT, "drop": DROP, "reject": DROP, "tarpit": DROP,
+             # NAT: the first translating rule ends the chain
+             "masquerade": ACCEPT, "src-nat": ACCEPT, "netmap": ACCEPT, "same": ACCEPT}
+
+# Properties that select or act, not match
+_NOT_MATCHERS = {
+    "chain", "action", "comment", "disabled", "log", "log-prefix", "passthrough", "jump-target",
+    "to-addresses", "to-ports", "hw-offload", "new-connection-mark", "new-packet-mark",
+    "new-routing-mark", "address-list", "address-list-timeout", "reject-with", "place-before",
+}
+
+_ADDRESS_LIST_LOOP = re.compile(
+    r':foreach a in=\{([^}]*)\} do=\{ /ip firewall address-list add list=(\S+) address=\$a \}')
+
+# Protocols random flows are drawn from (rule protocols are added as boundary values)
+_FLOW_PROTOCOLS = (1, 6, 17, 47, 50, 89)
+
+
+def _port_ranges(value):
+    """'22,8000-8080' -> [(22, 22), (8000, 8080)]"""
+    ranges = []
+    for part in value.split(","):
+        low, _, high = part.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+@dataclass
+class Rule:
+    """One compiled firewall rule; `index` is its position in FirewallSimulator.rules."""
+    index: int
+    table: str # 'raw' | 'nat' | 'filter'
+    chain: str
+    action: str
+    properties: Dict[str, str]
+    comment: str = ""
+    unsupported: List[str] = field(default_factory=list) # Matchers not simulated (see _compile)
+    jump_target: Optional[str] = None
+    to_addresses: Optional[str] = None
+    to_ports: Optional[str] = None
+
+
+class FirewallSimulator:
+    """
+    Offline model of a rendered script's /ip firewall raw, nat and filter rules.
+
+    Flows are dicts of NumPy arrays (one element per flow, see make_flows()), and every
+    rule is compiled into a function that returns the boolean mask of the flows it
+    matches. A chain is evaluated rule by rule over whole arrays: flows matched by a
+    terminal action are decided and removed from the pending mask, so a million flows
+    cost one vectorized pass per rule instead of a Python loop per flow.
+
+    Packet path: raw prerouting -> dstnat (redirect turns the flow into 'input') ->
+    filter input/forward/output -> srcnat (counted only). Connection tracking, marks
+    and rate limits are not modelled. A rule using a matcher the simulator does not
+    know (limit, connection-mark, ...) is listed in `warnings` and resolved towards
+    exposure: drop/reject/tarpit rules are assumed not to match, any other rule to
+    match, so a verdict is never safer than the real router's.
+    """
+
+    def __init__(self, script, interfaces=None, address_lists=None):
+        """
+        Args:
+            script (str): Rendered RouterOS script.
+            interfaces (dict): Extra {interface: [interface lists]}; memberships from
+                               '/interface list member add' lines are read from the script.
+            address_lists (dict): Extra {list: [addresses]}; entries added by the script
+                                  (address_lists.j2 or plain adds) are read as well.
+
+        Raises:
+            ImportError: NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("The firewall simulator needs NumPy (pip install numpy).")
+        self.rules = []
+        self.warnings = []
+        memberships = {}
+        lists = {}
+        for path, tokens in ScriptCompactor().commands(script):
+            if not tokens or tokens[0] != "add":
+                continue
+            props = self._properties(tokens[1:])
+            if path == "/interface list member" and props.get("interface") and props.get("list"):
+                memberships.setdefault(props["interface"], set()).add(props["list"])
+            elif path == "/ip firewall address-list" and props.get("list") and props.get("address"):
+                lists.setdefault(props["list"], []).append(props["address"])
+            elif path in ("/ip firewall raw", "/ip firewall nat", "/ip firewall filter"):
+                if props.get("disabled") != "yes":
+                    self._add_rule(path.rsplit(" ", 1)[1], props)
+        for values, name in _ADDRESS_LIST_LOOP.findall(script):
+            lists.setdefault(name, []).extend(v.strip().strip('"') for v in values.split(";") if v.strip())
+        for interface, names in (interfaces or {}).items():
+            memberships.setdefault(interface, set()).update(names)
+        for name, entries in (address_lists or {}).items():
+            lists.setdefault(name, []).extend(entries)
+
+        # Interface 0 is "none" (e.g. the out-interface of input traffic)
+        self.interfaces = [""] + sorted(memberships)
+        self.interface_lists = sorted({name for names in memberships.values() for name in names})
+        self._membership = np.zeros((len(self.interfaces), max(len(self.interface_lists), 1)), dtype=bool)
+        for interface, names in memberships.items():
+            for name in names:
+                self._membership[self.interfaces.index(interface), self.interface_lists.index(name)] = True
+        self._address_lists = {name: self._intervals(entries) for name, entries in lists.items()}
+        self._compiled = [self._compile(rule) for rule in self.rules]
+
+    # --- Parsing ---
+    @staticmethod
+    def _properties(tokens):
+        props = {}
+        for token in tokens:
+            key, sep, value = token.partition("=")
+            if sep:
+                if len(value) >= 2 and value[0] == value[-1] == '"':
+                    value = value[1:-1]
+                props[key] = value
+        return props
+
+    def _add_rule(self, table, props):
+        rule = Rule(
+            index=len(self.rules),
+            table=table,
+            chain=props.get("chain", ""),
+            action=props.get("action", "accept"),
+            properties={k: v for k, v in props.items() if k not in _NOT_MATCHERS},
+            comment=props.get("comment", ""),
+            jump_target=props.get("jump-target"),
+            to_addresses=props.get("to-addresses"),
+            to_ports=props.get("to-ports"),
+        )
+        self.rules.append(rule)
+
+    @staticmethod
+    def _intervals(entries):
+        """Sorted, merged [first, last] arrays of the IPv4 part of an address list."""
+        firsts, lasts = [], []
+        for cidr in aggregate(entries):
+            network = ipaddress.ip_network(cidr)
+            if network.version == 4:
+                firsts.append(int(network.network_address))
+                lasts.append(int(network.broadcast_address))
+        return np.array(firsts, dtype=np.int64), np.array(lasts, dtype=np.int64)
+
+    # --- Compilation ---
+    def _compile(self, rule):
+        """Returns a function flows -> boolean mask for the rule's matchers."""
+        predicates = []
+        for key, value in rule.properties.items():
+            negate = value.startswith("!")
+            if negate:
+                value = value[1:]
+            predicate = self._predicate(key, value)
+            if predicate is None:
+                rule.unsupported.append(key)
+                continue
+            predicates.append((lambda p: (lambda f: ~p(f)))(predicate) if negate else predicate)
+
+        if rule.unsupported:
+            keys = ", ".join(f"'{key}'" for key in rule.unsupported)
+            if rule.action in _DROPPING:
+                # Whether it fires is unknown: never let it hide traffic the router may pass
+                self.warnings.append(f"Rule {rule.index} ({rule.table} {rule.chain}): {keys} not simulated; "
+                                     f"this {rule.action} rule is assumed not to match.")
+                return lambda flows: np.zeros(len(flows["src"]), dtype=bool)
+            self.warnings.append(f"Rule {rule.index} ({rule.table} {rule.chain}): {keys} not simulated; "
+                                 f"assumed to match.")
+
+        def match(flows):
+            mask = np.ones(len(flows["src"]), dtype=bool)
+            for predicate in predicates:
+                mask &= predicate(flows)
+            return mask
+
+        return match
+
+    def _predicate(self, key, value):
+        if key in ("protocol",):
+            number = PROTOCOLS.get(value, int(value) if value.isdigit() else -1)
+            return lambda f: f["protocol"] == number
+        if key in ("dst-port", "src-port"):
+            column = "dst_port" if key == "dst-port" else "src_port"
+            ranges = _port_ranges(value)
+
+            def ports(f):
+                values = f[column]
+                mask = np.zeros(len(values), dtype=bool)
+                for low, high in ranges:
+                    mask |= (values >= low) & (values <= high)
+                return mask
+            return ports
+        if key == "connection-state":
+            codes = [STATES.index(s) for s in value.split(",") if s in STATES]
+            return lambda f: np.isin(f["state"], codes)
+        if key == "connection-nat-state" and value == "dstnat":
+            return lambda f: f["dstnat"] # Set by evaluate() once dstnat has run
+        if key in ("in-interface", "out-interface"):
+            column = "in_interface" if key == "in-interface" else "out_interface"
+            code = self.interfaces.index(value) if value in self.interfaces else -1
+            return lambda f: f[column] == code
+        if key in ("in-interface-list", "out-interface-list"):
+            column = "in_interface" if key == "in-interface-list" else "out_interface"
+            if value not in self.interface_lists:
+                return lambda f: np.zeros(len(f[column]), dtype=bool)
+            members = self._membership[:, self.interface_lists.index(value)]
+            return lambda f: members[f[column]]
+        if key in ("src-address", "dst-address"):
+            column = "src" if key == "src-address" else "dst"
+            first, last = self._intervals([value])
+            return lambda f: self._in_intervals(f[column], first, last)
+        if key in ("src-address-list", "dst-address-list"):
+            column = "src" if key == "src-address-list" else "dst"
+            first, last = self._address_lists.get(value, (np.array([], np.int64), np.array([], np.int64)))
+            return lambda f: self._in_intervals(f[column], first, last)
+        return None
+
+    @staticmethod
+    def _in_intervals(values, first, last):
+        if not len(first):
+            return np.zeros(len(values), dtype=bool)
+        # Index of the last interval starting at or below each value
+        slot = np.searchsorted(first, values, side="right") - 1
+        inside = slot >= 0
+        return inside & (values <= last[np.maximum(slot, 0)])
+
+    def list_members(self, name):
+        """Interfaces in interface list `name` (as read from the script)."""
+        if name not in self.interface_lists:
+            return []
+        column = self._membership[:, self.interface_lists.index(name)]
+        return [interface for interface, member in zip(self.interfaces, column) if member]
+
+    # --- Flows ---
+    def make_flows(self, count, seed=None, boundaries=True, **fixed):
+        """
+        Builds `count` flows; keyword arguments pin a field for all of them.
+
+        With `boundaries`, uniform random values would almost never hit a single port or
+        address the rules name (one WireGuard port in 65535), so the flows are seeded
+        from the rules: the first rows are one witness per rule edge (see _witnesses()),
+        and in the rest each field takes a value from boundary_values() half the time.
+        Pinned fields override both.
+
+        Fields: chain ('input'/'forward'/'output'), src / dst (IPv4 string or int),
+        protocol (name or number), src_port, dst_port, state ('new', ...), in_interface
+        and out_interface (names from the script's interface lists, '' for none).
+        """
+        rng = np.random.default_rng(seed)
+        interfaces = np.arange(len(self.interfaces))
+        flows = {
+            "chain": rng.integers(0, 2, count).astype(np.int8), # input / forward
+            "src": rng.integers(0, 1 << 32, count, dtype=np.int64),
+            "dst": rng.integers(0, 1 << 32, count, dtype=np.int64),
+            "protocol": rng.choice(np.array(_FLOW_PROTOCOLS, dtype=np.int16), count),
+            "src_port": rng.integers(1, 65536, count).astype(np.int32),
+            "dst_port": rng.integers(1, 65536, count).astype(np.int32),
+            "state": rng.integers(0, len(STATES), count).astype(np.int8),
+            "in_interface": rng.choice(interfaces[1:] if len(interfaces) > 1 else interfaces, count),
+            "out_interface": rng.choice(interfaces, count),
+        }
+        if boundaries:
+            witnesses = self._witnesses()[:count]
+            for row, values in enumerate(witnesses):
+                for key, value in values.items():
+                    flows[key][row] = value
+            for key, values in self.boundary_values().items():
+                picked = rng.random(count - len(witnesses)) < 0.5
+                flows[key][len(witnesses):][picked] = rng.choice(values, int(picked.sum()))
+        for key, value in fixed.items():
+            if key not in flows:
+                raise ValueError(f"Unknown flow field '{key}'.")
+            flows[key] = np.full(count, self._encode(key, value), dtype=flows[key].dtype)
+        if "out_interface" not in fixed:
+            flows["out_interface"][flows["chain"] == CHAINS.index("input")] = 0 # Delivered locally
+        return flows
+
+    def boundary_values(self):
+        """
+        {flow field: sorted array} of values at the edges of what the rules match: every
+        rule protocol, and for each port range or address interval its first and last
+        value plus the neighbours just outside.
+        """
+        values = {"protocol": set(_FLOW_PROTOCOLS), "src_port": set(), "dst_port": set(), "src": set(), "dst": set()}
+        for rule in self.rules:
+            for key, value in rule.properties.items():
+                value = value.lstrip("!")
+                if key == "protocol":
+                    number = PROTOCOLS.get(value, int(value) if value.isdigit() else None)
+                    if number is not None:
+                        values["protocol"].add(number)
+                elif key in ("dst-port", "src-port"):
+                    for low, high in _port_ranges(value):
+                        values[key.replace("-", "_")].update((low - 1, low, high, high + 1))
+                elif key in ("src-address", "dst-address", "src-address-list", "dst-address-list"):
+                    first, last = (self._intervals([value]) if not key.endswith("-list")
+                                   else self._address_lists.get(value, ([], [])))
+                    column = values[key.split("-")[0]]
+                    for low, high in zip(first, last):
+                        column.update((int(low) - 1, int(low), int(high), int(high) + 1))
+        limits = {"protocol": (0, 255), "src_port": (1, 65535), "dst_port": (1, 65535),
+                  "src": (0, (1 << 32) - 1), "dst": (0, (1 << 32) - 1)}
+        return {key: np.array(sorted(v for v in found if limits[key][0] <= v <= limits[key][1]), dtype=np.int64)
+                for key, found in values.items() if found}
+
+    def _witnesses(self):
+        """
+        One flow template ({field: value}) per rule and edge (lowest and highest value
+        of each positive matcher), so every rule's exact tuple is tried at least once.
+        """
+        witnesses = {}
+        for rule in self.rules:
+            for edge in (0, -1):
+                row = {}
+                if rule.table == "filter" and rule.chain in CHAINS:
+                    row["chain"] = CHAINS.index(rule.chain)
+                for key, value in rule.properties.items():
+                    if value.startswith("!"):
+                        continue
+                    column, choices = self._witness_values(key, value)
+                    if column and len(choices):
+                        row[column] = int(choices[edge])
+                if row:
+                    witnesses.setdefault(tuple(sorted(row.items())), row)
+        return list(witnesses.values())
+
+    def _witness_values(self, key, value):
+        """(flow field, sorted values that satisfy the matcher), or (None, []) if not modelled."""
+        if key == "protocol":
+            number = PROTOCOLS.get(value, int(value) if value.isdigit() else None)
+            return ("protocol", [number]) if number is not None else (None, [])
+        if key in ("dst-port", "src-port"):
+            ranges = _port_ranges(value)
+            return key.replace("-", "_"), [min(low for low, _ in ranges), max(high for _, high in ranges)]
+        if key == "connection-state":
+            return "state", sorted(STATES.index(s) for s in value.split(",") if s in STATES)
+        if key in ("in-interface", "out-interface"):
+            column = key.replace("-", "_")
+            return (column, [self.interfaces.index(value)]) if value in self.interfaces else (None, [])
+        if key in ("in-interface-list", "out-interface-list"):
+            column = key.replace("-list", "").replace("-", "_")
+            return column, [self.interfaces.index(name) for name in self.list_members(value)]
+        if key in ("src-address", "dst-address", "src-address-list", "dst-address-list"):
+            first, last = (self._intervals([value]) if not key.endswith("-list")
+                           else self._address_lists.get(value, ([], [])))
+            return (key.split("-")[0], [int(first[0]), int(last[-1])]) if len(first) else (None, [])
+        return None, []
+
+    def _encode(self, key, value):
+        if key == "chain":
+            return CHAINS.index(value)
+        if key in ("src", "dst") and isinstance(value, str):
+            return int(ipaddress.IPv4Address(value))
+        if key == "protocol" and isinstance(value, str):
+            return PROTOCOLS[value]
+        if key == "state":
+            return STATES.index(value)
+        if key in ("in_interface", "out_interface"):
+            if value not in self.interfaces:
+                raise ValueError(f"Unknown interface '{value}' (known: {', '.join(self.interfaces[1:])}).")
+            return self.interfaces.index(value)
+        return value
+
+    # --- Evaluation ---
+    def _run_chain(self, table, chain, flows, active, decision, hits, depth=0):
+        """Evaluates `chain` for the `active` flows, writing terminal actions into `decision`."""
+        if depth > 16:
+            raise ValueError(f"Jump depth exceeded in {table} chain '{chain}'.")
+        pending = active.copy()
+        for rule in self.rules:
+            if rule.table != table or rule.chain != chain:
+                continue
+            matched = pending & self._compiled[rule.index](flows)
+            count = int(matched.sum())
+            hits[rule.index] += count
+            if not count:
+                continue
+            if rule.action in _TERMINAL:
+                decision[matched] = _TERMINAL[rule.action]
+                pending &= ~matched
+            elif rule.action == "jump" and rule.jump_target:
+                self._run_chain(table, rule.jump_target, flows, matched, decision, hits, depth + 1)
+                pending &= ~(matched & (decision != _UNDECIDED))
+            elif rule.action == "return":
+                pending &= ~matched # Back to the calling chain
+            # log, passthrough, add-*-to-address-list, notrack: keep going
+        return pending
+
+    def evaluate(self, flows):
+        """
+        Runs the flows through raw, dstnat, filter and srcnat.
+
+        Returns:
+            dict: action (array: 1 accept, 0 drop), chain (filter chain after dstnat)
+                  and hits (matches per rule, indexed like self.rules).
+        """
+        count = len(flows["src"])
+        hits = np.zeros(len(self.rules), dtype=np.int64)
+        everything = np.ones(count, dtype=bool)
+        flows = dict(flows)
+
+        # Raw prerouting: only input/forward traffic passes through it
+        flows["dstnat"] = np.zeros(count, dtype=bool)
+        raw = np.full(count, _UNDECIDED, dtype=np.int8)
+        self._run_chain("raw", "prerouting", flows, flows["chain"] != CHAINS.index("output"), raw, hits)
+
+        # dstnat: redirect delivers to the router itself, dst-nat rewrites the target
+        nat = np.full(count, _UNDECIDED, dtype=np.int8)
+        chain = flows["chain"].copy()
+        for rule in self.rules:
+            if rule.table != "nat" or rule.chain != "dstnat":
+                continue
+            matched = (nat == _UNDECIDED) & (chain != CHAINS.index("output")) & self._compiled[rule.index](flows)
+            hits[rule.index] += int(matched.sum())
+            if rule.action in ("redirect", "dst-nat"):
+                nat[matched] = ACCEPT
+                flows["dstnat"] = flows["dstnat"] | matched
+                if rule.action == "redirect":
+                    chain[matched] = CHAINS.index("input")
+                elif rule.to_addresses:
+                    chain[matched] = CHAINS.index("forward")
+                    flows["dst"] = np.where(matched, int(ipaddress.IPv4Address(rule.to_addresses.split("-")[0])), flows["dst"])
+                if rule.to_ports:
+                    flows["dst_port"] = np.where(matched, int(rule.to_ports.split("-")[0]), flows["dst_port"])
+            elif rule.action in ("accept", "return"):
+                nat[matched] = ACCEPT # Stop NAT processing, no rewrite
+        flows["chain"] = chain
+
+        decision = np.full(count, _UNDECIDED, dtype=np.int8)
+        for code, name in enumerate(CHAINS):
+            self._run_chain("filter", name, flows, (chain == code) & (raw != DROP), decision, hits)
+        decision[decision == _UNDECIDED] = ACCEPT # Built-in chains accept by default
+        decision[raw == DROP] = DROP
+
+        # srcnat: counted for the hit report, no effect on the verdict
+        srcnat = (decision == ACCEPT) & (chain != CHAINS.index("input"))
+        self._run_chain("nat", "srcnat", flows, srcnat, np.full(count, _UNDECIDED, dtype=np.int8), hits)
+        return {"action": decision, "chain": chain, "hits": hits}
+
+    # --- Reports ---
+    def check(self, flows, allow=None, examples=5):
+        """
+        Proves (over the given flows) that nothing outside `allow` is accepted.
+
+        Args:
+            flows (dict): From make_flows().
+            allow (callable): flows -> boolean mask of flows that may be accepted;
+                              None means every accepted flow is a violation.
+
+        Returns:
+            dict: flows, accepted, dropped, violations and up to `examples`
+                  violating flows (as dicts) with the rule that accepted them.
+        """
+        result = self.evaluate(flows)
+        accepted = result["action"] == ACCEPT
+        allowed = allow(flows) if allow else np.zeros(len(accepted), dtype=bool)
+        violating = np.flatnonzero(accepted & ~allowed)
+        return {
+            "flows": len(accepted),
+            "accepted": int(accepted.sum()),
+            "dropped": int((~accepted).sum()),
+            "violations": len(violating),
+            "examples": [self.describe(flows, int(i), result) for i in violating[:examples]],
+            "hits": result["hits"],
+        }
+
+    def describe(self, flows, i, result=None):
+        """One flow as a readable dict (plus its verdict when `result` is given)."""
+        flow = {
+            "chain": CHAINS[int(flows["chain"][i])],
+            "src": str(ipaddress.IPv4Address(int(flows["src"][i]))),
+            "dst": str(ipaddress.IPv4Address(int(flows["dst"][i]))),
+            "protocol": next((n for n, p in PROTOCOLS.items() if p == int(flows["protocol"][i])), int(flows["protocol"][i])),
+            "src_port": int(flows["src_port"][i]),
+            "dst_port": int(flows["dst_port"][i]),
+            "state": STATES[int(flows["state"][i])],
+            "in_interface": self.interfaces[int(flows["in_interface"][i])],
+            "out_interface": self.interfaces[int(flows["out_interface"][i])],
+        }
+        if result is not None:
+            flow["action"] = "accept" if result["action"][i] == ACCEPT else "drop"
+        return flow
+
+    def exposed_services(self, flows, result, max_ports=16):
+        """
+        Summarizes accepted flows as {protocol: sorted dst ports}, or 'any' when more
+        than `max_ports` distinct ports got through (e.g. ICMP, or no port filter).
+        """
+        accepted = result["action"] == ACCEPT
+        exposed = {}
+        for number in np.unique(flows["protocol"][accepted]):
+            ports = np.unique(flows["dst_port"][accepted & (flows["protocol"] == number)])
+            name = next((n for n, p in PROTOCOLS.items() if p == int(number)), str(int(number)))
+            exposed[name] = "any" if len(ports) > max_ports else [int(p) for p in ports]
+        return exposed
+
+    def hit_report(self, hits):
+        """Returns one dict per rule: index, table, chain, action, comment, hits, share (of its chain)."""
+        totals = {}
+        for rule in self.rules:
+            totals[(rule.table, rule.chain)] = totals.get((rule.table, rule.chain), 0) + int(hits[rule.index])
+        return [{
+            "index": rule.index,
+            "table": rule.table,
+            "chain": rule.chain,
+            "action": rule.action,
+            "comment": rule.comment,
+            "hits": int(hits[rule.index]),
+            "share": int(hits[rule.index]) / totals[(rule.table, rule.chain)] if totals[(rule.table, rule.chain)] else 0.0,
+        } for rule in self.rules]
+
+    def suggest_order(self, hits):
+        """
+        Finds rules that are hit more often than the rule right above them.
+
+        A swap is marked safe when both rules have the same terminal action, or when
+        their matchers are provably disjoint (different protocols, non-overlapping
+        ports or connection states, different interfaces), so no packet can match
+        both. Overlap is not judged from the sampled flows: a rare flow that the
+        sample missed could still change its verdict.
+
+        Returns:
+            list: {"rule", "above", "hits", "above_hits", "safe"} dicts, hottest first.
+        """
+        suggestions = []
+        previous = {}
+        for rule in self.rules:
+            key = (rule.table, rule.chain)
+            above = previous.get(key)
+            previous[key] = rule
+            if above is None or hits[rule.index] <= hits[above.index]:
+                continue
+            same = rule.action == above.action and rule.action in _TERMINAL
+            suggestions.append({
+                "rule": rule.index,
+                "above": above.index,
+                "hits": int(hits[rule.index]),
+                "above_hits": int(hits[above.index]),
+                "safe": same or self._disjoint(rule, above),
+            })
+        suggestions.sort(key=lambda s: -s["hits"])
+        return suggestions
+
+    @staticmethod
+    def _disjoint(a, b):
+        """True if some matcher both rules use can never match the same packet."""
+        for key in set(a.properties) & set(b.properties):
+            va, vb = a.properties[key], b.properties[key]
+            if va.startswith("!") or vb.startswith("!"):
+                continue
+            if key == "connection-state" and not set(va.split(",")) & set(vb.split(",")):
+                return True
+            if key in ("protocol", "in-interface", "out-interface") and va != vb:
+                return True
+            if key in ("dst-port", "src-port"):
+                if not any(la <= hb and lb <= ha for la, ha in _port_ranges(va) for lb, hb in _port_ranges(vb)):
+                    return True
+        return False
@@ -1,10 +1,29 @@
 import os
+import contextlib
 import jinja2
 import datetime
 import ipaddress
+from logic.hardware_validator import HardwareValidator
+from logic.qos import QosPlanner
+from logic.ipam import IPAM
+from logic.address_lists import AddressListCompiler, BOGONS_V4, PRIVATE_V4, RFC1918, aggregate, parse_feed
+
+
+class ConfigRejected(ValueError):
+    """Raised when the context does not fit the target model (see HardwareValidator.plan_hardware)."""
+
+    def __init__(self, model, errors):
+        self.model = model
+        self.errors = list(errors)
+        super().__init__(f"Config rejected for {model}: " + " ".join(self.errors))
+
 
 class ConfigGenerator:
-    def __init__(self, template_dir=None):
+    # Default pool for branch VLAN subnets (context ipam_vlan_pool / ipam_vlan_prefix override)
+    VLAN_POOL = "10.128.0.0/9" # Clear of the 10.0.x WireGuard/management defaults
+    VLAN_PREFIX = 24
+
+    def __init__(self, template_dir=None, ipam=None, profile=False):
         if template_dir is None:
             # Resolve relative to this file: ../../assets/templates
             base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,6 +31,17 @@ class ConfigGenerator:
         else:
             self.template_dir = template_dir
 
+        # Subnet allocations; pass a persistent IPAM(path) so regenerating is stable
+        self.ipam = ipam if ipam is not None else IPAM()
+
+        # Opt-in render profiling: every generate() then leaves a RenderProfile in last_profile
+        self.profile = profile
+        self.last_profile = None
+        self._profile_env = None
+
+        # Non-fatal hardware findings of the last generate() / consumed generate_stream()
+        self.last_warnings = []
+
         self.env = jinja2.Environment(
             loader=jinja2.FileSystemLoader(self.template_dir),
             autoescape=jinja2.select_autoescape()
@@ -22,6 +52,9 @@ class ConfigGenerator:
         self.env.filters['ip_network_end'] = self._filter_network_end
         self.env.filters['ip_network_base'] = self._filter_network_base
         self.env.filters['ros_escape'] = self._filter_ros_escape
+        self.env.filters['ip_prefixlen'] = self._filter_prefixlen
+        self.env.filters['ip_interface'] = self._filter_ip_interface
+        self.env.filters['ipam_subnet'] = self._filter_ipam_subnet
 
     def _filter_ros_escape(self, value):
         """Escapes special characters for RouterOS strings."""
@@ -30,45 +63,76 @@ class ConfigGenerator:
         # Escape " and \
         return value.replace('\\', '\\\\').replace('"', '\\"')
 
+    @staticmethod
+    def _interface(ip_str, default_prefix=24):
+        """Parses 'x.x.x.x' or 'x.x.x.x/nn' (LAN IPs are /24 unless a prefix is given)."""
+        ip_str = str(ip_str).strip()
+        if '/' not in ip_str:
+            ip_str = f"{ip_str}/{default_prefix}"
+        return ipaddress.ip_interface(ip_str)
+
     def _filter_network_start(self, ip_str):
-        """Returns the start IP of a DHCP pool (e.g., x.x.x.10) from an interface IP."""
-        # ip_str is expected to be just the IP, e.g. "192.168.88.1"
-        # We assume /24 for LAN usually, but let's just grab the first 3 octets
-        parts = ip_str.split('.')
-        if len(parts) == 4:
-            return f"{parts[0]}.{parts[1]}.{parts[2]}.10"
-        return ip_str
+        """Returns the start IP of a DHCP pool (network + 10, e.g. x.x.x.10) from an interface IP."""
+        try:
+            network = self._interface(ip_str).network
+        except ValueError:
+            return ip_str
+        if network.num_addresses <= 4:
+            return str(network.network_address + 1)
+        return str(network.network_address + min(10, network.num_addresses - 3))
 
     def _filter_network_end(self, ip_str):
-        """Returns the end IP of a DHCP pool (e.g., x.x.x.254)."""
-        parts = ip_str.split('.')
-        if len(parts) == 4:
-            return f"{parts[0]}.{parts[1]}.{parts[2]}.254"
-        return ip_str
+        """Returns the end IP of a DHCP pool (last usable host, e.g. x.x.x.254)."""
+        try:
+            network = self._interface(ip_str).network
+        except ValueError:
+            return ip_str
+        return str(network.broadcast_address - 1 if network.num_addresses > 2 else network.broadcast_address)
 
     def _filter_network_base(self, ip_str):
-        """Returns the network address (e.g., 192.168.88.0) assuming /24."""
-        parts = ip_str.split('.')
-        if len(parts) == 4:
-            return f"{parts[0]}.{parts[1]}.{parts[2]}.0"
-        return ip_str
+        """Returns the network address (e.g., 192.168.88.0) of an interface IP."""
+        try:
+            return str(self._interface(ip_str).network.network_address)
+        except ValueError:
+            return ip_str
 
-    def generate(self, context):
+    def _filter_prefixlen(self, ip_str):
+        """Returns the prefix length of an interface IP or subnet (24 when none is given)."""
+        try:
+            return self._interface(ip_str).network.prefixlen
+        except ValueError:
+            return ip_str
+
+    def _filter_ip_interface(self, subnet, host=1):
+        """Returns host number `host` of a subnet with its prefix ('10.0.3.0/24' -> '10.0.3.1/24')."""
+        network = ipaddress.ip_network(str(subnet), strict=False)
+        return f"{network.network_address + host}/{network.prefixlen}"
+
+    def _filter_ipam_subnet(self, key, pool="vlan"):
+        """Returns the subnet (CIDR) the IPAM holds for `key` in `pool`, allocating it if new."""
+        key = str(key)
+        return self.ipam.pool(pool).allocate_many([key])[key]
+
+    def _prepare(self, context, env=None):
         """
-        Generates the RouterOS configuration script.
-        
-        Args:
-            context (dict): Dictionary containing configuration parameters.
-            
-        Returns:
-            str: The rendered configuration script.
+        Returns (template, render context, hardware warnings) for the requested scenario.
+
+        The planning steps fill defaults into a copy, so the caller's dict is left as it was.
         """
+        context = dict(context)
         # Add default context variables if missing
         if 'generation_date' not in context:
             context['generation_date'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
         scenario = context.get('scenario_mode', 'simple')
 
+        self._plan_qos(context, scenario)
+        self._plan_ipam(context, scenario)
+        self._plan_address_lists(context, scenario)
+        self._plan_adblock(context)
+        warnings = self._plan_hardware(context)
+        self._plan_fasttrack(context)
+
         if scenario == 'branch':
             template_name = "scenario_branch.j2"
         elif scenario == 'wisp':
@@ -78,8 +142,180 @@ class ConfigGenerator:
         else:
             template_name = "routeros_v7_base.j2"
 
-        template = self.env.get_template(template_name)
-        return template.render(context)
+        return (env or self.env).get_template(template_name), context, warnings
+
+    def _plan_ipam(self, context, scenario):
+        """
+        Opens the IPAM pools the templates allocate from.
+
+        Branch VLAN subnets are keyed by site_id, which keeps one site's subnets apart
+        from every other site's. Raises ValueError if a branch config has no site_id:
+        a shared fallback (hostname, 'default') would hand two sites the same subnets.
+        """
+        if scenario == 'branch' and not str(context.get('site_id') or '').strip():
+            raise ValueError("site_id is required for the branch scenario.")
+        self.ipam.pool(
+            'vlan',
+            context.get('ipam_vlan_pool', self.VLAN_POOL),
+            context.get('ipam_vlan_prefix', self.VLAN_PREFIX),
+        )
+
+    def _plan_address_lists(self, context, scenario):
+        """
+        Aggregates the address lists the templates emit (address_lists.j2).
+
+        mgmt_networks (service 'address=' restrictions) comes from management_networks,
+        RFC1918 by default. Customer lists come from address_lists ({name: entries}); the
+        survival scenario adds bad_ipv4 from the built-in bogons plus bogon_feed (a list
+        or the raw text of a DROP-style feed). Raises ValueError on a bad entry or name.
+
+        RFC1918 and CGNAT are only added with bogon_private, and never when the WAN
+        itself is DHCP or has a private/CGNAT address: its upstream lives in that space.
+        """
+        context['mgmt_networks'] = aggregate(context.get('management_networks') or RFC1918)
+        lists = dict(context.get('address_lists') or {})
+        if scenario == 'survival':
+            feed = context.get('bogon_feed') or []
+            if isinstance(feed, str):
+                feed = parse_feed(feed)
+            bogons = BOGONS_V4 + (PRIVATE_V4 if self._wan_is_public(context) else [])
+            lists['bad_ipv4'] = bogons + list(feed) + list(lists.get('bad_ipv4', []))
+        context['compiled_address_lists'] = AddressListCompiler().compile(lists) if lists else []
+
+    @staticmethod
+    def _wan_is_public(context):
+        """True if bogon_private is set and the WAN is not DHCP or private/CGNAT-addressed."""
+        if not context.get('bogon_private') or context.get('wan_type') == 'dhcp':
+            return False
+        wan_ip = context.get('wan_ip')
+        if not wan_ip:
+            return True
+        address = ipaddress.ip_address(str(wan_ip).split('/')[0])
+        return not any(address in ipaddress.ip_network(net) for net in PRIVATE_V4)
+
+    def _plan_adblock(self, context):
+        """
+        Sets adblock_url: an explicit adblock_url wins, then the model's RAM tier on the
+        local mirror (adblock_mirror, see 'cli.py blocklist --serve'), then the public feed.
+        """
+        if not context.get('adblock_enabled') or context.get('adblock_url'):
+            return
+        from logic.blocklist import DEFAULT_FEED_URL, mirror_url
+        mirror = context.get('adblock_mirror')
+        context['adblock_url'] = mirror_url(mirror, context.get('model', '')) if mirror else DEFAULT_FEED_URL
+
+    def _plan_qos(self, context, scenario):
+        """
+        Builds the subscriber QoS plan (qos_plan, rendered by qos_tree.j2) from qos_tiers /
+        qos_subscribers and switches qos_type to 'pcq'. Raises ValueError on a bad plan.
+        """
+        if not context.get('qos_tiers'):
+            return
+        # The WISP tower's uplink is ether1 (OSPF); other scenarios shape on the WAN list
+        wan_interface = context.get('qos_wan_interface') or ('ether1' if scenario == 'wisp' else None)
+        context['qos_plan'] = QosPlanner().plan(
+            context['qos_tiers'],
+            context.get('qos_subscribers', []),
+            uplink=context.get('qos_uplink'),
+            wan_interface=wan_interface,
+        )
+        context['qos_type'] = 'pcq'
+
+    def _plan_hardware(self, context):
+        """
+        Applies the model-aware plan (context 'model', the MNDP board name).
+
+        Sets qos_queue_kind / wifi_driver for the templates, returns the warnings for the
+        caller and raises ConfigRejected before anything is rendered if the config would
+        push traffic onto the CPU or needs features the board lacks.
+        """
+        model = context.get('model', '')
+        plan = HardwareValidator().plan_hardware(model, context)
+        if plan['errors']:
+            raise ConfigRejected(model, plan['errors'])
+        for key, value in plan['settings'].items():
+            context.setdefault(key, value)
+        return plan['warnings']
+
+    def _plan_fasttrack(self, context):
+        """
+        Sets fasttrack_enabled / fasttrack_hw_offload for the templates.
+
+        FastTrack is on by default (set fasttrack_enabled=False to opt out) and is turned
+        off automatically when queues, VoIP mangle or hotspot are enabled. Hardware
+        offload is only requested on L3HW-capable models (context 'model').
+        """
+        plan = HardwareValidator().plan_fasttrack(context.get('model', ''), context)
+        requested = context.get('fasttrack_enabled', True)
+        context['fasttrack_enabled'] = bool(requested) and plan['enabled']
+        context['fasttrack_hw_offload'] = context['fasttrack_enabled'] and plan['hw_offload']
+        context['fasttrack_blockers'] = plan['blockers']
+
+    def generate(self, context, compact=False, strip_comments=False):
+        """
+        Generates the RouterOS configuration script.
+        
+        Args:
+            context (dict): Dictionary containing configuration parameters.
+            compact (bool): Run the ScriptCompactor pass (menu grouping, :for/:foreach
+                            loops for regular runs) to shrink the upload and /import time.
+            strip_comments (bool): With compact, also drop comments and blank lines.
+            
+        Returns:
+            str: The rendered configuration script.
+        """
+        profile = env = None
+        if self.profile:
+            from logic.render_profiler import RenderProfile, instrument
+            if self._profile_env is None:
+                self._profile_env = instrument(self.env)
+            profile, env = RenderProfile(), self._profile_env
+
+        with self._profiling(profile, "generate"):
+            # Subnets are allocated while rendering; the transaction keeps other processes
+            # sharing the IPAM file from handing out the same ones before this one saves
+            with self.ipam.transaction():
+                with self._stage(profile, "prepare"):
+                    template, context, self.last_warnings = self._prepare(context, env)
+                with self._stage(profile, "render"):
+                    script = template.render(context)
+            if compact:
+                from logic.compactor import ScriptCompactor
+                with self._stage(profile, "compact"):
+                    script = ScriptCompactor().compact(script, strip_comments=strip_comments)
+        if profile is not None:
+            self.last_profile = profile
+        return script
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _profiling(profile, stage):
+        """Activates `profile` on this thread for the duration of the outermost stage."""
+        if profile is None:
+            yield
+            return
+        from logic.render_profiler import activate
+        with activate(profile), profile.frame(stage):
+            yield
+
+    @staticmethod
+    def _stage(profile, stage):
+        return profile.frame(stage) if profile is not None else contextlib.nullcontext()
+
+    def generate_stream(self, context):
+        """
+        Renders the script incrementally.
+
+        Returns a generator of str chunks suitable for Deployer, which streams them
+        to the router as they are produced (no temporary file, no full copy in memory).
+        The IPAM transaction is held until the last chunk has been consumed.
+        """
+        def chunks():
+            with self.ipam.transaction():
+                template, render_context, self.last_warnings = self._prepare(context)
+                yield from template.generate(render_context)
+
+        return chunks()
 
 if __name__ == "__main__":
     # Quick test
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class HardwareProfile:
+    """
+    Capabilities of one MikroTik board (or board family).
+
+    device_class is 'router' or 'switch': switches (CRS) forward in the switch chip and
+    have a small CPU, so anything that needs the CPU per packet (queues, hotspot, NAT
+    heavy routing) belongs on a router instead.
+    """
+    name: str
+    device_class: str # 'router' | 'switch'
+    arch: str # arm, arm64, mmips, mipsbe, tile, x86_64
+    cpu_cores: int
+    ram_mb: int
+    flash_mb: int
+    switch_chip: Optional[str] = None
+    l3hw: bool = False # Switch chip routes in hardware (L3HW / FastTrack hw-offload)
+    multi_bridge_offload: bool = False # More than one hardware-offloaded bridge
+    wireless: Optional[str] = None # 'wifiwave2' | 'legacy' | None
+    container: bool = False # Container package usable (arch + RAM + storage)
+
+    @property
+    def weak_cpu(self):
+        """Too little CPU for CAKE / heavy per-packet work on the slow path."""
+        return self.cpu_cores < 2 or self.arch in ("mmips", "mipsbe", "smips")
+
+
+def _profiles():
+    P = HardwareProfile
+    return [
+        # --- Switches (CRS): L3HW-capable Marvell Prestera chips ---
+        P("CRS3", "switch", "arm", 1, 512, 16, "98DX3236", l3hw=True, multi_bridge_offload=True),
+        P("CRS305-1G-4S+", "switch", "arm", 1, 512, 16, "98DX3236", l3hw=True, multi_bridge_offload=True),
+        P("CRS309-1G-8S+", "switch", "arm", 2, 512, 16, "98DX8208", l3hw=True, multi_bridge_offload=True),
+        P("CRS317-1G-16S+", "switch", "arm", 2, 1024, 16, "98DX8216", l3hw=True, multi_bridge_offload=True),
+        P("CRS326-24G-2S+", "switch", "arm", 1, 512, 16, "98DX3236", l3hw=True, multi_bridge_offload=True),
+        P("CRS328-24P-4S+", "switch", "arm", 1, 512, 16, "98DX3236", l3hw=True, multi_bridge_offload=True),
+        P("CRS5", "switch", "arm64", 4, 2048, 128, "98DX4310", l3hw=True, multi_bridge_offload=True),
+        P("CRS504-4XQ", "switch", "arm64", 4, 64, 16, "98DX4310", l3hw=True, multi_bridge_offload=True),
+        P("CRS510-8XS-2XQ", "switch", "arm64", 4, 2048, 128, "98DX4310", l3hw=True, multi_bridge_offload=True),
+        P("CRS518-16XS-2XQ", "switch", "arm64", 4, 2048, 128, "98DX8525", l3hw=True, multi_bridge_offload=True),
+        # Older CRS1xx/2xx: Atheros/QCA chips, no L3HW, one offloaded bridge
+        P("CRS1", "switch", "mipsbe", 1, 128, 128, "QCA8511"),
+        P("CRS2", "switch", "mipsbe", 1, 64, 16, "QCA8519"),
+
+        # --- Cloud Core Routers ---
+        P("CCR1009", "router", "tile", 9, 2048, 128, "AR8327", container=False),
+        P("CCR1036", "router", "tile", 36, 4096, 1024, None),
+        P("CCR1072", "router", "tile", 72, 16384, 1024, None),
+        P("CCR2004-1G-12S+2XS", "router", "arm64", 4, 4096, 128, "88E6191X", container=True),
+        P("CCR2004-16G-2S+", "router", "arm64", 4, 4096, 128, "88E6191X", container=True),
+        P("CCR2116-12G-4S+", "router", "arm64", 16, 16384, 128, "98DX3255", l3hw=True, container=True),
+        P("CCR2216-1G-12XS-2XQ", "router", "arm64", 16, 16384, 128, "98DX8525", l3hw=True, container=True),
+
+        # --- RouterBOARD routers ---
+        P("RB4011", "router", "arm", 4, 1024, 512, "RTL8367", container=True),
+        P("RB4011iGS+5HacQ2HnD", "router", "arm", 4, 1024, 512, "RTL8367", wireless="legacy", container=True),
+        P("RB5009", "router", "arm64", 4, 1024, 1024, "88E6393X", container=True),
+        P("RB750Gr3", "router", "mmips", 2, 256, 16, "MT7621"),
+        P("RB760iGS", "router", "mmips", 2, 256, 16, "MT7621"),
+        P("RB2011", "router", "mipsbe", 1, 128, 128, "AR8327"),
+        P("RB3011", "router", "arm", 2, 1024, 128, "QCA8337", container=True),
+        P("RB1100AHx4", "router", "arm", 4, 1024, 128, "RTL8367", container=True),
+
+        # --- hAP family (board names as reported by MNDP) ---
+        P("RBD52G-5HacD2HnD", "router", "arm", 4, 128, 16, "IPQ-4018", wireless="legacy"), # hAP ac^2
+        P("RBD53iG-5HacD2HnD", "router", "arm", 4, 256, 128, "IPQ-4019", wireless="legacy", container=True), # hAP ac^3
+        P("C52iG-5HaxD2HaxD", "router", "arm64", 4, 1024, 128, "IPQ-6010", wireless="wifiwave2", container=True), # hAP ax^2
+        P("C53UiG+5HPaxD2HPaxD", "router", "arm64", 4, 1024, 128, "IPQ-6010", wireless="wifiwave2", container=True), # hAP ax^3
+        P("L41G-2axD", "router", "arm64", 2, 256, 128, "IPQ-5010", wireless="wifiwave2"), # hAP ax lite
+        P("RB952Ui-5ac2nD", "router", "mipsbe", 1, 64, 16, None, wireless="legacy"), # hAP ac lite
+        P("RB941-2nD", "router", "smips", 1, 32, 16, None, wireless="legacy"), # hAP lite
+
+        # --- Virtual ---
+        P("CHR", "router", "x86_64", 4, 1024, 1024, None, container=True),
+        P("x86", "router", "x86_64", 4, 1024, 1024, None, container=True),
+    ]
+
+
+class HardwareDB:
+    """
+    Capability lookup keyed by board name (MNDP 'board' TLV, '/system routerboard' model).
+
+    Exact names are a dict hit; anything else falls back to the longest known prefix,
+    so 'CRS326-24G-2S+RM' resolves to 'CRS326-24G-2S+' and an unlisted 'CRS354-48G'
+    resolves to the CRS3xx family entry.
+    """
+
+    def __init__(self, profiles=None):
+        self._by_name = {}
+        for profile in profiles if profiles is not None else _profiles():
+            self._by_name[self._key(profile.name)] = profile
+        self._max_len = max((len(k) for k in self._by_name), default=0)
+
+    @staticmethod
+    def _key(name):
+        return name.strip().upper()
+
+    def lookup(self, board):
+        """Returns the HardwareProfile for `board`, or None if nothing matches."""
+        if not board:
+            return None
+        key = self._key(board)
+        profile = self._by_name.get(key)
+        if profile:
+            return profile
+        for length in range(min(len(key), self._max_len), 0, -1):
+            profile = self._by_name.get(key[:length])
+            if profile:
+                return profile
+        return None
+
+    def __len__(self):
+        return len(self._by_name)
+
+
+_default_db = None
+
+
+def get_hardware_db():
+    """Shared HardwareDB instance (the table is immutable)."""
+    global _default_db
+    if _default_db is None:
+        _default_db = HardwareDB()
+    return _default_db
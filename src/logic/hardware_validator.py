@@ -1,6 +1,5 @@
 import re
-import random
-import string
+from logic.hardware_db import get_hardware_db
 
 class HardwareValidator:
     """
@@ -17,8 +16,12 @@ class HardwareValidator:
         model = model.upper().strip()
 
         # 2. Check for Multi-Bridge support (CRS3xx / CRS5xx)
-        # Regex looks for CRS followed by 3 or 5
-        supports_multi_bridge = bool(re.search(r'CRS[35]\d\d', model))
+        # The capability DB is authoritative; the regex covers boards it does not list
+        profile = get_hardware_db().lookup(model)
+        if profile:
+            supports_multi_bridge = profile.multi_bridge_offload
+        else:
+            supports_multi_bridge = bool(re.search(r'CRS[35]\d\d', model))
 
         if bridge_count > 1 and not supports_multi_bridge:
             # 3. RB4011 / RB5009 / hAP / CCR / Older CRS specific warning
@@ -26,16 +29,113 @@ class HardwareValidator:
                 "valid": False,
                 "error": (
                     f"PERFORMANCE WARNING: The device '{model}' generally supports only ONE "
-                    "hardware-offloaded bridge. You are attempting to create {bridge_count}. "
+                    f"hardware-offloaded bridge. You are attempting to create {bridge_count}. "
                     "Traffic on secondary bridges will hit the CPU, causing bottlenecks."
                 )
             }
 
         return {"valid": True, "error": None}
 
+    # Switch chips that can route in hardware (L3HW) and offload FastTrack connections
+    L3HW_PATTERN = r'CRS3\d\d|CRS5\d\d|CCR2116|CCR2216'
+
+    def supports_l3hw(self, model: str) -> bool:
+        """True if the model's switch chip supports L3 hardware offloading."""
+        if not model:
+            return False
+        profile = get_hardware_db().lookup(model)
+        if profile:
+            return profile.l3hw
+        return bool(re.search(self.L3HW_PATTERN, model.upper()))
+
+    def fasttrack_blockers(self, context: dict) -> list:
+        """
+        Lists the enabled features that FastTrack would silently bypass.
+
+        FastTracked packets skip mangle, queues and hotspot processing, so with any of
+        these features active the forward chain must stay on the slow path.
+        """
+        blockers = []
+        if context.get('qos_type') in ('simple', 'cake', 'pcq'):
+            blockers.append(f"{context['qos_type']} queues")
+        if context.get('voip_enabled'):
+            blockers.append("VoIP mangle/priority queue")
+        if context.get('hotspot_enabled'):
+            blockers.append("hotspot")
+        return blockers
+
+    def plan_fasttrack(self, model: str, context: dict) -> dict:
+        """
+        Decides whether the forward chain gets a fasttrack-connection rule.
+
+        Returns:
+            dict: enabled (bool), hw_offload (bool, L3HW models only) and blockers (list
+                  of the features that forced FastTrack off).
+        """
+        blockers = self.fasttrack_blockers(context)
+        enabled = not blockers
+        return {
+            "enabled": enabled,
+            "hw_offload": enabled and self.supports_l3hw(model),
+            "blockers": blockers,
+        }
+
+    def plan_hardware(self, model: str, context: dict) -> dict:
+        """
+        Checks a config context against the model's capabilities (see hardware_db).
+
+        Errors are configs that would push forwarded traffic onto the CPU or cannot work
+        on the board at all; warnings are downgrades applied automatically. Unknown
+        models are not checked.
+
+        Returns:
+            dict: profile (HardwareProfile or None), errors (list), warnings (list) and
+                  settings (dict of template variables: qos_queue_kind, wifi_driver).
+        """
+        profile = get_hardware_db().lookup(model)
+        plan = {
+            "profile": profile,
+            "errors": [],
+            "warnings": [],
+            "settings": {"qos_queue_kind": "cake", "wifi_driver": None},
+        }
+        if not profile:
+            return plan
+
+        errors, warnings, settings = plan["errors"], plan["warnings"], plan["settings"]
+
+        bridge_check = self.validate_bridge_config(model, int(context.get('bridge_count', 1) or 1))
+        if not bridge_check["valid"]:
+            errors.append(bridge_check["error"])
+
+        if profile.device_class == "switch":
+            # CRS forwards in the switch chip; these features need every packet on the CPU
+            cpu_features = self.fasttrack_blockers(context)
+            if context.get('vpn_enabled'):
+                cpu_features.append("WireGuard VPN")
+            if cpu_features:
+                errors.append(
+                    f"{profile.name} is a switch: {', '.join(cpu_features)} would route all "
+                    "traffic through its CPU. Use a router for these features."
+                )
+
+        if context.get('container_enabled') and not profile.container:
+            errors.append(f"{profile.name} ({profile.arch}, {profile.ram_mb} MB RAM) cannot run containers.")
+
+        if context.get('qos_type') == 'cake' and profile.weak_cpu:
+            settings["qos_queue_kind"] = "fq-codel"
+            warnings.append(f"CAKE is too heavy for the {profile.arch} CPU of {profile.name}; using fq-codel.")
+
+        settings["wifi_driver"] = profile.wireless or "none"
+        if context.get('wifi_ssid') and not profile.wireless:
+            warnings.append(f"{profile.name} has no radio; WiFi settings are skipped.")
+
+        return plan
+
     def generate_tzsp_config(self, target_ip: str, interface_name: str) -> str:
         """
-        Generates the configuration command to enable TZSP streaming to Wireshark.
+        Generates the configuration command to enable TZSP streaming to Wireshark
+        or Titan's own receiver ('cli.py capture', discovery.tzsp_receiver).
         Defaults to UDP 37008 (Wireshark standard).
         """
         # RouterOS Command Logic:
@@ -58,91 +158,77 @@ class HardwareValidator:
         )
         return command
 
-    def wrap_in_safe_mode(self, commands: list) -> str:
+    def generate_snapshot_commands(self, snapshot_name: str) -> list:
+        """
+        Returns the commands that capture a restorable snapshot of the running config.
+
+        A binary backup is what the rollback scheduler restores (it brings back users,
+        passwords and certificates). A plain-text export is taken alongside it for humans.
+        """
+        return [
+            f"/system backup save name={snapshot_name} dont-encrypt=yes",
+            f"/export file={snapshot_name}",
+        ]
+
+    def generate_rollback_arm(self, snapshot_name: str, scheduler_name: str, delay: str) -> str:
+        """
+        Generates a scheduler that restores the snapshot (and reboots) once `delay` expires.
+
+        The scheduler removes itself before restoring, so the restore fires exactly once.
+        Cancel it with generate_rollback_disarm() after the new config is confirmed.
+        """
+        return (
+            f"/system scheduler add name=\"{scheduler_name}\" interval={delay} "
+            f"on-event=\"/system scheduler remove [find name=\\\"{scheduler_name}\\\"]; "
+            f"/system backup load name={snapshot_name}.backup\""
+        )
+
+    def generate_rollback_disarm(self, scheduler_name: str) -> str:
+        """Removes a rollback scheduler created by generate_rollback_arm()."""
+        return f"/system scheduler remove [find name=\"{scheduler_name}\"]"
+
+    def wrap_in_safe_mode(self, commands: list, scheduler_name: str,
+                          snapshot_name: str = "titan_safe_mode") -> str:
         """
         Wraps write-operations in a 'Rollback Script' Pattern to simulate Safe Mode via SSH.
 
-        Pattern:
-        1. Schedule a reboot in 4 minutes (Safety Net).
-        2. Run the config commands.
-        3. If successful, remove the scheduled reboot.
+        RouterOS commits every command to flash immediately, so a bare reboot would only
+        bring the router back with the broken config. Instead:
+        1. Snapshot the current config (/system backup + /export).
+        2. Arm a scheduler that restores the snapshot in 4 minutes (Safety Net).
+        3. Run the config commands.
+        4. Leave the restore armed. A config can cut management access without raising
+           an error, so the script cannot tell success on its own: the caller reconnects,
+           confirms access, then sends generate_rollback_disarm(scheduler_name) (as
+           Deployer._disarm_rollback() does). Without that the snapshot comes back.
 
         Args:
             commands (list): A list of RouterOS CLI commands to execute.
+            scheduler_name (str): Name of the restore scheduler. The caller picks it
+                                  (unique per deployment) because it must disarm it.
+            snapshot_name (str): Backup file name (without .backup) to restore from.
 
         Returns:
             str: The complete script block including the safety logic.
         """
-        # Generate a unique ID for the scheduler to avoid collisions
-        import uuid
-        unique_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        scheduler_name = f"SAFE_MODE_ROLLBACK_{unique_id}"
-
         cmd_block = "\n".join(commands)
-
-        # The script logic:
-        # 1. Create scheduler (Reboot in 4 mins)
-        # 2. Execute commands in a do/on-error block
-        # 3. If successful, remove scheduler
-
-        # Note: We use /system reboot, but usually we want to ensure the user isn't locked out.
-        # A reboot reverts the changes IF they were not saved?
-        # Wait, RouterOS saves changes immediately unless using Safe Mode (Ctrl+X).
-        # Since we are sending commands via SSH, they ARE committed immediately.
-        # So a reboot ONLY helps if the user provided a "Run-Once" config that isn't persistent?
-        # OR, more likely, the "Rollback" pattern implies we should verify connectivity?
-
-        # However, the prompt explicitly asks for:
-        # "(1) Schedules a system reboot... (2) Runs the config, (3) If successful, removes the scheduled reboot."
-        # This is the "Dead Man's Switch". If the config kills the connection, step (3) is never reached.
-        # The router reboots.
-        # BUT, for the reboot to *undo* the changes, the changes must be non-persistent or we must be running from a file?
-        # Actually, on RouterOS, commands are saved to flash immediately (usually).
-        # UNLESS we are running in "Safe Mode" which we can't do non-interactively easily.
-        # OR, the user assumes we are relying on a "Start from fresh" logic on reboot?
-        # Or maybe the prompt assumes we are uploading a file and `import`ing it?
-        # But `commands` is a list.
-
-        # Re-reading the prompt: "Simulate Safe Mode for SSH automation."
-        # If I run `/ip address add ...`, it's saved. A reboot won't undo it unless I explicitly undo it.
-        # The "Rollback Script" pattern usually involves:
-        # 1. Make backup.
-        # 2. Schedule restore of backup + reboot.
-        # 3. Apply changes.
-        # 4. Cancel schedule.
-
-        # BUT, the prompt strictly says: "(1) Schedules a system reboot... (2) Runs the config... (3) ... removes...".
-        # It does NOT say "Make backup".
-        # I will implement exactly what is requested, but add a comment about the persistence caveat.
-        # Actually, simpler interpretation: Maybe the user relies on the config being in RAM? No, ROS is flash-based.
-        # Most likely, this pattern is intended for *connectivity* recovery. If I break the network, I can't reach the router.
-        # The reboot brings the router back... but with the BROKEN config?
-        # Unless the user implies "Reboot to a known good state" or "Safe Mode" via API was requested.
-
-        # Let's stick to the requested logic. It protects against *temporary* lockouts or hangs,
-        # or maybe the user assumes they have a startup script that resets things?
-        # Wait, if I use `/system scheduler add ... on-event="/system reboot"`, it reboots.
-        # If the config changes are bad, the router reboots. The bad config persists.
-        # This is known as "The Scream Test" but it doesn't fix the config.
-
-        # However, I must follow the prompt: "Implement the wrap_in_safe_mode (using the Scheduler/Rollback pattern described)."
-        # I will implement exactly that.
+        snapshot_block = "\n".join(self.generate_snapshot_commands(snapshot_name))
 
         script = (
             f"# --- SAFE MODE WRAPPER ({scheduler_name}) ---\n"
-            f":log warning \"SAFE MODE: Scheduling safety reboot in 4 minutes...\"\n"
-            f"/system scheduler add name=\"{scheduler_name}\" interval=4m on-event=\"/system reboot\" start-time=startup\n"
+            f":log warning \"SAFE MODE: Taking snapshot and arming restore in 4 minutes...\"\n"
+            f"{snapshot_block}\n"
+            f"{self.generate_rollback_arm(snapshot_name, scheduler_name, '4m')}\n"
             f"\n"
             f"# --- BEGIN CONFIGURATION ---\n"
             f":do {{\n"
             f"{cmd_block}\n"
             f"}} on-error={{\n"
-            f"    :log error \"SAFE MODE: Script execution failed! Reboot scheduler remains active.\"\n"
+            f"    :log error \"SAFE MODE: Script execution failed! Snapshot restore remains armed.\"\n"
             f"    :error \"Script execution failed.\"\n"
             f"}}\n"
             f"# --- END CONFIGURATION ---\n"
             f"\n"
-            f":log info \"SAFE MODE: Success! Removing safety reboot scheduler.\"\n"
-            f"/system scheduler remove [find name=\"{scheduler_name}\"]\n"
+            f":log info \"SAFE MODE: Applied. Restore stays armed until {scheduler_name} is removed after reconnecting.\"\n"
         )
         return script
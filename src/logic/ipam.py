@@ -0,0 +1,354 @@
+import contextlib
+import ipaddress
+import json
+import os
+import threading
+
+from logic.file_lock import file_lock
+
+# Default on-disk location, shared by the GUI, the CLI and fleet tooling
+DEFAULT_IPAM_PATH = os.path.join(os.path.expanduser("~"), ".titan", "ipam.json")
+
+_OCTETS = [str(i) for i in range(256)]
+
+
+class SubnetPool:
+    """
+    Fixed-size subnets carved out of one parent network.
+
+    Free/used state is a bytearray with one byte per slot, so finding the next free
+    subnet is a single bytearray.find() (C speed) from a moving hint instead of a scan
+    over ipaddress objects. Allocations are keyed: asking again for the same key returns
+    the same subnet, and new keys always get the lowest free slot, so the result only
+    depends on the pool's state and the order of new keys.
+    """
+
+    MAX_SLOTS = 1 << 24 # 16 MiB bitmap; e.g. /30s out of a /6
+
+    def __init__(self, name, network, prefixlen):
+        self.name = name
+        self.network = ipaddress.ip_network(network)
+        self.prefixlen = int(prefixlen)
+        if not self.network.prefixlen <= self.prefixlen <= self.network.max_prefixlen:
+            raise ValueError(f"Pool '{name}': /{self.prefixlen} does not fit in {self.network}.")
+        slots = 1 << (self.prefixlen - self.network.prefixlen)
+        if slots > self.MAX_SLOTS:
+            raise ValueError(f"Pool '{name}': {slots} subnets is too many (max {self.MAX_SLOTS}).")
+
+        self._base = int(self.network.network_address)
+        self._size = 1 << (self.network.max_prefixlen - self.prefixlen)
+        self._bitmap = bytearray(slots)
+        self._hint = 0 # No free slot below this index
+        self._slots = {} # key -> slot
+        self._local = set() # Keys allocated, released or re-pinned since load/save; they override the file
+        self._lock = threading.Lock()
+        self.dirty = False # Changed since load/save
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def capacity(self):
+        return len(self._bitmap)
+
+    def _subnet(self, slot):
+        return self.network.__class__((self._base + slot * self._size, self.prefixlen))
+
+    def _cidr(self, slot):
+        """CIDR string for a slot; IPv4 is formatted directly (ipaddress objects are slow in bulk)."""
+        if self.network.version == 6:
+            return str(self._subnet(slot))
+        a = self._base + slot * self._size
+        return f"{_OCTETS[a >> 24]}.{_OCTETS[(a >> 16) & 255]}.{_OCTETS[(a >> 8) & 255]}.{_OCTETS[a & 255]}/{self.prefixlen}"
+
+    def _cidr_run(self, start, count):
+        """CIDR strings for `count` consecutive slots; IPv4 builds one 'a.b.c.' prefix per /24."""
+        if self.network.version == 6:
+            return [self._cidr(slot) for slot in range(start, start + count)]
+        size = self._size
+        first = self._base + start * size
+        end = first + count * size
+        tails = [f"{i}/{self.prefixlen}" for i in range(256)]
+        if size >= 256:
+            return [f"{_OCTETS[a >> 24]}.{_OCTETS[(a >> 16) & 255]}.{_OCTETS[(a >> 8) & 255]}.{tails[0]}"
+                    for a in range(first, end, size)]
+        cidrs = []
+        a = first
+        while a < end:
+            block = a >> 8
+            stop = min(end, (block + 1) << 8)
+            prefix = f"{_OCTETS[block >> 16]}.{_OCTETS[(block >> 8) & 255]}.{_OCTETS[block & 255]}."
+            cidrs.extend([prefix + tails[octet] for octet in range(a & 255, (a & 255) + (stop - a), size)])
+            a = stop
+        return cidrs
+
+    def _take(self, key):
+        # Caller holds the lock
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._bitmap.find(0, self._hint)
+            if slot < 0:
+                raise ValueError(f"Pool '{self.name}' ({self.network}) is exhausted.")
+            self._bitmap[slot] = 1
+            self._slots[key] = slot
+            self._local.add(key)
+            self._hint = slot + 1
+            self.dirty = True
+        return slot
+
+    def _slot_of(self, subnet):
+        subnet = ipaddress.ip_network(subnet)
+        if subnet.prefixlen != self.prefixlen or not subnet.subnet_of(self.network):
+            raise ValueError(f"{subnet} is not a /{self.prefixlen} inside pool '{self.name}' ({self.network}).")
+        return (int(subnet.network_address) - self._base) // self._size
+
+    def allocate(self, key):
+        """Returns the subnet (ip_network) for `key`, allocating the lowest free one if new."""
+        with self._lock:
+            return self._subnet(self._take(key))
+
+    def allocate_many(self, keys):
+        """Allocates a batch of keys under one lock; returns {key: CIDR string} in key order."""
+        keys = list(keys)
+        with self._lock:
+            slots, bitmap = self._slots, self._bitmap
+            new = [key for key in dict.fromkeys(keys) if key not in slots]
+            # All-or-nothing: refuse the batch before claiming anything
+            if len(new) > bitmap.count(0, self._hint):
+                raise ValueError(f"Pool '{self.name}' ({self.network}) is exhausted.")
+            cidrs = []
+            done = 0
+            while done < len(new):
+                # Claim the whole free run at once instead of one find() per key
+                start = bitmap.find(0, self._hint)
+                end = bitmap.find(1, start)
+                count = min((len(bitmap) if end < 0 else end) - start, len(new) - done)
+                bitmap[start:start + count] = b"\x01" * count
+                slots.update(zip(new[done:done + count], range(start, start + count)))
+                # Formatting is most of the cost at 100k subnets; a run is formatted in bulk
+                cidrs.extend(self._cidr_run(start, count))
+                self._hint = start + count
+                done += count
+            if new:
+                self._local.update(new)
+                self.dirty = True
+            if len(new) == len(keys):
+                return dict(zip(new, cidrs)) # All keys new and distinct: already in key order
+            result = dict(zip(new, cidrs))
+            known = [key for key in keys if key not in result] if new else keys
+            if self.network.version == 6:
+                result.update((key, self._cidr(slots[key])) for key in known)
+            else:
+                # Inline IPv4 formatting for keys allocated earlier
+                base, size, suffix, octet = self._base, self._size, f"/{self.prefixlen}", _OCTETS
+                for key in known:
+                    a = base + slots[key] * size
+                    result[key] = f"{octet[a >> 24]}.{octet[(a >> 16) & 255]}.{octet[(a >> 8) & 255]}.{octet[a & 255]}{suffix}"
+            return {key: result[key] for key in keys} if new else result
+
+    def reserve(self, key, subnet):
+        """Pins `key` to a specific subnet (e.g. one already configured on a router)."""
+        slot = self._slot_of(subnet)
+        with self._lock:
+            current = self._slots.get(key)
+            if current == slot:
+                return self._subnet(slot)
+            if self._bitmap[slot]:
+                raise ValueError(f"{subnet} is already allocated in pool '{self.name}'.")
+            if current is not None:
+                self._free(current)
+            self._bitmap[slot] = 1
+            self._slots[key] = slot
+            self._local.add(key)
+            self.dirty = True
+            return self._subnet(slot)
+
+    def release(self, key):
+        """Returns `key`'s subnet to the pool. Unknown keys are ignored."""
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._free(slot)
+                self._local.add(key)
+
+    def _free(self, slot):
+        self._bitmap[slot] = 0
+        self._hint = min(self._hint, slot)
+        self.dirty = True
+
+    def get(self, key):
+        """The subnet allocated to `key`, or None."""
+        slot = self._slots.get(key)
+        return None if slot is None else self._subnet(slot)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "network": str(self.network),
+                "prefixlen": self.prefixlen,
+                "allocations": {key: self._cidr(slot) for key, slot in self._slots.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        pool = cls(name, data["network"], data["prefixlen"])
+        for key, subnet in data.get("allocations", {}).items():
+            pool.reserve(key, subnet)
+        pool.synced()
+        return pool
+
+    def merge(self, data):
+        """
+        Adopts the allocations and releases another process saved (to_dict() format).
+
+        Keys allocated, released or re-pinned here since the last sync keep their local state.
+
+        Raises:
+            ValueError: The saved pool has another definition, or the same subnet or
+                        key was handed out differently by both sides.
+        """
+        if ipaddress.ip_network(data["network"]) != self.network or int(data["prefixlen"]) != self.prefixlen:
+            raise ValueError(f"IPAM pool '{self.name}' on disk is {data['network']} /{data['prefixlen']}, "
+                             f"not {self.network} /{self.prefixlen}.")
+        saved = data.get("allocations", {})
+        with self._lock:
+            for key in [key for key in self._slots if key not in saved and key not in self._local]:
+                slot = self._slots.pop(key) # Released elsewhere
+                self._bitmap[slot] = 0
+                self._hint = min(self._hint, slot)
+            for key, subnet in saved.items():
+                if key in self._local:
+                    continue
+                slot = self._slot_of(subnet)
+                current = self._slots.get(key)
+                if current == slot:
+                    continue
+                if current is not None or self._bitmap[slot]:
+                    raise ValueError(f"IPAM conflict in pool '{self.name}': {subnet} ({key}) was allocated concurrently.")
+                self._bitmap[slot] = 1
+                self._slots[key] = slot
+
+    def synced(self):
+        """Marks the pool as matching the file (after load or save)."""
+        with self._lock:
+            self._local.clear()
+            self.dirty = False
+
+
+class IPAM:
+    """
+    Named subnet pools with optional JSON persistence.
+
+    With a path, the pools are loaded on open and save() rewrites the file atomically,
+    so regenerating a site's config hands out the same subnets every time. Without a
+    path the IPAM lives in memory only (tests, one-off renders).
+
+    Several processes (GUI, CLI, API server) may share the file. Wrap allocate-and-save
+    in transaction(): it holds an exclusive lock on '<path>.lock', first merges what
+    others saved, and saves on exit, so two sites never get the same subnet.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.pools = {}
+        self._lock = threading.Lock()
+        self._txn = threading.RLock() # Serialises transactions within this process
+        self._depth = 0
+        if path and os.path.exists(path):
+            for name, pool in self._read().items():
+                self.pools[name] = SubnetPool.from_dict(name, pool)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f).get("pools", {})
+
+    def pool(self, name, network=None, prefixlen=None):
+        """
+        Returns pool `name`, creating it from network/prefixlen on first use.
+
+        Raises:
+            ValueError: The pool exists with a different network or prefix length, or
+                        does not exist and no network was given.
+        """
+        with self._lock:
+            pool = self.pools.get(name)
+            if pool is None:
+                if network is None or prefixlen is None:
+                    raise ValueError(f"Unknown IPAM pool '{name}'.")
+                pool = self.pools[name] = SubnetPool(name, network, prefixlen)
+            elif network is not None and (pool.network != ipaddress.ip_network(network) or pool.prefixlen != int(prefixlen)):
+                raise ValueError(
+                    f"IPAM pool '{name}' is {pool.network} /{pool.prefixlen}, not {network} /{prefixlen}."
+                )
+            return pool
+
+    def allocate(self, pool, key):
+        """Shortcut for pool(pool).allocate(key)."""
+        return self.pool(pool).allocate(key)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Context manager for a load-allocate-save cycle that is atomic across processes.
+
+        Holds the file lock (nestable), merges the pools saved by other processes on
+        entry and saves on a clean exit. In memory it only serialises threads.
+        """
+        with self._txn:
+            if not self.path or self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+            with file_lock(self.path + ".lock"):
+                self._depth = 1
+                try:
+                    self._merge()
+                    yield self
+                    self._save_locked()
+                finally:
+                    self._depth = 0
+
+    def _merge(self):
+        # Caller holds the file lock
+        for name, data in self._read().items():
+            with self._lock:
+                pool = self.pools.get(name)
+                if pool is None:
+                    self.pools[name] = SubnetPool.from_dict(name, data)
+                    continue
+            pool.merge(data)
+
+    def save(self):
+        """
+        Writes the pools to `path` (no-op in memory or when nothing changed). Allocations
+        other processes saved meanwhile are merged, not overwritten.
+
+        Raises:
+            ValueError: A subnet was handed out both here and by another process
+                        outside a transaction().
+        """
+        with self.transaction():
+            pass
+
+    def _save_locked(self):
+        with self._lock:
+            if not self.path or not any(pool.dirty for pool in self.pools.values()):
+                return
+            self._write()
+
+    def _write(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {"version": 1, "pools": {name: pool.to_dict() for name, pool in self.pools.items()}}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        for pool in self.pools.values():
+            pool.synced()
@@ -0,0 +1,262 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+from logic.file_lock import locked
+
+# Default on-disk location, shared by the GUI and any fleet tooling
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".titan", "deploy_journal.jsonl")
+
+
+class DeploymentJournal:
+    """
+    Append-only, crash-safe log of deployment state transitions.
+
+    Each transition is one JSON line: {"ts", "device", "state", ...detail}.
+    Writes are fsync'ed in batches (every `sync_every` records or `sync_interval`
+    seconds, whichever comes first); pass sync=True to record() for transitions that
+    must never be lost. On open the file is replayed into an in-memory index so the
+    latest state of any device is an O(1) lookup, even for large fleets.
+
+    Several processes may share the file (GUI, CLI, API server). Appends and compaction
+    hold an exclusive lock on '<path>.lock'; before each one the index catches up with
+    lines other processes appended, and follows the file if another process compacted it.
+
+    A torn final line (process killed mid-write) is dropped and truncated away. A
+    corrupt line elsewhere is skipped, reported and its offset kept in `corrupt`.
+    """
+
+    # States after which a deployment needs no further action
+    TERMINAL_STATES = ("confirmed", "failed", "cancelled", "interrupted")
+    # States reached before the router was told to import anything
+    PRE_APPLY_STATES = ("started", "uploaded", "snapshot")
+    # A live deployment records a transition at least this often (seconds): the longest
+    # gap is the heavy-payload wait plus the rollback grace. Older in-flight entries
+    # belong to a process that died.
+    STALE_AFTER = 900
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, sync_every=32, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.corrupt = []   # Byte offsets of skipped lines
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fh = open(path + ".lock", "a+b")
+        with locked(self._lock_fh):
+            self._open()
+
+    def _open(self):
+        # Caller holds the file lock
+        self._latest = {}   # device -> latest record
+        self._offsets = {}  # device -> byte offsets of all its records
+        self._end = 0       # Bytes of the file indexed so far
+        self._fh = open(self.path, "ab")
+        self._read_new()
+
+    def _read_new(self):
+        """Indexes the lines appended since the last read, by this or any other process."""
+        # Caller holds the file lock, so every writer has finished its line
+        offset = self._end
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # Torn write from a crash; only ever the last line
+                try:
+                    record = json.loads(line)
+                    record["device"]
+                except (ValueError, KeyError, TypeError):
+                    print(f"Journal {self.path}: skipped corrupt line at byte {offset}")
+                    self.corrupt.append(offset)
+                else:
+                    self._index(record, offset)
+                offset += len(line)
+        if offset != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        self._end = offset
+
+    def _refresh(self):
+        """Catches up with other processes. Caller holds both locks."""
+        try:
+            replaced = os.stat(self.path).st_ino != os.fstat(self._fh.fileno()).st_ino
+        except FileNotFoundError:
+            replaced = True
+        if replaced:
+            # Compacted (or removed) by another process: our handle points at the old file
+            self._fh.close()
+            self._open()
+        elif os.fstat(self._fh.fileno()).st_size != self._end:
+            self._read_new()
+
+    def _index(self, record, offset):
+        device = record["device"]
+        self._latest[device] = record
+        self._offsets.setdefault(device, []).append(offset)
+
+    def record(self, device, state, sync=False, **detail):
+        """
+        Appends a state transition for `device` and returns the stored record.
+
+        Args:
+            device: Stable device key (management IP, MAC or inventory id).
+            state: New state, e.g. started, uploaded, snapshot, scheduled, online, confirmed, failed.
+            sync: Force an fsync now instead of waiting for the batch.
+            **detail: Extra JSON-serialisable fields (target IP, message, ...).
+        """
+        record = {"ts": time.time(), "device": device, "state": state}
+        record.update(detail)
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._caught_up():
+            offset = self._end
+            self._fh.write(line)
+            self._fh.flush() # Whole line in the file before the lock is released
+            self._end = offset + len(line)
+            self._index(record, offset)
+            self._unsynced += 1
+            if (sync or self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync_locked()
+        return record
+
+    def _sync_locked(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Flushes and fsyncs any batched records."""
+        with self._lock:
+            if self._unsynced:
+                self._sync_locked()
+
+    def close(self):
+        with self._lock:
+            if self._fh.closed:
+                return
+            if self._unsynced:
+                self._sync_locked()
+            self._fh.close()
+            self._lock_fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def _caught_up(self):
+        """Holds both locks with the index caught up with other processes."""
+        with self._lock, locked(self._lock_fh):
+            self._refresh()
+            yield
+
+    def latest(self, device):
+        """Returns the most recent record for `device`, or None."""
+        with self._caught_up():
+            return self._latest.get(device)
+
+    def history(self, device):
+        """Returns every record for `device` in order (reads only that device's lines)."""
+        with self._caught_up():
+            offsets = list(self._offsets.get(device, ()))
+        records = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                try:
+                    record = json.loads(f.readline())
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or record.get("device") != device:
+                    return self._scan(device) # Compacted meanwhile
+                records.append(record)
+        return records
+
+    def _scan(self, device):
+        """Every record for `device`, read from the whole file."""
+        records = []
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("device") == device:
+                    records.append(record)
+        return records
+
+    def pending(self):
+        """Returns the latest record of every device whose deployment did not finish."""
+        with self._caught_up():
+            return [r for r in self._latest.values() if r["state"] not in self.TERMINAL_STATES]
+
+    def interrupted(self):
+        """
+        Splits pending deployments for recovery after a crash.
+
+        Returns:
+            dict: 'redeploy' - the import was never scheduled, safe to run again.
+                  'verify'   - the router may have applied the config (and may roll back);
+                               probe/confirm these before redeploying.
+        """
+        plan = {"redeploy": [], "verify": []}
+        for record in self.pending():
+            key = "redeploy" if record["state"] in self.PRE_APPLY_STATES else "verify"
+            plan[key].append(record)
+        return plan
+
+    def recover(self, stale_after=STALE_AFTER):
+        """
+        Closes out deployments left in flight by a crashed run. Call once on startup.
+
+        Every pending device whose last transition is older than `stale_after` seconds
+        gets an 'interrupted' record carrying the state it stopped in ('previous'), what
+        to do about it ('action': redeploy or verify, see interrupted()) and the router
+        addresses from its 'started' record.
+
+        Returns:
+            dict: The new 'interrupted' records, split into 'redeploy' and 'verify'.
+        """
+        cutoff = time.time() - stale_after
+        plan = {"redeploy": [], "verify": []}
+        for action, records in self.interrupted().items():
+            for record in records:
+                if record["ts"] > cutoff:
+                    continue # Possibly still running in another process
+                started = next((r for r in reversed(self.history(record["device"])) if r["state"] == "started"), {})
+                detail = {key: started[key] for key in ("ip", "target") if key in started}
+                plan[action].append(self.record(
+                    record["device"], "interrupted", previous=record["state"], action=action, **detail
+                ))
+        if plan["redeploy"] or plan["verify"]:
+            self.sync()
+        return plan
+
+    def compact(self):
+        """
+        Rewrites the journal keeping only the latest record per device.
+        The new file is fsync'ed and atomically swapped in under the file lock; other
+        processes notice the new inode and reopen it before their next append.
+        """
+        tmp_path = self.path + ".tmp"
+        with self._caught_up():
+            records = list(self._latest.values())
+            with open(tmp_path, "wb") as tmp:
+                for record in records:
+                    tmp.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            self._fh.close()
+            os.replace(tmp_path, self.path)
+            self._open()
+            self._unsynced = 0
@@ -0,0 +1,135 @@
+import ipaddress
+import re
+
+
+class QosPlanner:
+    """
+    Builds a hierarchical subscriber QoS plan: PCQ queue trees fed by mangle marks.
+
+    Subscribers are grouped into tiers. Each tier becomes one firewall address list,
+    one connection mark, two packet marks (up/down), two PCQ queue types and two
+    queue tree leaves. The router's per-packet cost is therefore one hash lookup in an
+    address list (new connections only) plus a mark match - it does not grow with the
+    number of subscribers the way a list of per-subscriber simple queues does.
+
+    Input (context keys read by ConfigGenerator):
+        qos_tiers:       [{"name": "gold", "download": "50M", "upload": "10M", "priority": 1}, ...]
+                         download/upload are the per-subscriber PCQ rates.
+        qos_subscribers: [{"address": "10.20.0.15", "tier": "gold"}, ...] (IPs or CIDRs)
+        qos_uplink:      optional {"download": "1G", "upload": "500M"} caps for the parents.
+    """
+
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+    RATE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)([kKMG]?)$')
+    RATE_UNITS = {"": 1, "k": 10**3, "K": 10**3, "M": 10**6, "G": 10**9}
+    DEFAULT_PRIORITY = 8
+
+    def parse_rate(self, rate):
+        """Parses a RouterOS rate ('50M', '512k', 1000000) into bits per second."""
+        if isinstance(rate, int) and rate > 0:
+            return rate
+        match = self.RATE_PATTERN.match(str(rate).strip())
+        if not match or float(match.group(1)) <= 0:
+            raise ValueError(f"Invalid rate '{rate}' (expected e.g. 512k, 50M, 1G).")
+        return int(float(match.group(1)) * self.RATE_UNITS[match.group(2)])
+
+    def format_rate(self, bps):
+        """Formats bits per second the way RouterOS prints them (largest exact unit)."""
+        for suffix, unit in (("G", 10**9), ("M", 10**6), ("k", 10**3)):
+            if bps % unit == 0:
+                return f"{bps // unit}{suffix}"
+        return str(bps)
+
+    @staticmethod
+    def _entry(network):
+        """Address-list entry: a bare address for a host, CIDR otherwise."""
+        return str(network.network_address) if network.num_addresses == 1 else str(network)
+
+    def plan(self, tiers, subscribers, uplink=None, wan_interface=None):
+        """
+        Validates the tiers/subscribers and returns the plan rendered by qos_tree.j2.
+
+        Args:
+            tiers (list): Tier dicts (name, download, upload, optional priority).
+            subscribers (list): {"address", "tier"} dicts.
+            uplink (dict): Optional parent caps {"download", "upload"}.
+            wan_interface (str): Uplink interface; None matches the WAN interface list.
+
+        Returns:
+            dict: tiers (list with marks, lists and formatted rates), address_lists /
+                  address_lists6 ({list name: [IPv4 / IPv6 addresses]}), families (the
+                  /ip and, with IPv6 subscribers, /ipv6 sections to emit), subscriber_count,
+                  wan_match and the parent max-limits (None when uncapped).
+
+        Raises:
+            ValueError: Unknown tier, duplicate tier/subscriber, bad address or rate.
+        """
+        if not tiers:
+            raise ValueError("QoS plan needs at least one tier.")
+
+        planned = []
+        by_name = {}
+        for tier in tiers:
+            name = str(tier.get('name', ''))
+            if not self.NAME_PATTERN.match(name):
+                raise ValueError(f"Invalid tier name '{name}' (letters, digits, '-' and '_', max 32).")
+            if name in by_name:
+                raise ValueError(f"Duplicate tier '{name}'.")
+            priority = int(tier.get('priority', self.DEFAULT_PRIORITY))
+            if not 1 <= priority <= 8:
+                raise ValueError(f"Tier '{name}': priority must be 1-8.")
+            entry = {
+                "name": name,
+                "list": f"qos-{name}",
+                "conn_mark": f"qos-{name}",
+                "down_mark": f"qos-{name}-down",
+                "up_mark": f"qos-{name}-up",
+                "download": self.format_rate(self.parse_rate(tier.get('download'))),
+                "upload": self.format_rate(self.parse_rate(tier.get('upload'))),
+                "priority": priority,
+            }
+            by_name[name] = entry
+            planned.append(entry)
+
+        # Group subscribers per tier; an address may only belong to one tier
+        members = {entry["list"]: [] for entry in planned}
+        owner = {}
+        for subscriber in subscribers or []:
+            tier_name = subscriber.get('tier')
+            if tier_name not in by_name:
+                raise ValueError(f"Subscriber {subscriber.get('address')} references unknown tier '{tier_name}'.")
+            try:
+                network = ipaddress.ip_network(str(subscriber.get('address', '')).strip(), strict=False)
+            except ValueError:
+                raise ValueError(f"Invalid subscriber address '{subscriber.get('address')}'.")
+            previous = owner.get(network)
+            if previous is not None and previous != tier_name:
+                raise ValueError(f"Subscriber {network} is in both '{previous}' and '{tier_name}'.")
+            if previous is None:
+                owner[network] = tier_name
+                members[by_name[tier_name]["list"]].append(network)
+
+        # RouterOS keeps IPv4 and IPv6 lists apart (/ip vs /ipv6 firewall), so split by family
+        address_lists, address_lists6 = {}, {}
+        for list_name, networks in members.items():
+            # Sorted numerically so the same plan always renders the same script
+            networks.sort(key=lambda n: (n.version, int(n.network_address), n.prefixlen))
+            address_lists[list_name] = [self._entry(n) for n in networks if n.version == 4]
+            address_lists6[list_name] = [self._entry(n) for n in networks if n.version == 6]
+        for entry in planned:
+            entry["subscribers"] = len(address_lists[entry["list"]]) + len(address_lists6[entry["list"]])
+        families = [{"name": "ip", "address_lists": address_lists}]
+        if any(address_lists6.values()):
+            families.append({"name": "ipv6", "address_lists": address_lists6})
+
+        uplink = uplink or {}
+        return {
+            "tiers": planned,
+            "address_lists": address_lists,
+            "address_lists6": address_lists6,
+            "families": families,
+            "subscriber_count": len(owner),
+            "wan_match": f"interface={wan_interface}" if wan_interface else "interface-list=WAN",
+            "uplink_download": self.format_rate(self.parse_rate(uplink['download'])) if uplink.get('download') else None,
+            "uplink_upload": self.format_rate(self.parse_rate(uplink['upload'])) if uplink.get('upload') else None,
+        }
@@ -0,0 +1,262 @@
+import functools
+import threading
+import time
+
+from jinja2.ext import Extension
+from jinja2.lexer import Token
+
+_active = threading.local() # .profile: RenderProfile of the render running on this thread
+
+
+class RenderProfile:
+    """
+    Timings of one generate() call, as a tree of frames.
+
+    A frame is a path such as ('generate', 'render', 'routeros_v7_base.j2',
+    'security_hardening.j2', 'filter join'); each keeps its call count, inclusive
+    time and self time (inclusive minus child frames). Frame kinds by name prefix:
+    '<template>.j2' (a template or include), 'block <name>', 'for <target> @<line>',
+    'filter <name>' and 'compile <template>' (first load only: templates are cached).
+    Everything else is one of ConfigGenerator's STAGES.
+    """
+
+    STAGES = ("generate", "prepare", "render", "compact")
+
+    def __init__(self):
+        self.frames = {} # path -> [calls, inclusive seconds, self seconds]
+        self._stack = [] # [path, start, child seconds]
+
+    # --- Recording ---
+    def enter(self, name):
+        parent = self._stack[-1][0] if self._stack else ()
+        self._stack.append([parent + (name,), time.perf_counter(), 0.0])
+
+    def exit(self):
+        path, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        frame = self.frames.get(path)
+        if frame is None:
+            frame = self.frames[path] = [0, 0.0, 0.0]
+        frame[0] += 1
+        frame[1] += elapsed
+        frame[2] += elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def add(self, name, seconds):
+        """Records an already measured child frame of the current frame."""
+        self.enter(name)
+        path, _, _ = self._stack.pop()
+        frame = self.frames.setdefault(path, [0, 0.0, 0.0])
+        frame[0] += 1
+        frame[1] += seconds
+        frame[2] += seconds
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+    def frame(self, name):
+        """Context manager timing `name` as a child of the current frame."""
+        profile = self
+
+        class _Frame:
+            def __enter__(self):
+                profile.enter(name)
+
+            def __exit__(self, *exc):
+                profile.exit()
+
+        return _Frame()
+
+    # --- Views ---
+    @property
+    def total_ms(self):
+        return sum(frame[1] for path, frame in self.frames.items() if len(path) == 1) * 1000
+
+    def summary(self):
+        """
+        Aggregates the frames by construct, wherever they ran.
+
+        Returns:
+            dict: total_ms plus templates / blocks / loops / filters / compile / stages,
+                  each {name: {"calls", "total_ms", "self_ms"}} sorted by self time.
+        """
+        groups = {"templates": {}, "blocks": {}, "loops": {}, "filters": {}, "compile": {}, "stages": {}}
+        for path, (calls, inclusive, own) in self.frames.items():
+            name = path[-1]
+            if name.startswith("filter "):
+                group, key = "filters", name[7:]
+            elif name.startswith("compile "):
+                group, key = "compile", name[8:]
+            elif name.startswith("for "):
+                group, key = "loops", f"{path[-2]}: {name[4:]}" if len(path) > 1 else name[4:]
+            elif name.startswith("block "):
+                group, key = "blocks", name[6:]
+            elif name in self.STAGES:
+                group, key = "stages", name
+            else:
+                group, key = "templates", name
+            entry = groups[group].setdefault(key, {"calls": 0, "total_ms": 0.0, "self_ms": 0.0})
+            entry["calls"] += calls
+            # A recursive construct would count twice in total_ms; self_ms stays exact
+            entry["total_ms"] += inclusive * 1000
+            entry["self_ms"] += own * 1000
+
+        result = {"total_ms": round(self.total_ms, 3)}
+        for group, entries in groups.items():
+            ordered = sorted(entries.items(), key=lambda item: -item[1]["self_ms"])
+            result[group] = {
+                key: {"calls": e["calls"], "total_ms": round(e["total_ms"], 3), "self_ms": round(e["self_ms"], 3)}
+                for key, e in ordered
+            }
+        return result
+
+    def folded(self):
+        """
+        Folded stacks ('a;b;c <microseconds>' per line, self time) for flamegraph.pl,
+        speedscope or inferno.
+        """
+        lines = []
+        for path, (_, _, own) in sorted(self.frames.items()):
+            micros = int(round(own * 1e6))
+            if micros > 0:
+                lines.append(";".join(part.replace(";", ",").replace(" ", "_") for part in path) + f" {micros}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _profiled_generator(name, render_func):
+    """Wraps a template/block render function; the frame spans first chunk to exhaustion."""
+    @functools.wraps(render_func)
+    def wrapper(*args, **kwargs):
+        profile = getattr(_active, "profile", None)
+        if profile is None:
+            yield from render_func(*args, **kwargs)
+            return
+        profile.enter(name)
+        try:
+            yield from render_func(*args, **kwargs)
+        finally:
+            profile.exit()
+    return wrapper
+
+
+def _profiled_filter(name, func):
+    @functools.wraps(func) # Keeps jinja_pass_arg (pass_context / pass_environment)
+    def wrapper(*args, **kwargs):
+        profile = getattr(_active, "profile", None)
+        if profile is None:
+            return func(*args, **kwargs)
+        profile.enter(f"filter {name}")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.exit()
+    return wrapper
+
+
+def _probe_enter(label):
+    profile = getattr(_active, "profile", None)
+    if profile is not None:
+        profile.enter(label)
+    return ""
+
+
+def _probe_exit():
+    profile = getattr(_active, "profile", None)
+    if profile is not None:
+        profile.exit()
+    return ""
+
+
+class LoopProbe(Extension):
+    """
+    Brackets every {% for %} ... {% endfor %} with probe calls, so each loop shows
+    up as its own frame ('for vlan @12'). The probes output nothing.
+    """
+
+    def filter_stream(self, stream):
+        pending = None # block_begin waiting for its tag name
+        closing = False # Inside an {% endfor %} tag
+        for token in stream:
+            if pending is not None:
+                if token.type == "name" and token.value == "for":
+                    target = next(stream) # Loop variable name (first one for tuples)
+                    label = f"for {target.value} @{token.lineno}"
+                    yield from self._call(token.lineno, "_titan_probe_enter", label)
+                    yield pending
+                    yield token
+                    yield target
+                elif token.type == "name" and token.value == "endfor":
+                    closing = True
+                    yield pending
+                    yield token
+                else:
+                    yield pending
+                    yield token
+                pending = None
+                continue
+            if token.type == "block_begin":
+                pending = token
+                continue
+            yield token
+            if closing and token.type == "block_end":
+                closing = False
+                yield from self._call(token.lineno, "_titan_probe_exit")
+
+    @staticmethod
+    def _call(lineno, function, *args):
+        yield Token(lineno, "variable_begin", "{{")
+        yield Token(lineno, "name", function)
+        yield Token(lineno, "lparen", "(")
+        for arg in args:
+            yield Token(lineno, "string", arg)
+        yield Token(lineno, "rparen", ")")
+        yield Token(lineno, "variable_end", "}}")
+
+
+def instrument(env):
+    """
+    Returns a profiling overlay of `env`: same loader, settings and filters, its own
+    template cache. Templates loaded through it time their root and blocks, filters
+    are wrapped, and loops carry probes. Nothing is recorded unless a RenderProfile
+    is active (see activate()), and the original environment is left untouched.
+    """
+    overlay = env.overlay(extensions=[LoopProbe])
+    overlay.filters = {name: _profiled_filter(name, func) for name, func in env.filters.items()}
+    overlay.globals = dict(env.globals, _titan_probe_enter=_probe_enter, _titan_probe_exit=_probe_exit)
+    load = overlay.get_template
+    lock = threading.Lock()
+
+    def get_template(name, parent=None, globals=None):
+        start = time.perf_counter()
+        template = load(name, parent, globals)
+        elapsed = time.perf_counter() - start
+        with lock:
+            if getattr(template, "_titan_profiled", False):
+                return template # Cache hit
+            template.root_render_func = _profiled_generator(name, template.root_render_func)
+            template.blocks = {
+                block: _profiled_generator(f"block {block}", func) for block, func in template.blocks.items()
+            }
+            template._titan_profiled = True
+        profile = getattr(_active, "profile", None)
+        if profile is not None:
+            profile.add(f"compile {name}", elapsed)
+        return template
+
+    overlay.get_template = get_template
+    return overlay
+
+
+class activate:
+    """Context manager making `profile` the active RenderProfile on this thread."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __enter__(self):
+        self._previous = getattr(_active, "profile", None)
+        _active.profile = self.profile
+        return self.profile
+
+    def __exit__(self, *exc):
+        _active.profile = self._previous
@@ -1,21 +1,25 @@
 import flet as ft
 import threading
-import http.server
-import socketserver
+import time
 import os
 import sys
 
 # Add src to path to find modules if needed
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Only lightweight modules are imported here. Views and engines that pull in
+# Scapy, paramiko or Jinja2 are imported when their view/action first runs
+# (see tools/startup_bench.py for the import-time budget).
 from discovery.mndp_scanner import MNDP_Scanner
-from ui.wizard import Wizard
-from logic.auditor import RouterAuditor
-from ui.monitor import TrafficMonitor
+from discovery.health_sweeper import HealthSweeper
+from logic.journal import DeploymentJournal
+from server.asset_server import AssetServer
+from server.topology_bridge import TopologyBridge
+from ui.inventory import DeviceInventory
 
 # --- Local Assets Server (Bridging Python & WebView) ---
 # This is required because WebViews cannot load local files with CORS enabled.
-PORT = 8000
+# The server binds an ephemeral port, so several Titan instances never collide.
 
 # Resolve ASSETS_DIR considering PyInstaller freeze
 if getattr(sys, 'frozen', False):
@@ -26,29 +30,70 @@ else:
     # Running as script
     ASSETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets"))
 
-class Handler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=ASSETS_DIR, **kwargs)
+_asset_server = None
+_asset_server_lock = threading.Lock()
 
-def start_asset_server():
-    # Allow reuse address to prevent "Address already in use" errors during restarts
-    socketserver.TCPServer.allow_reuse_address = True
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"Asset server running at http://localhost:{PORT}")
-        httpd.serve_forever()
+# Topology updates reach the WebView as SSE delta frames on /bridge
+topology_bridge = TopologyBridge()
 
-# Start server in background thread
-server_thread = threading.Thread(target=start_asset_server, daemon=True)
-server_thread.start()
+def ensure_asset_server():
+    """Loads assets and starts the server in a background thread (once). Not done at import time."""
+    global _asset_server
+    with _asset_server_lock:
+        if _asset_server is None:
+            server = AssetServer(ASSETS_DIR)
+            server.add_stream("/bridge", topology_bridge.subscribe)
+            server.start()
+            _asset_server = server
+    return _asset_server
+
+def start_api_server(scanner, health, journal=None):
+    """
+    Starts the automation API (server/api_server.py) next to the asset server when
+    TITAN_API_PORT is set. Requests need TITAN_API_TOKEN as a Bearer token; without
+    it a random token is generated and printed. Deploys are recorded in `journal`.
+    """
+    port = os.environ.get("TITAN_API_PORT")
+    if not port:
+        return None
+    from server.api_server import ApiServer
+    api = ApiServer(scanner=scanner, health=health, port=int(port), token=os.environ.get("TITAN_API_TOKEN"),
+                    journal=journal)
+    api.start()
+    if api.generated_token:
+        print(f"API token: {api.token}")
+    return api
+
+def prewarm():
+    """
+    Loads/compresses the topology assets in the background while Flet is still
+    starting, so the Scan tab's WebView is served from a warm cache on first paint.
+    main() then mounts that WebView once and keeps it alive (see switch_view).
+    """
+    threading.Thread(target=ensure_asset_server, daemon=True).start()
 
 # --- Main Application ---
 def main(page: ft.Page):
     page.title = "Project Titan - MikroTik Commander"
     page.theme_mode = ft.ThemeMode.DARK
     page.padding = 0
+
+    asset_server = ensure_asset_server()
     
     # Initialize Scanner
     scanner = MNDP_Scanner()
+
+    # Background reachability checks for neighbors + the login target
+    health = HealthSweeper(scanner=scanner)
+    health.start()
+
+    # One deployment journal for the Wizard and the API. Rollouts a crashed run left
+    # in flight are marked interrupted now and shown once the UI is up.
+    journal = DeploymentJournal()
+    recovered = journal.recover()
+
+    # Optional local API for automation; shares the scanner and health state with the GUI
+    start_api_server(scanner, health, journal)
     
     # --- State ---
     router_ip = ft.TextField(label="Router IP", value="192.168.88.1", width=200)
@@ -84,35 +129,61 @@ def main(page: ft.Page):
             run_audit(None)
 
     topology_view = ft.WebView(
-        url=f"http://localhost:{PORT}/index.html",
+        url=asset_server.url("index.html"),
         expand=True,
         on_page_started=lambda _: print("Graph Loading..."),
         on_web_resource_error=lambda e: print("Web Error:", e.data),
         on_message=handle_graph_message,
     )
 
+    # --- Scan (runs in the background; the graph fills in as neighbors arrive) ---
+    SCAN_REDRAW_INTERVAL = 0.3 # Seconds between graph pushes while scanning
+    scan_progress = ft.ProgressBar(width=300, value=0, visible=False)
+    scan_status = ft.Text("", size=12)
+
+    def publish_topology():
+        health_map = health.get_health_map()
+        topology_bridge.publish(scanner.get_topology_elements(health=health_map))
+        inventory.refresh(scanner.get_neighbors(), health_map, audit_results, scanner.generation)
+
+    def pump_scan_results():
+        """Pushes graph deltas and progress until the scan finishes. Never blocks the UI thread."""
+        last_generation = None
+        last_health = None
+        while True:
+            progress = scanner.get_progress()
+            health_map = health.get_health_map()
+            if scanner.generation != last_generation or health_map != last_health:
+                last_generation, last_health = scanner.generation, health_map
+                # Push only what changed to the WebView (no JSON string literals through evaluate_javascript)
+                publish_topology()
+
+            if not progress["running"]:
+                break
+            scan_progress.value = progress["fraction"]
+            scan_status.value = f"Scanning... {progress['neighbors']} neighbor(s) found"
+            page.update()
+            time.sleep(SCAN_REDRAW_INTERVAL) # Pump thread only
+
+        publish_topology()
+        scan_progress.visible = False
+        scan_status.value = f"Scan complete: {scanner.get_progress()['neighbors']} neighbor(s)"
+        scan_button.disabled = False
+        page.update()
+
     def run_scan(e):
-        page.snack_bar = ft.SnackBar(ft.Text("Scanning for Neighbors (MNDP)..."))
-        page.snack_bar.open = True
+        if scanner.running:
+            return
+        # Start Scan (bounded, so there is a completion state)
+        scanner.start_scan(duration=MNDP_Scanner.DEFAULT_SCAN_DURATION)
+
+        scan_button.disabled = True
+        scan_progress.value = 0
+        scan_progress.visible = True
+        scan_status.value = "Scanning for Neighbors (MNDP)..."
         page.update()
-        
-        # Start Scan
-        scanner.start_scan()
-        
-        # Give it a moment to find packets (since it's threaded)
-        # In a real app we'd use a timer or stream events, but here we'll just invoke update shortly after
-        # or we can just rely on the user clicking 'Scan' again or a 'Refresh' loop.
-        # For this demo, we'll grab what we have immediately (which might be empty first click) 
-        # and suggest re-clicking, or wait a tiny bit.
-        import time
-        time.sleep(1) 
-        
-        # Get data and inject into WebView
-        json_data = scanner.get_neighbors_json()
-        # print(f"Injecting Graph Data: {json_data}")
-        
-        safe_json_data = json_data.replace("'", "\\'")
-        topology_view.evaluate_javascript(f"updateTopology('{safe_json_data}')")
+
+        threading.Thread(target=pump_scan_results, daemon=True).start()
 
     def run_audit(e):
         """Runs the compliance audit on the currently targeted IP."""
@@ -126,16 +197,36 @@ def main(page: ft.Page):
             page.update()
             return
 
+        health.add_device(target)
         page.snack_bar = ft.SnackBar(ft.Text(f"Auditing {target}..."))
         page.snack_bar.open = True
         page.update()
         
         def audit_task():
-            auditor = RouterAuditor()
+            from logic.auditor import RouterAuditor
+            auditor = RouterAuditor(health=health)
             report = auditor.run_compliance_scan(target, user, password)
+            # The verdict comes from the report; an unreachable device has no checks but did not pass
+            stamp = time.strftime('%H:%M')
+            failed = sum(1 for check in report["checks"] if check["status"] != "PASS")
+            if report.get("error"):
+                audit_results[target] = f"{stamp} ERROR: {report['error']}"
+            elif not report["passed"]:
+                audit_results[target] = f"{stamp} FAIL ({failed} issue(s))"
+            else:
+                audit_results[target] = f"{stamp} PASS ({failed} warning(s))" if failed else f"{stamp} PASS"
+            inventory.refresh(scanner.get_neighbors(), health.get_health_map(), audit_results, scanner.generation)
             
             # Build Report UI
             items = []
+            if report.get("error"):
+                items.append(
+                    ft.ListTile(
+                        leading=ft.Icon(ft.Icons.ERROR, color=ft.Colors.RED),
+                        title=ft.Text("Audit failed"),
+                        subtitle=ft.Text(report["error"])
+                    )
+                )
             for check in report["checks"]:
                 icon = ft.Icons.CHECK_CIRCLE if check["status"] == "PASS" else ft.Icons.WARNING
                 color = ft.Colors.GREEN if check["status"] == "PASS" else (ft.Colors.ORANGE if check["status"] == "WARNING" else ft.Colors.RED)
@@ -166,16 +257,37 @@ def main(page: ft.Page):
     # --- Layout Management ---
     
     # Views
-    scan_view_content = ft.Container(content=topology_view, expand=True)
+    # Device table under the graph; selecting a row targets that router
+    audit_results = {} # ip -> last audit summary
+    def select_device(ip):
+        router_ip.value = ip
+        router_ip.update()
+        update_monitor_creds(None)
+        # The wizard generates for the selected board (hardware capability checks)
+        board = next((n.get('board') for n in scanner.get_neighbors() if n.get('ip') == ip), None)
+        if board:
+            get_wizard_view().set_model(board)
+
+    inventory = DeviceInventory(on_select=select_device)
+    scan_view_content = ft.Column(
+        [
+            ft.Container(content=topology_view, expand=3),
+            ft.Container(content=inventory, expand=2, padding=10),
+        ],
+        expand=True,
+    )
     
     # Login / Control Panel for Scan View
+    scan_button = ft.ElevatedButton("Scan Neighbors", icon=ft.Icons.RADAR, on_click=run_scan)
     login_controls = ft.Column(
         [
             ft.Text("MikroTik Login", size=20, weight=ft.FontWeight.BOLD),
             router_ip,
             router_user,
             router_pass,
-            ft.ElevatedButton("Scan Neighbors", icon=ft.Icons.RADAR, on_click=run_scan),
+            scan_button,
+            scan_progress,
+            scan_status,
             ft.ElevatedButton("Audit Device", icon=ft.Icons.SECURITY, on_click=run_audit),
             ft.ElevatedButton("Start Setup (Wizard)", icon=ft.Icons.SETTINGS, on_click=lambda e: switch_view(1)),
         ],
@@ -201,14 +313,29 @@ def main(page: ft.Page):
         expand=True
     )
     
-    wizard_view = Wizard(on_complete=lambda script: print("Wizard Complete"))
-    monitor_view = TrafficMonitor(router_ip=router_ip.value, router_user=router_user.value, router_pass=router_pass.value)
+    # Wizard/Monitor views are built (and their modules imported) on first visit
+    views = {}
+
+    def get_wizard_view():
+        if "wizard" not in views:
+            from ui.wizard import Wizard
+            views["wizard"] = Wizard(on_complete=lambda script: print("Wizard Complete"), health=health, journal=journal)
+        return views["wizard"]
+
+    def get_monitor_view():
+        if "monitor" not in views:
+            from ui.monitor import TrafficMonitor
+            views["monitor"] = TrafficMonitor(router_ip=router_ip.value, router_user=router_user.value, router_pass=router_pass.value)
+        return views["monitor"]
     
     # Update monitor credentials when changed in login
     def update_monitor_creds(e):
-        monitor_view.router_ip = router_ip.value
-        monitor_view.router_user = router_user.value
-        monitor_view.router_pass = router_pass.value
+        health.add_device(router_ip.value)
+        monitor_view = views.get("monitor")
+        if monitor_view:
+            monitor_view.router_ip = router_ip.value
+            monitor_view.router_user = router_user.value
+            monitor_view.router_pass = router_pass.value
         # Restart poller if running is tricky, but Container did_mount handles restart on view switch.
         # We leave it to the user to switch tabs to refresh.
 
@@ -216,21 +343,31 @@ def main(page: ft.Page):
     router_user.on_change = update_monitor_creds
     router_pass.on_change = update_monitor_creds
 
-    # Container to hold the current view
-    content_area = ft.Container(content=scan_layout, expand=True)
+    # The Scan layout is mounted for the whole session: its WebView loads the graph
+    # (and Cytoscape) during startup and keeps its state, so the Scan tab is interactive
+    # the moment it is shown. Other views are drawn over it instead of replacing it.
+    view_overlay = ft.Container(left=0, top=0, right=0, bottom=0, bgcolor=ft.Colors.SURFACE, visible=False)
+    content_area = ft.Stack(
+        [ft.Container(content=scan_layout, left=0, top=0, right=0, bottom=0), view_overlay],
+        expand=True,
+    )
 
     def switch_view(index):
         sidebar.selected_index = index
         if index == 0:
-            content_area.content = scan_layout
+            view_overlay.content = None # Unmounts the view (the monitor stops polling)
+            view_overlay.visible = False
         elif index == 1:
-            content_area.content = wizard_view
+            view_overlay.content = get_wizard_view()
+            view_overlay.visible = True
         elif index == 2:
             # Update creds just in case
+            monitor_view = get_monitor_view()
             monitor_view.router_ip = router_ip.value
             monitor_view.router_user = router_user.value
             monitor_view.router_pass = router_pass.value
-            content_area.content = monitor_view
+            view_overlay.content = monitor_view
+            view_overlay.visible = True
         page.update()
 
     # Sidebar (Navigation)
@@ -269,5 +406,43 @@ def main(page: ft.Page):
         )
     )
 
+    def show_interrupted(plan):
+        """Lists deployments the previous run did not finish, with what to do about each."""
+        items = []
+        for record in plan["verify"]:
+            # The import was scheduled: the router may run the new config or roll back
+            for ip in (record.get("target"), record.get("ip")):
+                if ip:
+                    health.add_device(ip)
+            items.append(ft.ListTile(
+                leading=ft.Icon(ft.Icons.HELP_OUTLINE, color=ft.Colors.ORANGE),
+                title=ft.Text(record["device"]),
+                subtitle=ft.Text(f"Stopped after '{record['previous']}': verify {record.get('target') or record.get('ip', '')} "
+                                 f"before redeploying (the snapshot restore may still fire)."),
+            ))
+        for record in plan["redeploy"]:
+            items.append(ft.ListTile(
+                leading=ft.Icon(ft.Icons.REPLAY, color=ft.Colors.BLUE),
+                title=ft.Text(record["device"]),
+                subtitle=ft.Text(f"Stopped after '{record['previous']}' before the import was scheduled: safe to redeploy."),
+            ))
+        if not items:
+            return
+
+        def close_dlg():
+            page.dialog.open = False
+            page.update()
+
+        page.dialog = ft.AlertDialog(
+            title=ft.Text("Interrupted Deployments"),
+            content=ft.Column(items, height=300, scroll=ft.ScrollMode.AUTO),
+            actions=[ft.TextButton("Close", on_click=lambda e: close_dlg())],
+        )
+        page.dialog.open = True
+        page.update()
+
+    show_interrupted(recovered)
+
 if __name__ == "__main__":
+    prewarm()
     ft.app(target=main)
@@ -0,0 +1,525 @@
+import asyncio
+import hashlib
+import ipaddress
+import itertools
+import json
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Job:
+    """One queued audit/deploy request and the events it produced."""
+
+    def __init__(self, job_id, kind, params):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.state = "queued" # queued -> running -> done | failed
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self.changed = asyncio.Condition()
+
+    def to_dict(self, events=False):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "target": self.params.get("ip"),
+            "created": self.created,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+        }
+        if events:
+            data["events"] = self.events
+        return data
+
+    async def publish(self, **fields):
+        async with self.changed:
+            if fields:
+                self.events.append(fields)
+            self.changed.notify_all()
+
+
+class ApiServer:
+    """
+    Local HTTP/JSON API for automation (asyncio, one event loop in a daemon thread).
+
+    Endpoints (all JSON; SSE where noted):
+        GET  /api/status                 server, queue and scan state
+        GET  /api/neighbors              MNDP neighbors with health
+        POST /api/scan                   {"duration": s} starts a scan
+        POST /api/generate               {context} -> {"script": ..., "warnings": [...]}; 422 if the model rejects it
+        POST /api/audit                  {"ip", "user", "password"} -> queued job
+        POST /api/deploy                 {"ip", "user", "password", "script", "target_lan_ip", ...} -> queued job
+        GET  /api/jobs                   recent jobs
+        GET  /api/jobs/<id>              one job with its events
+        GET  /api/jobs/<id>/events       SSE stream of a job's events
+        GET  /api/telemetry?ip=&interface=   SSE stream of traffic samples
+                                         (credentials in X-Titan-User / X-Titan-Password)
+
+    In-flight requests are capped (429 beyond max_requests). Audits and deploys go
+    through bounded queues drained by a fixed number of workers, and jobs targeting
+    the same router run one at a time.
+
+    Every request must carry 'Authorization: Bearer <token>'; without a token one is
+    generated (read it from `token`). Browsers are kept out: requests with an Origin
+    header, or a Host other than the bound address (DNS rebinding), get 403, and POST
+    bodies must be sent as application/json (415), which a plain HTML form cannot do.
+    """
+
+    MAX_BODY = 1024 * 1024
+    JOB_HISTORY = 500 # Finished jobs kept for GET /api/jobs
+    TELEMETRY_INTERVAL = 1.0
+
+    def __init__(self, scanner=None, health=None, host="127.0.0.1", port=0, token=None,
+                 max_requests=32, max_streams=16, queue_size=256, audit_workers=8, deploy_workers=2,
+                 ipam=None, journal=None):
+        self.scanner = scanner
+        self.ipam = ipam # Shared by every /api/generate (None: in-memory allocations)
+        self.journal = journal # DeploymentJournal shared with the GUI/CLI (None: deploys are not journaled)
+        self.health = health
+        self.host = host
+        self.generated_token = not token
+        self.token = token or secrets.token_urlsafe(32)
+        self.max_requests = max_requests
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.workers = {"audit": audit_workers, "deploy": deploy_workers}
+        self._requested_port = port
+        self._port = None
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._ready = threading.Event()
+        self._jobs = OrderedDict() # id -> Job
+        self._ids = itertools.count(1)
+        self._pollers = {} # (ip, user, credential hash, interface) -> [TrafficPoller, subscribers]
+        self._routes = [
+            ("GET", r"/api/status", self.get_status),
+            ("GET", r"/api/neighbors", self.get_neighbors),
+            ("POST", r"/api/scan", self.post_scan),
+            ("POST", r"/api/generate", self.post_generate),
+            ("POST", r"/api/audit", self.post_audit),
+            ("POST", r"/api/deploy", self.post_deploy),
+            ("GET", r"/api/jobs", self.get_jobs),
+            ("GET", r"/api/jobs/(\d+)", self.get_job),
+            ("GET", r"/api/jobs/(\d+)/events", self.stream_job),
+            ("GET", r"/api/telemetry", self.stream_telemetry),
+        ]
+
+    # --- Lifecycle ---
+    @property
+    def port(self):
+        return self._port
+
+    def url(self, path=""):
+        return f"http://{'localhost' if self.host in ('127.0.0.1', '') else self.host}:{self.port}/{path.lstrip('/')}"
+
+    def start(self):
+        """Starts the event loop thread and binds the socket. Returns the bound port."""
+        if self._thread:
+            return self._port
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        print(f"API server running at {self.url()}")
+        return self._port
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.max_requests)
+        self._streams = asyncio.Semaphore(self.max_streams)
+        self._queues = {kind: asyncio.Queue(maxsize=self.queue_size) for kind in self.workers}
+        self._device_locks = {}
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, self.host, self._requested_port)
+        )
+        self._port = self._server.sockets[0].getsockname()[1]
+        for kind, count in self.workers.items():
+            for _ in range(count):
+                self._loop.create_task(self._worker(kind))
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for poller, _ in self._pollers.values():
+                poller.stop()
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    # --- HTTP ---
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                keep_alive = await self._dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            return {"error": ApiError(400, "Malformed request line.")}
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return {"error": ApiError(400, "Invalid Content-Length.")}
+        if length > self.MAX_BODY:
+            return {"error": ApiError(413, "Request body too large.")}
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return {
+            "method": method.upper(),
+            "path": url.path,
+            "query": {k: v[-1] for k, v in parse_qs(url.query).items()},
+            "headers": headers,
+            "body": body,
+            "keep_alive": version == "HTTP/1.1" and headers.get("connection", "").lower() != "close",
+        }
+
+    async def _dispatch(self, request, writer):
+        if "error" in request:
+            await self._respond(writer, request["error"].status, {"error": request["error"].message}, False)
+            return False
+        keep_alive = request["keep_alive"]
+        events = None
+        try:
+            self._check_request(request)
+            handler, args = self._route(request["method"], request["path"])
+            if getattr(handler, "streaming", False):
+                # Validates the request and returns the event generator
+                events = await handler(request, *args)
+            else:
+                if self._slots.locked():
+                    raise ApiError(429, "Too many concurrent requests.")
+                async with self._slots:
+                    status, payload = await handler(request, *args)
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        if events is not None:
+            await self._stream(writer, events)
+            return False
+        await self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    def _check_request(self, request):
+        """Raises ApiError unless the request is a non-browser client with the token."""
+        headers = request["headers"]
+        if "origin" in headers:
+            raise ApiError(403, "Cross-origin requests are not allowed.")
+        if not self._host_allowed(headers.get("host", "")):
+            raise ApiError(403, "Host header does not match the server address.")
+        if not secrets.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}"):
+            raise ApiError(401, "Missing or invalid token.")
+        if request["method"] == "POST" and headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            raise ApiError(415, "Content-Type must be application/json.")
+
+    def _host_allowed(self, host):
+        """
+        True if a Host header names this server. On a wildcard bind the interface
+        addresses are unknown, so any IP literal is accepted, but never a DNS name.
+        """
+        if host.startswith("["):
+            name, _, port = host[1:].partition("]")
+            port = port[1:]
+        else:
+            name, _, port = host.partition(":")
+        if (port or "80") != str(self._port):
+            return False
+        name = name.lower()
+        if name == "localhost":
+            return self.host in ("127.0.0.1", "::1", "localhost", "", "0.0.0.0", "::")
+        try:
+            address = ipaddress.ip_address(name)
+        except ValueError:
+            return False
+        if self.host in ("", "0.0.0.0", "::"):
+            return True
+        if self.host == "localhost":
+            return address.is_loopback
+        return address == ipaddress.ip_address(self.host)
+
+    def _route(self, method, path):
+        path_matched = False
+        for route_method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, path)
+            if match:
+                path_matched = True
+                if route_method == method:
+                    return handler, match.groups()
+        raise ApiError(405 if path_matched else 404, "Method not allowed." if path_matched else "Not found.")
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {self._reason(status)}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _stream(self, writer, events):
+        """Writes an SSE response from an async generator of dicts; ends when the client leaves."""
+        if self._streams.locked():
+            await self._respond(writer, 429, {"error": "Too many open streams."}, False)
+            return
+        async with self._streams:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            try:
+                async for event in events:
+                    writer.write(f"data: {json.dumps(event, separators=(',', ':'), default=str)}\n\n".encode("utf-8"))
+                    await writer.drain()
+            finally:
+                await events.aclose()
+
+    @staticmethod
+    def _reason(status):
+        return {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large", 415: "Unsupported Media Type",
+                422: "Unprocessable Entity", 429: "Too Many Requests",
+                500: "Internal Server Error", 503: "Service Unavailable"}.get(status, "")
+
+    @staticmethod
+    def _json_body(request):
+        try:
+            data = json.loads(request["body"] or b"{}")
+        except ValueError:
+            raise ApiError(400, "Body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Body must be a JSON object.")
+        return data
+
+    @staticmethod
+    def _require(data, *names):
+        missing = [name for name in names if not data.get(name)]
+        if missing:
+            raise ApiError(400, f"Missing field(s): {', '.join(missing)}")
+
+    async def _in_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    # --- Handlers ---
+    async def get_status(self, request):
+        return 200, {
+            "status": "ok",
+            "queues": {kind: queue.qsize() for kind, queue in self._queues.items()},
+            "jobs": len(self._jobs),
+            "scan": self.scanner.get_progress() if self.scanner else None,
+        }
+
+    async def get_neighbors(self, request):
+        if not self.scanner:
+            raise ApiError(503, "No scanner attached.")
+        health = self.health.get_health_map() if self.health else {}
+        neighbors = [dict(n, health=health.get(n.get('ip'), "unknown")) for n in self.scanner.get_neighbors()]
+        return 200, {"generation": self.scanner.generation, "neighbors": neighbors}
+
+    async def post_scan(self, request):
+        if not self.scanner:
+            raise ApiError(503, "No scanner attached.")
+        data = self._json_body(request)
+        if not self.scanner.running:
+            self.scanner.start_scan(duration=data.get("duration", self.scanner.DEFAULT_SCAN_DURATION))
+        return 202, self.scanner.get_progress()
+
+    async def post_generate(self, request):
+        context = self._json_body(request)
+        from logic.generator import ConfigGenerator, ConfigRejected
+        if self.ipam is None:
+            from logic.ipam import IPAM
+            self.ipam = IPAM()
+        generator = ConfigGenerator(ipam=self.ipam)
+        try:
+            script = await self._in_thread(generator.generate, context)
+        except ConfigRejected as e:
+            return 422, {"error": str(e), "errors": e.errors}
+        return 200, {"script": script, "warnings": generator.last_warnings}
+
+    async def post_audit(self, request):
+        data = self._json_body(request)
+        self._require(data, "ip")
+        return 202, self._enqueue("audit", data).to_dict()
+
+    async def post_deploy(self, request):
+        data = self._json_body(request)
+        self._require(data, "ip", "script", "target_lan_ip")
+        return 202, self._enqueue("deploy", data).to_dict()
+
+    async def get_jobs(self, request):
+        return 200, {"jobs": [job.to_dict() for job in reversed(self._jobs.values())]}
+
+    async def get_job(self, request, job_id):
+        return 200, self._job(job_id).to_dict(events=True)
+
+    async def stream_job(self, request, job_id):
+        return self._job_events(self._job(job_id))
+    stream_job.streaming = True
+
+    async def _job_events(self, job):
+        sent = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.events) > sent or job.state in ("done", "failed"))
+                pending = job.events[sent:]
+                finished = job.state in ("done", "failed")
+            for event in pending:
+                yield event
+            sent += len(pending)
+            if finished and sent == len(job.events):
+                yield {"phase": "job", "state": job.state, "result": job.result, "error": job.error}
+                return
+
+    async def stream_telemetry(self, request):
+        ip = request["query"].get("ip")
+        if not ip:
+            raise ApiError(400, "Missing query parameter: ip")
+        interface = request["query"].get("interface", "ether1")
+        user = request["headers"].get("x-titan-user", "admin")
+        password = request["headers"].get("x-titan-password", "")
+        return self._telemetry_events(ip, user, password, interface)
+    stream_telemetry.streaming = True
+
+    async def _telemetry_events(self, ip, user, password, interface):
+        # Clients watching the same router/interface with the same credentials share one
+        # SSH poller; a different password never reuses a session it did not open
+        credentials = hashlib.sha256(f"{user}\0{password}".encode("utf-8")).hexdigest()
+        key = (ip, user, credentials, interface)
+        if key not in self._pollers:
+            from logic.telemetry import TrafficPoller
+            poller = TrafficPoller(ip, user, password)
+            poller.set_interface(interface)
+            poller.start()
+            self._pollers[key] = [poller, 0]
+        entry = self._pollers[key]
+        entry[1] += 1
+        try:
+            while True:
+                await asyncio.sleep(self.TELEMETRY_INTERVAL)
+                stats = entry[0].get_stats()
+                yield {"ip": ip, "interface": interface, "rx_bps": stats["rx"], "tx_bps": stats["tx"], "ts": time.time()}
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._pollers[key]
+                await self._in_thread(entry[0].stop)
+
+    # --- Jobs ---
+    def _job(self, job_id):
+        job = self._jobs.get(int(job_id))
+        if job is None:
+            raise ApiError(404, f"No job {job_id}.")
+        return job
+
+    def _enqueue(self, kind, params):
+        job = Job(next(self._ids), kind, params)
+        try:
+            self._queues[kind].put_nowait(job)
+        except asyncio.QueueFull:
+            raise ApiError(429, f"The {kind} queue is full.")
+        self._jobs[job.id] = job
+        self._trim_jobs()
+        return job
+
+    def _trim_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in ("done", "failed")]
+        for job_id in finished[:max(0, len(self._jobs) - self.JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, kind):
+        run = self._run_audit if kind == "audit" else self._run_deploy
+        while True:
+            job = await self._queues[kind].get()
+            # One job per router at a time, whatever its kind
+            lock = self._device_locks.setdefault(job.params["ip"], asyncio.Lock())
+            async with lock:
+                job.state = "running"
+                await job.publish()
+                try:
+                    job.result = await run(job)
+                    job.state = "done"
+                except Exception as e:
+                    job.error = str(e)
+                    job.state = "failed"
+                job.finished = time.time()
+                await job.publish()
+            self._queues[kind].task_done()
+
+    async def _run_audit(self, job):
+        from logic.auditor import RouterAuditor
+        p = job.params
+        auditor = RouterAuditor(health=self.health)
+        return await self._in_thread(auditor.run_compliance_scan, p["ip"], p.get("user", "admin"), p.get("password", ""))
+
+    async def _run_deploy(self, job):
+        from dataclasses import asdict
+        from logic.deployer import Deployer
+        p = job.params
+        deployer = Deployer(journal=self.journal, health=self.health)
+        last_phase = None
+        async for event in deployer.deploy_configuration_async(
+            ip=p["ip"],
+            user=p.get("user", "admin"),
+            password=p.get("password", ""),
+            script=p["script"],
+            target_lan_ip=p["target_lan_ip"],
+            heavy_payload=bool(p.get("heavy_payload")),
+            rollback=p.get("rollback", True),
+            confirm_user=p.get("confirm_user"),
+            confirm_password=p.get("confirm_password"),
+        ):
+            await job.publish(**asdict(event))
+            last_phase = event.phase
+        if last_phase != "done":
+            raise RuntimeError(job.events[-1]["message"] if job.events else "Deployment failed.")
+        return {"target_lan_ip": p["target_lan_ip"]}
@@ -0,0 +1,278 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+class Asset:
+    """One in-memory asset with its precomputed compressed variants."""
+    __slots__ = ("body", "variants", "etag", "content_type", "cache_control", "modified")
+
+    def __init__(self, body, content_type, cache_control, modified=None):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.modified = int(modified if modified is not None else time.time()) # Last-Modified, seconds
+        self.variants = {} # encoding -> compressed body
+
+
+class AssetServer:
+    """
+    Threaded HTTP server for the WebView assets (bridging Python & WebView).
+
+    All files are read into memory once; compressible ones get gzip (and brotli,
+    when the module is installed) variants up front. Every response carries an
+    ETag and a Last-Modified date, and conditional requests (If-None-Match or
+    If-Modified-Since) are answered with 304. One slow client only
+    ties up its own thread. Binding port 0 picks a free ephemeral port, so several
+    instances can run side by side.
+    """
+
+    COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+    MIN_COMPRESS_SIZE = 512 # Bytes; smaller bodies are not worth the header overhead
+    DEFAULT_CACHE_CONTROL = "no-cache" # Always revalidate; cheap thanks to ETags/304
+    # Versioned third-party files never change under the same URL
+    IMMUTABLE_PREFIXES = ("/vendor/",)
+    IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def __init__(self, assets_dir=None, host="127.0.0.1", port=0, exclude=("templates",)):
+        self.assets_dir = assets_dir
+        self.host = host
+        self.exclude = set(exclude)
+        self._requested_port = port
+        self._assets = {} # URL path -> Asset
+        self._streams = {} # URL path -> callable returning an iterator of SSE chunks
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+        if assets_dir:
+            self.load(assets_dir)
+
+    # --- Content ---
+    def load(self, assets_dir):
+        """Loads every file under assets_dir (except excluded top-level folders)."""
+        for root, dirs, files in os.walk(assets_dir):
+            if root == assets_dir:
+                dirs[:] = [d for d in dirs if d not in self.exclude]
+            for name in files:
+                full_path = os.path.join(root, name)
+                url_path = "/" + os.path.relpath(full_path, assets_dir).replace(os.sep, "/")
+                cache_control = None
+                if url_path.startswith(self.IMMUTABLE_PREFIXES):
+                    cache_control = self.IMMUTABLE_CACHE_CONTROL
+                with open(full_path, "rb") as f:
+                    self.add(url_path, f.read(), cache_control=cache_control)
+
+    def add(self, path, body, content_type=None, cache_control=None):
+        """
+        Publishes (or replaces) an in-memory asset at `path`.
+
+        Args:
+            path: URL path, e.g. '/index.html'.
+            body: bytes (str is encoded as UTF-8).
+            content_type: Defaults to a guess from the file extension.
+            cache_control: Cache-Control header; defaults to DEFAULT_CACHE_CONTROL.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not path.startswith("/"):
+            path = "/" + path
+        if content_type is None:
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+        previous = self.get(path)
+        asset = Asset(body, content_type, cache_control or self.DEFAULT_CACHE_CONTROL)
+        if previous is not None and previous.etag == asset.etag:
+            asset.modified = previous.modified # Same content republished: keep validators stable
+        if len(body) >= self.MIN_COMPRESS_SIZE and content_type.startswith(self.COMPRESSIBLE_TYPES):
+            asset.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli:
+                asset.variants["br"] = brotli.compress(body)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    def get(self, path):
+        with self._lock:
+            return self._assets.get(path)
+
+    def add_stream(self, path, subscribe):
+        """
+        Mounts a Server-Sent Events endpoint at `path`.
+
+        Args:
+            path: URL path, e.g. '/bridge'.
+            subscribe: Callable returning an iterator of bytes chunks for one client
+                       (e.g. TopologyBridge.subscribe). Runs on that client's thread.
+        """
+        if not path.startswith("/"):
+            path = "/" + path
+        with self._lock:
+            self._streams[path] = subscribe
+
+    def get_stream(self, path):
+        with self._lock:
+            return self._streams.get(path)
+
+    # --- Lifecycle ---
+    @property
+    def port(self):
+        return self._httpd.server_address[1] if self._httpd else None
+
+    def url(self, path=""):
+        return f"http://{'localhost' if self.host in ('127.0.0.1', '') else self.host}:{self.port}/{path.lstrip('/')}"
+
+    def start(self):
+        """Binds the socket and serves in a daemon thread. Returns the bound port."""
+        if self._httpd:
+            return self.port
+        self._httpd = ThreadingHTTPServer((self.host, self._requested_port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Asset server running at {self.url()}")
+        return self.port
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(AssetRequestHandler):
+            asset_server = server
+
+        return Handler
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive for the WebView
+    asset_server = None
+
+    def do_HEAD(self):
+        self._serve(head_only=True)
+
+    def do_GET(self):
+        self._serve()
+
+    def _serve(self, head_only=False):
+        path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if path == "/":
+            path = "/index.html"
+        stream = self.asset_server.get_stream(path)
+        if stream is not None and not head_only:
+            self._serve_stream(stream)
+            return
+        asset = self.asset_server.get(path)
+        if asset is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        encoding = self._negotiate(asset)
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+
+        if self._etag_matches(asset.etag) or self._not_modified_since(asset.modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(asset.modified, usegmt=True))
+            self.send_header("Cache-Control", asset.cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = asset.variants[encoding] if encoding else asset.body
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(asset.modified, usegmt=True))
+        self.send_header("Cache-Control", asset.cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def _serve_stream(self, subscribe):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close") # Body ends when either side hangs up
+        self.end_headers()
+        self.close_connection = True
+        chunks = subscribe()
+        try:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # WebView reloaded or closed
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+
+    def _negotiate(self, asset):
+        if not asset.variants:
+            return None
+        accepted = {}
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            token, _, params = part.strip().partition(";")
+            q = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[token.strip().lower()] = q
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted.get(encoding, 0) > 0:
+                return encoding
+        return None
+
+    def _etag_matches(self, base_etag):
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            # Any encoding variant of the same content still matches
+            if candidate.strip('"').split("-", 1)[0] == base_etag:
+                return True
+        return False
+
+    def _not_modified_since(self, modified):
+        # If-None-Match takes precedence when both are sent (RFC 9110 13.1.3)
+        if self.headers.get("If-None-Match"):
+            return False
+        header = self.headers.get("If-Modified-Since")
+        if not header:
+            return False
+        try:
+            return modified <= parsedate_to_datetime(header).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet; WebView reloads are frequent
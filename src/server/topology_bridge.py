@@ -0,0 +1,157 @@
+import json
+import threading
+from collections import deque
+
+# Compact wire keys (full name -> short key) for topology elements
+WIRE_KEYS = {
+    "id": "i",
+    "label": "l",
+    "color": "c",
+    "health": "h",
+    "parent": "p",
+    "source": "s",
+    "target": "t",
+    "count": "n",
+    "ip": "a",
+}
+# Health is sent as a single character
+HEALTH_CODES = {"up": "u", "down": "d", "unknown": "?"}
+
+
+def encode_element(data):
+    """
+    Shrinks one Cytoscape element's data dict to its wire form.
+
+    The neighbor's full 'info' dict is dropped; only its IP (needed by the click
+    handler) is kept. Flags become a one-letter kind: 'c' cluster, 'g' aggregate.
+    """
+    wire = {}
+    for key, short in WIRE_KEYS.items():
+        if key in data and data[key] is not None:
+            wire[short] = data[key]
+    if "h" in wire:
+        wire["h"] = HEALTH_CODES.get(wire["h"], "?")
+    info = data.get("info")
+    if isinstance(info, dict) and info.get("ip"):
+        wire["a"] = info["ip"]
+    if data.get("cluster"):
+        wire["k"] = "c"
+    elif data.get("aggregate"):
+        wire["k"] = "g"
+    return wire
+
+
+def dumps(frame):
+    return json.dumps(frame, separators=(",", ":"))
+
+
+class TopologyBridge:
+    """
+    Delta channel between the scanner and the topology WebView.
+
+    publish() diffs a full element list against what was last sent and queues a
+    frame containing only the changes:
+        {"q": seq, "a": [added], "u": [updated], "r": [removed ids]}
+    A reset frame ({"x": 1, "a": [everything]}) is sent to every new subscriber and
+    to subscribers that fell too far behind. subscribe() yields Server-Sent Events
+    and is meant to be mounted on the AssetServer (see AssetServer.add_stream()).
+    """
+
+    HEARTBEAT = 15.0 # Seconds; a comment line detects dead WebView connections
+
+    def __init__(self, history=256):
+        self._cond = threading.Condition()
+        self._state = {} # id -> wire element last published
+        self._frames = deque(maxlen=history) # (seq, encoded frame)
+        self._seq = 0
+        self._closed = False
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, elements):
+        """
+        Queues the difference between `elements` and the last published state.
+
+        Args:
+            elements: List of Cytoscape elements ({"data": {...}}), e.g. from
+                      MNDP_Scanner.get_topology_elements().
+
+        Returns:
+            dict: The frame that was queued, or None if nothing changed.
+        """
+        incoming = {}
+        for element in elements:
+            wire = encode_element(element["data"])
+            incoming[wire["i"]] = wire
+
+        with self._cond:
+            added, updated = [], []
+            for element_id, wire in incoming.items():
+                previous = self._state.get(element_id)
+                if previous is None:
+                    added.append(wire)
+                elif previous != wire:
+                    updated.append(wire)
+            removed = [element_id for element_id in self._state if element_id not in incoming]
+            if not (added or updated or removed):
+                return None
+
+            self._state = incoming
+            self._seq += 1
+            frame = {"q": self._seq}
+            if added:
+                frame["a"] = added
+            if updated:
+                frame["u"] = updated
+            if removed:
+                frame["r"] = removed
+            self._frames.append((self._seq, dumps(frame)))
+            self._cond.notify_all()
+            return frame
+
+    def snapshot(self):
+        with self._cond:
+            return {"q": self._seq, "x": 1, "a": list(self._state.values())}
+
+    def subscribe(self, heartbeat=None):
+        """
+        Yields SSE messages (bytes): a reset frame, then every delta as it is published.
+        Ends when the bridge is closed.
+        """
+        heartbeat = self.HEARTBEAT if heartbeat is None else heartbeat
+        with self._cond:
+            frame = self.snapshot()
+        last = frame["q"]
+        yield self._event(last, dumps(frame))
+
+        while True:
+            with self._cond:
+                if not self._closed and self._seq == last:
+                    self._cond.wait(heartbeat)
+                if self._closed:
+                    return
+                if self._seq == last:
+                    pending = None
+                elif self._frames and self._frames[0][0] <= last + 1:
+                    pending = [(seq, data) for seq, data in self._frames if seq > last]
+                else:
+                    # Deltas we missed were evicted from history: start over
+                    reset = self.snapshot()
+                    pending = [(reset["q"], dumps(reset))]
+            if pending is None:
+                yield b": ping\n\n"
+                continue
+            for seq, data in pending:
+                yield self._event(seq, data)
+            last = pending[-1][0]
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @staticmethod
+    def _event(seq, data):
+        return f"id: {seq}\ndata: {data}\n\n".encode("utf-8")
@@ -0,0 +1,170 @@
+import flet as ft
+from discovery.neighbor_index import NeighborIndex
+
+
+def format_uptime(seconds):
+    if seconds is None:
+        return ""
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    if days:
+        return f"{days}d {hours}h"
+    return f"{hours}h {rest // 60}m"
+
+
+class DeviceInventory(ft.Column):
+    """
+    Virtualized device table for the neighbor list.
+
+    Only a window of rows around the viewport exists as controls; spacers above and
+    below stand in for the rest, so 5,000 neighbors cost the same to draw as 50.
+    Row controls are reused while scrolling (only their text changes), and sort and
+    filter run against a NeighborIndex rather than the raw neighbor list.
+    """
+
+    ROW_HEIGHT = 32
+    WINDOW = 60 # Rows kept as controls (viewport + overscan)
+    OVERSCAN = 20 # Rows kept above the viewport
+    COLUMNS = [
+        # (field, header, width)
+        ("identity", "Identity", 160),
+        ("ip", "IP", 120),
+        ("mac", "MAC", 140),
+        ("version", "Version", 110),
+        ("platform", "Platform", 90),
+        ("board", "Board", 130),
+        ("uptime", "Uptime", 80),
+        ("health", "Health", 70),
+        ("last_audit", "Last Audit", 120),
+    ]
+    HEALTH_COLORS = {"up": ft.Colors.GREEN, "down": ft.Colors.RED}
+
+    def __init__(self, on_select=None):
+        super().__init__()
+        self.expand = True
+        self.spacing = 5
+        self.on_select = on_select
+        self.index = NeighborIndex()
+        self._positions = []
+        self._first = 0
+        self._health = None
+        self._audits = None
+
+        self.identity_filter = ft.TextField(label="Identity", width=160, dense=True, on_change=self._on_filter)
+        self.version_filter = ft.TextField(label="Version", width=110, dense=True, on_change=self._on_filter)
+        self.sort_dropdown = ft.Dropdown(
+            label="Sort by",
+            width=150,
+            dense=True,
+            value="identity",
+            options=[ft.dropdown.Option(field, header) for field, header, _ in self.COLUMNS],
+            on_change=self._on_filter,
+        )
+        self.descending_btn = ft.IconButton(icon=ft.Icons.ARROW_UPWARD, tooltip="Toggle sort direction", on_click=self._toggle_direction)
+        self.count_text = ft.Text("0 devices", size=12)
+
+        header = ft.Row(
+            [ft.Container(ft.Text(title, weight=ft.FontWeight.BOLD, size=12), width=width, on_click=self._sort_handler(field))
+             for field, title, width in self.COLUMNS],
+            spacing=4,
+        )
+
+        self._top_spacer = ft.Container(height=0)
+        self._bottom_spacer = ft.Container(height=0)
+        self._rows = [self._make_row() for _ in range(self.WINDOW)]
+        self.list_view = ft.ListView(
+            controls=[self._top_spacer] + self._rows + [self._bottom_spacer],
+            expand=True,
+            on_scroll=self._on_scroll,
+            on_scroll_interval=50,
+        )
+
+        self.controls = [
+            ft.Row([self.identity_filter, self.version_filter, self.sort_dropdown, self.descending_btn, self.count_text]),
+            header,
+            ft.Divider(height=1),
+            self.list_view,
+        ]
+
+    # --- Data ---
+    def refresh(self, neighbors, health=None, audits=None, generation=None):
+        """
+        Re-indexes the table if the neighbors, health or audit results changed.
+
+        Args:
+            neighbors: MNDP_Scanner.get_neighbors() output.
+            health: {ip: 'up'|'down'} map.
+            audits: {ip: summary} of the last audit per device.
+            generation: MNDP_Scanner.generation; unchanged generations skip the rebuild.
+        """
+        if not self.index.is_stale(generation) and health == self._health and audits == self._audits:
+            return
+        self._health = dict(health or {})
+        self._audits = dict(audits or {})
+        self.index.rebuild(neighbors, self._health, self._audits, generation)
+        self._apply_query()
+
+    def _apply_query(self):
+        self._positions = self.index.query(
+            identity=self.identity_filter.value or None,
+            version=self.version_filter.value or None,
+            sort=self.sort_dropdown.value or "identity",
+            descending=self.descending_btn.icon == ft.Icons.ARROW_DOWNWARD,
+        )
+        self.count_text.value = f"{len(self._positions)} of {len(self.index.rows)} devices"
+        self._first = 0
+        self._render()
+
+    # --- Rendering ---
+    def _make_row(self):
+        cells = [ft.Container(ft.Text("", size=12, no_wrap=True), width=width) for _, _, width in self.COLUMNS]
+        return ft.Container(ft.Row(cells, spacing=4), height=self.ROW_HEIGHT, visible=False, on_click=self._on_row_click)
+
+    def _fill_row(self, row, record):
+        cells = row.content.controls
+        for cell, (field, _, _) in zip(cells, self.COLUMNS):
+            value = record[field]
+            if field == "uptime":
+                value = format_uptime(value)
+            cell.content.value = str(value)
+        cells[6].content.color = self.HEALTH_COLORS.get(record["health"])
+        row.data = record["ip"]
+        row.visible = True
+
+    def _render(self):
+        records = self.index.window(self._positions, self._first, self.WINDOW)
+        for row, record in zip(self._rows, records):
+            self._fill_row(row, record)
+        for row in self._rows[len(records):]:
+            row.visible = False
+        self._top_spacer.height = self._first * self.ROW_HEIGHT
+        self._bottom_spacer.height = max(len(self._positions) - self._first - len(records), 0) * self.ROW_HEIGHT
+        if self.page:
+            self.update()
+
+    def _on_scroll(self, e):
+        first_visible = int((e.pixels or 0) // self.ROW_HEIGHT)
+        first = max(0, min(first_visible - self.OVERSCAN, len(self._positions) - self.WINDOW))
+        # Only re-window once the viewport drifts far enough to approach the edge
+        if abs(first - self._first) >= self.OVERSCAN // 2:
+            self._first = first
+            self._render()
+
+    # --- Handlers ---
+    def _on_filter(self, e):
+        self._apply_query()
+
+    def _toggle_direction(self, e):
+        descending = self.descending_btn.icon == ft.Icons.ARROW_UPWARD
+        self.descending_btn.icon = ft.Icons.ARROW_DOWNWARD if descending else ft.Icons.ARROW_UPWARD
+        self._apply_query()
+
+    def _sort_handler(self, field):
+        def handler(e):
+            self.sort_dropdown.value = field
+            self._apply_query()
+        return handler
+
+    def _on_row_click(self, e):
+        if self.on_select and e.control.data:
+            self.on_select(e.control.data)
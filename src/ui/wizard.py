@@ -1,22 +1,31 @@
 import flet as ft
+import asyncio
 import secrets
 import string
 import threading
-import os
-from logic.generator import ConfigGenerator
-from logic.deployer import Deployer
+import time
+from logic.journal import DeploymentJournal
+from logic.config_form import ConfigForm
 
 class Wizard(ft.Column):
-    def __init__(self, on_complete=None):
+    def __init__(self, on_complete=None, health=None, journal=None):
         super().__init__()
         self.expand = True
         self.on_complete = on_complete
+        self.health = health # Optional HealthSweeper for fail-fast deploys
         self.current_step = 0
         self.config_data = {}
+
+        # Form state lives in a plain model; controls only write through to it
+        self.form = ConfigForm(admin_pass=self._generate_password())
+        self._bindings = {} # form field -> control
         
         # --- Deployment State ---
         self.deploy_status = ft.Text("")
         self.deploy_progress = ft.ProgressBar(visible=False)
+        self._deploy_loop = None
+        self._deploy_task = None
+        self._journal = journal # Shared DeploymentJournal; opened on first deploy if not given
 
         # --- Form Fields ---
         self.scenario_dropdown = ft.Dropdown(
@@ -26,7 +35,6 @@ class Wizard(ft.Column):
                 ft.dropdown.Option("branch", "Scenario A: Secure Branch Office"),
                 ft.dropdown.Option("wisp", "Scenario B: WISP Tower"),
             ],
-            value="simple",
             on_change=self._on_scenario_change
         )
 
@@ -34,11 +42,13 @@ class Wizard(ft.Column):
         self.wan2_interface = ft.TextField(label="WAN2 Interface (LTE)", visible=False)
         self.vlan_ids = ft.TextField(label="VLAN IDs (comma separated)", visible=False)
         self.hq_wg_pubkey = ft.TextField(label="HQ WireGuard Public Key", visible=False)
+        self.site_id = ft.TextField(label="Site ID (keeps VLAN subnets unique across sites)", visible=False)
 
         self.mgmt_ip = ft.TextField(label="Management IP (Allowed Input)", visible=False)
-        self.ospf_area = ft.TextField(label="OSPF Area ID", value="0.0.0.0", visible=False)
+        self.ospf_area = ft.TextField(label="OSPF Area ID", visible=False)
 
         # Basic Tab Fields
+        self.model_field = ft.TextField(label="Router Model (board name, e.g. RB5009UG+S+)")
         self.role_dropdown = ft.Dropdown(
             label="Router Role",
             options=[
@@ -46,7 +56,6 @@ class Wizard(ft.Column):
                 ft.dropdown.Option("Small Office"),
                 ft.dropdown.Option("Branch Gateway"),
             ],
-            value="Home Router"
         )
         
         self.wan_type_dropdown = ft.Dropdown(
@@ -56,28 +65,26 @@ class Wizard(ft.Column):
                 ft.dropdown.Option("static", "Static IP"),
                 ft.dropdown.Option("pppoe", "PPPoE"),
             ],
-            value="dhcp",
             on_change=self._on_wan_change
         )
         
         # WAN Details (conditionally shown)
         self.wan_ip = ft.TextField(label="WAN IP Address", visible=False)
-        self.wan_subnet = ft.TextField(label="Subnet Mask (CIDR)", value="24", visible=False)
+        self.wan_subnet = ft.TextField(label="Subnet Mask (CIDR)", visible=False)
         self.wan_gateway = ft.TextField(label="Gateway", visible=False)
         self.pppoe_user = ft.TextField(label="PPPoE Username", visible=False)
         self.pppoe_pass = ft.TextField(label="PPPoE Password", password=True, visible=False)
 
-        self.lan_ip = ft.TextField(label="LAN IP Address", value="192.168.88.1")
+        self.lan_ip = ft.TextField(label="LAN IP Address")
         self.wifi_ssid = ft.TextField(label="WiFi SSID")
         self.wifi_pass = ft.TextField(label="WiFi Password", password=True, can_reveal_password=True)
-        self.admin_pass = ft.TextField(label="New Admin Password", password=True, can_reveal_password=True, 
-                                       value=self._generate_password())
+        self.admin_pass = ft.TextField(label="New Admin Password", password=True, can_reveal_password=True)
         self.vpn_chk = ft.Checkbox(label="Enable Remote Work VPN (WireGuard)")
 
         # Routing Tab Fields
         self.ospf_chk = ft.Checkbox(label="Enable OSPFv3 (Area 0.0.0.0)")
         self.bgp_chk = ft.Checkbox(label="Enable BGP Peering")
-        self.bgp_asn = ft.TextField(label="BGP ASN", value="65000")
+        self.bgp_asn = ft.TextField(label="BGP ASN")
 
         # Services Tab Fields
         self.container_chk = ft.Checkbox(label="Install Container Support")
@@ -92,135 +99,215 @@ class Wizard(ft.Column):
                 ft.dropdown.Option("simple", "Simple Queues"),
                 ft.dropdown.Option("cake", "CAKE / FQ_Codel"),
             ],
-            value="none"
         )
         self.voip_chk = ft.Checkbox(label="Prioritize VoIP Traffic (SIP/RTP)")
+
+        for field, control in (
+            ("scenario_mode", self.scenario_dropdown),
+            ("model", self.model_field),
+            ("wan2_interface", self.wan2_interface),
+            ("vlan_ids", self.vlan_ids),
+            ("hq_wg_pubkey", self.hq_wg_pubkey),
+            ("site_id", self.site_id),
+            ("mgmt_ip", self.mgmt_ip),
+            ("ospf_area", self.ospf_area),
+            ("role", self.role_dropdown),
+            ("wan_type", self.wan_type_dropdown),
+            ("wan_ip", self.wan_ip),
+            ("wan_subnet", self.wan_subnet),
+            ("wan_gateway", self.wan_gateway),
+            ("pppoe_user", self.pppoe_user),
+            ("pppoe_pass", self.pppoe_pass),
+            ("lan_ip", self.lan_ip),
+            ("wifi_ssid", self.wifi_ssid),
+            ("wifi_pass", self.wifi_pass),
+            ("admin_pass", self.admin_pass),
+            ("vpn_enabled", self.vpn_chk),
+            ("ospf_enabled", self.ospf_chk),
+            ("bgp_enabled", self.bgp_chk),
+            ("bgp_asn", self.bgp_asn),
+            ("container_enabled", self.container_chk),
+            ("adblock_enabled", self.adblock_chk),
+            ("hotspot_enabled", self.hotspot_chk),
+            ("qos_type", self.qos_dropdown),
+            ("voip_enabled", self.voip_chk),
+        ):
+            self._bind(field, control)
+
+        # Both steps are built once; switching steps only swaps self.controls
+        self.form_error = ft.Text("", color="red", visible=False)
+        self._config_controls = self._build_config_step()
+        self._review_controls = self._build_review_step()
+        self._apply_visibility()
         self.update_step_view()
 
+    def _bind(self, field, control):
+        """Shows the form value in `control` and writes user edits back to the form."""
+        self._bindings[field] = control
+        control.value = getattr(self.form, field)
+        handler = control.on_change
+
+        def on_change(e):
+            self.form.set(field, control.value)
+            if handler:
+                handler(e)
+
+        control.on_change = on_change
+
+    def set_model(self, board):
+        """Prefills the router model, e.g. from the board of the device picked in the inventory."""
+        self.form.set("model", board)
+        self.model_field.value = self.form.model
+        self._push([self.model_field])
+
     def _generate_password(self, length=12):
         alphabet = string.ascii_letters + string.digits
         return ''.join(secrets.choice(alphabet) for i in range(length))
 
+    def _apply_visibility(self):
+        """Shows the fields that belong to the current WAN type and scenario. Returns the changed controls."""
+        wanted = {
+            self.wan_ip: self.form.wan_type == "static",
+            self.wan_subnet: self.form.wan_type == "static",
+            self.wan_gateway: self.form.wan_type == "static",
+            self.pppoe_user: self.form.wan_type == "pppoe",
+            self.pppoe_pass: self.form.wan_type == "pppoe",
+            self.wan2_interface: self.form.scenario_mode == "branch",
+            self.vlan_ids: self.form.scenario_mode == "branch",
+            self.hq_wg_pubkey: self.form.scenario_mode == "branch",
+            self.site_id: self.form.scenario_mode == "branch",
+            self.mgmt_ip: self.form.scenario_mode == "wisp",
+            self.ospf_area: self.form.scenario_mode == "wisp",
+        }
+        changed = []
+        for control, visible in wanted.items():
+            if control.visible != visible:
+                control.visible = visible
+                changed.append(control)
+        return changed
+
+    def _push(self, controls):
+        # Send only the controls that changed (not the whole wizard tree)
+        if self.page:
+            for control in controls:
+                control.update()
+
     def _on_wan_change(self, e):
-        val = self.wan_type_dropdown.value
-        self.wan_ip.visible = (val == "static")
-        self.wan_subnet.visible = (val == "static")
-        self.wan_gateway.visible = (val == "static")
-        self.pppoe_user.visible = (val == "pppoe")
-        self.pppoe_pass.visible = (val == "pppoe")
-        self.update()
+        self._push(self._apply_visibility())
 
     def _on_scenario_change(self, e):
-        val = self.scenario_dropdown.value
-        # Reset visibility
-        self.wan2_interface.visible = (val == "branch")
-        self.vlan_ids.visible = (val == "branch")
-        self.hq_wg_pubkey.visible = (val == "branch")
+        self._push(self._apply_visibility())
 
-        self.mgmt_ip.visible = (val == "wisp")
-        self.ospf_area.visible = (val == "wisp")
+    def _build_config_step(self):
+        # Basic Content
+        basic_content = ft.Column([
+            self.model_field,
+            self.role_dropdown,
+            self.wan_type_dropdown,
+            self.wan_ip, self.wan_subnet, self.wan_gateway,
+            self.pppoe_user, self.pppoe_pass,
+            self.lan_ip,
+            self.wifi_ssid,
+            self.wifi_pass,
+            self.admin_pass,
+            self.vpn_chk
+        ], scroll=ft.ScrollMode.AUTO)
 
-        self.update_step_view()
+        # Scenario Content
+        scenario_content = ft.Column([
+            self.wan2_interface,
+            self.vlan_ids,
+            self.hq_wg_pubkey,
+            self.site_id,
+            self.mgmt_ip,
+            self.ospf_area
+        ])
 
-    def update_step_view(self):
-        self.controls.clear()
-        
-        if self.current_step == 0:
-            # Use Tabs for Step 0 (Configuration)
-            
-            # Basic Content
-            basic_content = ft.Column([
-                self.role_dropdown,
-                self.wan_type_dropdown,
-                self.wan_ip, self.wan_subnet, self.wan_gateway,
-                self.pppoe_user, self.pppoe_pass,
-                self.lan_ip,
-                self.wifi_ssid,
-                self.wifi_pass,
-                self.admin_pass,
-                self.vpn_chk
-            ], scroll=ft.ScrollMode.AUTO)
-
-            # Scenario Content
-            scenario_content = ft.Column([
-                self.wan2_interface,
-                self.vlan_ids,
-                self.hq_wg_pubkey,
-                self.mgmt_ip,
-                self.ospf_area
-            ])
+        # Routing Content
+        routing_content = ft.Column([
+            self.ospf_chk,
+            self.bgp_chk,
+            self.bgp_asn
+        ])
 
-            # Routing Content
-            routing_content = ft.Column([
-                self.ospf_chk,
-                self.bgp_chk,
-                self.bgp_asn
-            ])
+        # Services Content
+        services_content = ft.Column([
+            self.container_chk,
+            self.adblock_chk,
+            self.hotspot_chk
+        ])
 
-            # Services Content
-            services_content = ft.Column([
-                self.container_chk,
-                self.adblock_chk,
-                self.hotspot_chk
-            ])
+        # QoS Content
+        qos_content = ft.Column([
+            self.qos_dropdown,
+            self.voip_chk
+        ])
 
-            # QoS Content
-            qos_content = ft.Column([
-                self.qos_dropdown,
-                self.voip_chk
-            ])
+        self.tabs = ft.Tabs(
+            selected_index=0,
+            animation_duration=300,
+            tabs=[
+                ft.Tab(text="Basic", content=ft.Container(content=basic_content, padding=10)),
+                ft.Tab(text="Scenario", content=ft.Container(content=scenario_content, padding=10)),
+                ft.Tab(text="Routing", content=ft.Container(content=routing_content, padding=10)),
+                ft.Tab(text="Services", content=ft.Container(content=services_content, padding=10)),
+                ft.Tab(text="QoS", content=ft.Container(content=qos_content, padding=10)),
+            ],
+            expand=1,
+        )
 
-            tabs = ft.Tabs(
-                selected_index=0,
-                animation_duration=300,
-                tabs=[
-                    ft.Tab(text="Basic", content=ft.Container(content=basic_content, padding=10)),
-                    ft.Tab(text="Scenario", content=ft.Container(content=scenario_content, padding=10)),
-                    ft.Tab(text="Routing", content=ft.Container(content=routing_content, padding=10)),
-                    ft.Tab(text="Services", content=ft.Container(content=services_content, padding=10)),
-                    ft.Tab(text="QoS", content=ft.Container(content=qos_content, padding=10)),
-                ],
-                expand=1,
-            )
+        return [
+            ft.Text("Titan Configuration Wizard", size=24, weight=ft.FontWeight.BOLD),
+            self.scenario_dropdown,
+            ft.Container(content=self.tabs, height=400), # Fixed height for tabs area
+            ft.Divider(),
+            self.form_error,
+            ft.Row([
+                ft.ElevatedButton("Generate Config", on_click=self.finish_wizard)
+            ], alignment=ft.MainAxisAlignment.END)
+        ]
 
-            self.controls.extend([
-                ft.Text("Titan Configuration Wizard", size=24, weight=ft.FontWeight.BOLD),
-                self.scenario_dropdown,
-                ft.Container(content=tabs, height=400), # Fixed height for tabs area
-                ft.Divider(),
-                ft.Row([
-                    ft.ElevatedButton("Generate Config", on_click=self.finish_wizard)
-                ], alignment=ft.MainAxisAlignment.END)
-            ])
-            
-        elif self.current_step == 3:
-            # Final Step: Review
-            script_preview = ft.TextField(
-                value=self.config_data.get("script", ""),
-                multiline=True,
-                min_lines=10,
-                max_lines=20,
-                read_only=True,
-                text_style=ft.TextStyle(font_family="monospace")
-            )
-            
-            self.deploy_btn = ft.ElevatedButton(
-                "Deploy Configuration", 
-                icon=ft.Icons.ROCKET_LAUNCH,
-                on_click=self.deploy_handler
-            )
-            
-            self.controls.extend([
-                ft.Text("Configuration Ready!", size=20, weight=ft.FontWeight.BOLD),
-                ft.Text("Review the generated script below:"),
-                script_preview,
-                self.deploy_status,
-                self.deploy_progress,
-                ft.Row([
-                     ft.ElevatedButton("Edit Settings", on_click=lambda e: self.goto_step(0)),
-                     self.deploy_btn
-                ])
+    def _build_review_step(self):
+        # Final Step: Review
+        self.script_preview = ft.TextField(
+            multiline=True,
+            min_lines=10,
+            max_lines=20,
+            read_only=True,
+            text_style=ft.TextStyle(font_family="monospace")
+        )
+        
+        self.deploy_btn = ft.ElevatedButton(
+            "Deploy Configuration", 
+            icon=ft.Icons.ROCKET_LAUNCH,
+            on_click=self.deploy_handler
+        )
+        self.cancel_btn = ft.TextButton(
+            "Cancel Deployment",
+            icon=ft.Icons.CANCEL,
+            visible=False,
+            on_click=self.cancel_deploy_handler
+        )
+        
+        return [
+            ft.Text("Configuration Ready!", size=20, weight=ft.FontWeight.BOLD),
+            ft.Text("Review the generated script below:"),
+            self.script_preview,
+            self.deploy_status,
+            self.deploy_progress,
+            ft.Row([
+                 ft.ElevatedButton("Edit Settings", on_click=lambda e: self.goto_step(0)),
+                 self.deploy_btn,
+                 self.cancel_btn
             ])
+        ]
+
+    def update_step_view(self):
+        if self.current_step == 3:
+            self.script_preview.value = self.config_data.get("script", "")
+            self.controls = self._review_controls
+        else:
+            self.controls = self._config_controls
             
         if self.page:
             self.update()
@@ -237,145 +324,172 @@ class Wizard(ft.Column):
         self.current_step -= 1
         self.update_step_view()
 
+    def _show_errors(self, errors):
+        """Marks invalid fields in place and summarises them above the button row."""
+        changed = [self.form_error]
+        for field, control in self._bindings.items():
+            message = errors.get(field)
+            if hasattr(control, "error_text") and control.error_text != message:
+                control.error_text = message
+                changed.append(control)
+        self.form_error.value = "Please fix: " + ", ".join(sorted(errors)) if errors else ""
+        self.form_error.visible = bool(errors)
+        self._push(changed)
+
     def finish_wizard(self, e):
-        # Collect Data
-        context = {
-            "role": self.role_dropdown.value,
-            "wan_type": self.wan_type_dropdown.value,
-            "wan_ip": self.wan_ip.value,
-            "wan_subnet": self.wan_subnet.value,
-            "wan_gateway": self.wan_gateway.value,
-            "pppoe_user": self.pppoe_user.value,
-            "pppoe_pass": self.pppoe_pass.value,
-            "lan_ip": self.lan_ip.value,
-            "wifi_ssid": self.wifi_ssid.value,
-            "wifi_pass": self.wifi_pass.value,
-            # Basic
-            "vpn_enabled": self.vpn_chk.value,
-            "admin_user": "titan_admin",
-            "admin_pass": self.admin_pass.value,
-            # Routing
-            "ospf_enabled": self.ospf_chk.value,
-            "bgp_enabled": self.bgp_chk.value,
-            "bgp_asn": self.bgp_asn.value,
-            # Services
-            "container_enabled": self.container_chk.value,
-            "adblock_enabled": self.adblock_chk.value,
-            "hotspot_enabled": self.hotspot_chk.value,
-            # QoS
-            "qos_type": self.qos_dropdown.value,
-            "voip_enabled": self.voip_chk.value,
-            
-            # Scenario Data
-            "scenario_mode": self.scenario_dropdown.value,
-            "wan2_interface": self.wan2_interface.value,
-            "vlan_ids": [v.strip() for v in self.vlan_ids.value.split(',')] if self.vlan_ids.value else [],
-            "hq_wg_pubkey": self.hq_wg_pubkey.value,
-            "mgmt_ip": self.mgmt_ip.value,
-            "ospf_area": self.ospf_area.value,
-            "wan1_gateway": self.wan_gateway.value, # Reusing wan_gateway for scenario
-            "wan1_ip": self.wan_ip.value, # Mapping for Scenario Branch
-
-            "dns_redirect": True, # Default to true for hardening
-            
-            # WireGuard Defaults for generation (would be dynamic in real app)
-            "wg_peer_public_key": "ReplaceWithClientPubKey",
-            "wg_peer_allowed_ips": "10.0.100.2/32",
-            "wg_interface_ip": "10.0.100.1/24"
-        }
+        errors = self.form.validate()
+        self._show_errors(errors)
+        if errors:
+            return
+        context = self.form.to_context()
         
-        # Generate Script
-        generator = ConfigGenerator()
+        # Generate Script (Jinja2 is loaded on first use)
+        from logic.generator import ConfigGenerator
+        from logic.ipam import IPAM, DEFAULT_IPAM_PATH
+        generator = ConfigGenerator(ipam=IPAM(DEFAULT_IPAM_PATH))
         try:
             script = generator.generate(context)
             self.config_data["script"] = script
+            self.config_data["context"] = context
             self.current_step = 3
             self.update_step_view()
             if self.on_complete:
                 self.on_complete(script)
         except Exception as ex:
-            self.controls.append(ft.Text(f"Error: {ex}", color="red"))
-            self.update()
+            self.form_error.value = f"Error: {ex}"
+            self.form_error.visible = True
+            self._push([self.form_error])
+
+    # Max UI refresh rate while deploying; phase changes always render immediately.
+    DEPLOY_RENDER_INTERVAL = 0.3
 
     def deploy_handler(self, e):
-        """Handles the deployment in a background thread."""
+        """Handles the deployment on a private asyncio loop in a background thread."""
         self.deploy_progress.visible = True
+        self.deploy_progress.value = None
         self.deploy_btn.disabled = True
+        self.cancel_btn.visible = True
         self.deploy_status.value = "Starting Deployment..."
         self.update()
         
-        # Save script to a temporary file for upload
-        script_path = os.path.join(os.getcwd(), "setup.rsc")
-        with open(script_path, "w") as f:
-            f.write(self.config_data.get("script", ""))
-
-        # Thread wrapper
-        def run_deploy():
-            deployer = Deployer()
-            
-            # Callback to update UI from thread
-            def update_status(msg):
-                self.deploy_status.value = msg
-                self.update()
-
-            # For Wizard, we assume we are connecting to the default IP (192.168.88.1) 
-            # or the current management IP. In a real app, this would be passed in.
-            # Here we hardcode the 'current' connection details for the context of the task.
-            current_ip = "192.168.88.1" 
-            current_user = "admin"
-            current_pass = "" # Default password is empty
-            
-            target_lan_ip = self.lan_ip.value
-            
-            # Check if heavy payload (Container enabled)
-            heavy = self.container_chk.value
-            
-            success = deployer.deploy_configuration(
+        # Script is uploaded straight from memory (no setup.rsc on local disk)
+        script = self.config_data.get("script", "")
+
+        # For Wizard, we assume we are connecting to the default IP (192.168.88.1) 
+        # or the current management IP. In a real app, this would be passed in.
+        # Here we hardcode the 'current' connection details for the context of the task.
+        current_ip = "192.168.88.1" 
+        current_user = "admin"
+        current_pass = "" # Default password is empty
+        
+        target_lan_ip = self.form.lan_ip
+        
+        # Check if heavy payload (Container enabled)
+        heavy = self.form.container_enabled
+
+        # The generated config disables 'admin'; confirm (and disarm rollback) as the new admin
+        context = self.config_data.get("context", {})
+        confirm_user = context.get("admin_user")
+        confirm_pass = context.get("admin_pass")
+
+        async def run_deploy():
+            self._deploy_task = asyncio.current_task()
+            if self._journal is None:
+                self._journal = DeploymentJournal()
+            from logic.deployer import Deployer # paramiko is loaded on first deploy
+            deployer = Deployer(journal=self._journal, health=self.health)
+            last_phase = None
+            last_render = 0.0
+            async for event in deployer.deploy_configuration_async(
                 ip=current_ip,
                 user=current_user,
                 password=current_pass,
-                local_rsc_path=script_path,
+                script=script,
                 target_lan_ip=target_lan_ip,
-                status_callback=update_status,
-                heavy_payload=heavy
-            )
-            
-            self.deploy_progress.visible = False
-            self.deploy_btn.disabled = False
-            
-            if success:
-                def close_dlg(e):
-                    self.page.dialog.open = False
-                    self.page.update()
-                    
-                # Check for Container Warning
-                msg = f"Configuration successfully applied!\n\nRouter is now accessible at {target_lan_ip}."
+                heavy_payload=heavy,
+                confirm_user=confirm_user,
+                confirm_password=confirm_pass
+            ):
+                print(event.message)
+                now = time.monotonic()
+                if event.phase == last_phase and now - last_render < self.DEPLOY_RENDER_INTERVAL:
+                    continue
+                last_phase = event.phase
+                last_render = now
+                self._render_deploy_event(event)
+            return last_phase == "done"
+
+        def run_thread():
+            self._deploy_loop = asyncio.new_event_loop()
+            try:
+                success = self._deploy_loop.run_until_complete(run_deploy())
+                cancelled = False
+            except asyncio.CancelledError:
+                success = False
+                cancelled = True
+            finally:
+                self._deploy_loop.close()
+                self._deploy_loop = None
+                self._deploy_task = None
+            self._finish_deploy(success, cancelled, target_lan_ip, heavy)
+
+        threading.Thread(target=run_thread, daemon=True).start()
+
+    def cancel_deploy_handler(self, e):
+        """Cancels the running deployment task from the UI thread."""
+        loop, task = self._deploy_loop, self._deploy_task
+        if loop and task:
+            self.deploy_status.value = "Cancelling..."
+            self.deploy_status.update()
+            loop.call_soon_threadsafe(task.cancel)
+
+    def _render_deploy_event(self, event):
+        """Pushes a single (throttled) progress event to the UI."""
+        status = event.message
+        if event.eta is not None:
+            status += f" (ETA {event.eta:.0f}s)"
+        self.deploy_status.value = status
+        if event.phase == "upload" and event.bytes_total:
+            self.deploy_progress.value = event.bytes_sent / event.bytes_total
+        else:
+            self.deploy_progress.value = None # Indeterminate
+        self.deploy_status.update()
+        self.deploy_progress.update()
+
+    def _finish_deploy(self, success, cancelled, target_lan_ip, heavy):
+        self.deploy_progress.visible = False
+        self.deploy_btn.disabled = False
+        self.cancel_btn.visible = False
+
+        if success:
+            def close_dlg(e):
+                self.page.dialog.open = False
+                self.page.update()
                 
-                if heavy: # Heavy means containers enabled
-                    msg += "\n\n⚠️ ACTION REQUIRED: Container Mode\n" \
-                           "1. Power off router.\n" \
-                           "2. Hold Reset button.\n" \
-                           "3. Power on.\n" \
-                           "4. Release after 5 minutes (or when prompted)."
-
-                dlg = ft.AlertDialog(
-                    title=ft.Text("Deployment Success"),
-                    content=ft.Text(msg),
-                    actions=[
-                        ft.TextButton("OK", on_click=close_dlg),
-                    ],
-                    on_dismiss=close_dlg,
-                )
-                self.page.dialog = dlg
-                dlg.open = True
-                update_status("Deployment Complete.")
-            else:
-                update_status("Deployment Failed. Check logs.")
+            # Check for Container Warning
+            msg = f"Configuration successfully applied!\n\nRouter is now accessible at {target_lan_ip}."
             
-            self.page.update()
-            
-            # Clean up temp file
-            if os.path.exists(script_path):
-                os.remove(script_path)
+            if heavy: # Heavy means containers enabled
+                msg += "\n\n⚠️ ACTION REQUIRED: Container Mode\n" \
+                       "1. Power off router.\n" \
+                       "2. Hold Reset button.\n" \
+                       "3. Power on.\n" \
+                       "4. Release after 5 minutes (or when prompted)."
 
-        threading.Thread(target=run_deploy, daemon=True).start()
+            dlg = ft.AlertDialog(
+                title=ft.Text("Deployment Success"),
+                content=ft.Text(msg),
+                actions=[
+                    ft.TextButton("OK", on_click=close_dlg),
+                ],
+                on_dismiss=close_dlg,
+            )
+            self.page.dialog = dlg
+            dlg.open = True
+            self.deploy_status.value = "Deployment Complete."
+        elif cancelled:
+            self.deploy_status.value = "Deployment Cancelled."
+        else:
+            self.deploy_status.value = "Deployment Failed. Check logs."
+        
+        self.page.update()
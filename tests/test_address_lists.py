@@ -0,0 +1,136 @@
+import sys
+import os
+import random
+import ipaddress
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.address_lists import AddressListCompiler, BOGONS_V4, aggregate, parse_feed
+from logic.generator import ConfigGenerator
+
+
+def covered(cidrs):
+    """Set of integer addresses covered by a list of CIDRs (small test inputs only)."""
+    addresses = set()
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr)
+        addresses.update(range(int(network.network_address), int(network.broadcast_address) + 1))
+    return addresses
+
+
+class TestAggregate(unittest.TestCase):
+    def test_merges_adjacent_and_overlapping(self):
+        self.assertEqual(aggregate(["10.0.0.0/25", "10.0.0.128/25"]), ["10.0.0.0/24"])
+        self.assertEqual(aggregate(["10.0.0.0/8", "10.1.2.0/24", "10.1.2.3"]), ["10.0.0.0/8"])
+        self.assertEqual(aggregate(["192.168.1.1", "192.168.1.0"]), ["192.168.1.0/31"])
+
+    def test_ranges(self):
+        self.assertEqual(aggregate(["10.0.0.0-10.0.1.255"]), ["10.0.0.0/23"])
+        self.assertEqual(aggregate(["10.0.0.1-10.0.0.6"]), ["10.0.0.1/32", "10.0.0.2/31", "10.0.0.4/31", "10.0.0.6/32"])
+        with self.assertRaises(ValueError):
+            aggregate(["10.0.0.9-10.0.0.1"])
+        with self.assertRaises(ValueError):
+            aggregate(["not-an-ip"])
+
+    def test_ipv6_sorted_after_ipv4(self):
+        self.assertEqual(
+            aggregate(["2001:db8::/33", "2001:db8:8000::/33", "0.0.0.0/0"]),
+            ["0.0.0.0/0", "2001:db8::/32"],
+        )
+
+    def test_minimal_and_exact(self):
+        # Same address set, no overlaps, and no two results could merge into one
+        rng = random.Random(42)
+        for _ in range(50):
+            entries = []
+            for _ in range(rng.randint(1, 20)):
+                base = rng.randrange(0, 4096) + (10 << 24)
+                if rng.random() < 0.5:
+                    entries.append(f"{ipaddress.IPv4Address(base)}/{rng.randint(26, 32)}")
+                else:
+                    end = base + rng.randrange(0, 300)
+                    entries.append(f"{ipaddress.IPv4Address(base)}-{ipaddress.IPv4Address(end)}")
+            result = aggregate(entries)
+
+            expected = set()
+            for entry in entries:
+                if '-' in entry:
+                    first, last = entry.split('-')
+                    expected.update(range(int(ipaddress.IPv4Address(first)), int(ipaddress.IPv4Address(last)) + 1))
+                else:
+                    expected.update(covered([str(ipaddress.ip_network(entry, strict=False))]))
+            self.assertEqual(covered(result), expected)
+            self.assertEqual(sum(ipaddress.ip_network(c).num_addresses for c in result), len(expected))
+            collapsed = list(ipaddress.collapse_addresses(ipaddress.ip_network(c) for c in result))
+            self.assertEqual(len(collapsed), len(result))
+
+    def test_parse_feed(self):
+        feed = "; Spamhaus DROP\n1.10.16.0/20 ; SBL256894\n\n# comment\n2.56.192.0/22 ; SBL459831\n"
+        self.assertEqual(parse_feed(feed), ["1.10.16.0/20", "2.56.192.0/22"])
+
+
+class TestAddressListCompiler(unittest.TestCase):
+    def test_split_by_family_and_chunked(self):
+        entries = [f"10.0.{i}.0/24" for i in range(0, 256, 2)] + ["2001:db8::/32"]
+        compiled = AddressListCompiler(chunk_size=50).compile({"customers": entries})
+        self.assertEqual([(c["name"], c["family"]) for c in compiled], [("customers", "ip"), ("customers", "ipv6")])
+        v4 = compiled[0]
+        self.assertEqual(len(v4["entries"]), 128)
+        self.assertEqual([len(chunk) for chunk in v4["chunks"]], [50, 50, 28])
+        self.assertEqual(v4["source_count"], 129)
+
+    def test_rejects_bad_name(self):
+        with self.assertRaises(ValueError):
+            AddressListCompiler().compile({"bad name": ["10.0.0.1"]})
+
+
+class TestAddressListTemplates(unittest.TestCase):
+    def setUp(self):
+        self.generator = ConfigGenerator()
+
+    def test_survival_emits_bogons(self):
+        script = self.generator.generate({
+            "scenario_mode": "survival",
+            "bogon_feed": "; DROP\n1.10.16.0/20 ; SBL1\n",
+        })
+        self.assertIn('/ip firewall address-list remove [find list="bad_ipv4" dynamic=no]', script)
+        self.assertIn('"1.10.16.0/20"', script)
+        # 224.0.0.0/4 + 240.0.0.0/4 aggregate into one entry
+        self.assertIn('"224.0.0.0/3"', script)
+        self.assertNotIn('"240.0.0.0/4"', script)
+        self.assertIn("in-interface=ether1 src-address-list=bad_ipv4", script)
+        self.assertEqual(len(aggregate(BOGONS_V4)), len(BOGONS_V4) - 1)
+
+    def test_private_bogons_only_on_public_wan(self):
+        def bogons(**context):
+            script = self.generator.generate(dict(context, scenario_mode="survival"))
+            return [net for net in ('"10.0.0.0/8"', '"100.64.0.0/10"', '"192.168.0.0/16"') if net in script]
+
+        everything = ['"10.0.0.0/8"', '"100.64.0.0/10"', '"192.168.0.0/16"']
+        self.assertEqual(bogons(), []) # Opt-in
+        self.assertEqual(bogons(bogon_private=True), everything)
+        self.assertEqual(bogons(bogon_private=True, wan_type="static", wan_ip="198.51.100.10"), everything)
+        # Behind a modem or carrier NAT the upstream itself is private space
+        self.assertEqual(bogons(bogon_private=True, wan_type="dhcp"), [])
+        self.assertEqual(bogons(bogon_private=True, wan_type="static", wan_ip="100.72.1.2"), [])
+        self.assertEqual(bogons(bogon_private=True, wan_type="static", wan_ip="192.168.1.2"), [])
+
+    def test_management_networks_aggregated(self):
+        script = self.generator.generate({
+            "admin_user": "admin", "admin_pass": "pass", "lan_ip": "192.168.88.1",
+            "management_networks": ["192.168.88.0/25", "192.168.88.128/25", "10.9.0.5"],
+            "address_lists": {"vip": ["203.0.113.0/25", "203.0.113.128/25"]},
+        })
+        self.assertIn("/ip service set winbox address=10.9.0.5/32,192.168.88.0/24", script)
+        self.assertIn('/ip firewall address-list add list=vip address=$a', script)
+        self.assertIn('"203.0.113.0/24"', script)
+
+    def test_default_management_networks(self):
+        script = self.generator.generate({"admin_user": "admin", "admin_pass": "pass", "lan_ip": "192.168.88.1"})
+        self.assertIn("/ip service set ssh address=10.0.0.0/8,172.16.0.0/12,192.168.0.0/16", script)
+        self.assertNotIn("firewall address-list remove", script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from server.api_server import ApiServer
+
+
+class TestApiServer(unittest.TestCase):
+    def setUp(self):
+        self.scanner = MagicMock()
+        self.scanner.generation = 3
+        self.scanner.running = False
+        self.scanner.get_neighbors.return_value = [{"mac": "aa", "ip": "10.0.0.1", "identity": "R1"}]
+        self.scanner.get_progress.return_value = {"running": True, "neighbors": 1}
+        self.health = MagicMock()
+        self.health.get_health_map.return_value = {"10.0.0.1": "up"}
+        self.health.is_reachable.return_value = None
+        self.journal = MagicMock()
+        self.server = ApiServer(scanner=self.scanner, health=self.health, token="s3cret", audit_workers=2,
+                                journal=self.journal)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def request(self, method, path, body=None, token="s3cret", conn=None, headers=None):
+        own = conn is None
+        conn = conn or http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        extra = headers or {}
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        headers.update(extra)
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = json.loads(resp.read() or b"null")
+        if own:
+            conn.close()
+        return resp.status, data
+
+    def wait_for_job(self, job_id):
+        for _ in range(100):
+            status, job = self.request("GET", f"/api/jobs/{job_id}")
+            if job["state"] in ("done", "failed"):
+                return job
+            time.sleep(0.02)
+        self.fail("job did not finish")
+
+    def test_auth_and_routing(self):
+        self.assertEqual(self.request("GET", "/api/status", token=None)[0], 401)
+        self.assertEqual(self.request("GET", "/api/status", token="wrong")[0], 401)
+        self.assertEqual(self.request("GET", "/api/missing")[0], 404)
+        for length in ("abc", "-1"):
+            status, data = self.request("POST", "/api/scan", headers={"Content-Length": length})
+            self.assertEqual(status, 400, length)
+            self.assertEqual(data["error"], "Invalid Content-Length.")
+        self.assertEqual(self.request("GET", "/api/audit")[0], 405)
+        self.assertEqual(self.request("POST", "/api/audit", body={})[0], 400)
+
+    def test_browser_requests_are_rejected(self):
+        port = self.server.port
+        # Cross-origin pages and DNS-rebound names never reach a handler
+        self.assertEqual(self.request("GET", "/api/status", headers={"Origin": "http://evil.example"})[0], 403)
+        self.assertEqual(self.request("GET", "/api/status", headers={"Host": f"evil.example:{port}"})[0], 403)
+        self.assertEqual(self.request("GET", "/api/status", headers={"Host": "127.0.0.1:1"})[0], 403)
+        self.assertEqual(self.request("GET", "/api/status", headers={"Host": f"localhost:{port}"})[0], 200)
+        # Form posts cannot set a JSON content type
+        status, _ = self.request("POST", "/api/audit", body={"ip": "10.0.0.1"},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.assertEqual(status, 415)
+        self.assertEqual(self.request("POST", "/api/scan")[0], 415)
+
+    def test_token_is_generated_when_missing(self):
+        server = ApiServer()
+        self.assertTrue(server.generated_token)
+        self.assertGreaterEqual(len(server.token), 32)
+        self.assertNotEqual(server.token, ApiServer().token)
+        self.assertFalse(ApiServer(token="s3cret").generated_token)
+
+    def test_neighbors_and_scan_keep_alive(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        status, data = self.request("GET", "/api/neighbors", conn=conn)
+        self.assertEqual(status, 200)
+        self.assertEqual(data["neighbors"][0]["health"], "up")
+        # Same connection is reused
+        status, data = self.request("POST", "/api/scan", body={"duration": 5}, conn=conn)
+        self.assertEqual(status, 202)
+        self.scanner.start_scan.assert_called_once_with(duration=5)
+        conn.close()
+
+    def test_generate(self):
+        status, data = self.request("POST", "/api/generate", body={"lan_ip": "10.9.9.1", "admin_pass": "x"})
+        self.assertEqual(status, 200)
+        self.assertIn("10.9.9.1", data["script"])
+
+        body = {"lan_ip": "10.9.9.1", "admin_pass": "x", "model": "RB750Gr3", "qos_type": "cake"}
+        status, data = self.request("POST", "/api/generate", body=body)
+        self.assertTrue(any("CAKE" in w for w in data["warnings"]), data["warnings"])
+
+    @patch("logic.auditor.RouterAuditor")
+    def test_audit_jobs_are_queued(self, mock_auditor):
+        mock_auditor.return_value.run_compliance_scan.side_effect = lambda ip, user, password: {"target_ip": ip, "passed": True}
+        ids = [self.request("POST", "/api/audit", body={"ip": f"10.0.0.{i}"})[1]["id"] for i in range(1, 6)]
+        jobs = [self.wait_for_job(job_id) for job_id in ids]
+        self.assertEqual([job["state"] for job in jobs], ["done"] * 5)
+        self.assertEqual(jobs[2]["result"]["target_ip"], "10.0.0.3")
+
+        status, data = self.request("GET", "/api/jobs")
+        self.assertEqual(len(data["jobs"]), 5)
+
+    @patch("logic.auditor.RouterAuditor")
+    def test_same_router_jobs_do_not_overlap(self, mock_auditor):
+        active = []
+        overlap = []
+
+        def scan(ip, user, password):
+            active.append(ip)
+            if active.count(ip) > 1:
+                overlap.append(ip)
+            time.sleep(0.05)
+            active.remove(ip)
+            return {"target_ip": ip, "passed": True}
+
+        mock_auditor.return_value.run_compliance_scan.side_effect = scan
+        ids = [self.request("POST", "/api/audit", body={"ip": "10.0.0.1"})[1]["id"] for _ in range(3)]
+        for job_id in ids:
+            self.wait_for_job(job_id)
+        self.assertEqual(overlap, [])
+
+    def test_job_event_stream(self):
+        journals = []
+
+        async def fake_deploy(self_, **kwargs):
+            from logic.deployer import DeployEvent
+            journals.append(self_.journal)
+            yield DeployEvent("connect", "Connecting")
+            yield DeployEvent("done", "Done")
+
+        with patch("logic.deployer.Deployer.deploy_configuration_async", fake_deploy):
+            status, job = self.request("POST", "/api/deploy", body={"ip": "10.0.0.1", "script": "/log info x", "target_lan_ip": "10.0.0.1"})
+            self.assertEqual(status, 202)
+            conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+            conn.request("GET", f"/api/jobs/{job['id']}/events", headers={"Authorization": "Bearer s3cret"})
+            resp = conn.getresponse()
+            self.assertEqual(resp.getheader("Content-Type"), "text/event-stream")
+            events = [json.loads(line[6:]) for line in resp.read().decode().splitlines() if line.startswith("data: ")]
+            conn.close()
+        self.assertEqual([e["phase"] for e in events], ["connect", "done", "job"])
+        self.assertEqual(events[-1]["state"], "done")
+        self.assertEqual(journals, [self.journal])
+
+    @patch("logic.telemetry.TrafficPoller")
+    def test_telemetry_pollers_are_keyed_by_credentials(self, mock_poller):
+        mock_poller.return_value.get_stats.return_value = {"rx": 1, "tx": 2}
+        self.server.TELEMETRY_INTERVAL = 0.01
+
+        def first_sample(password, conns):
+            conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+            conn.request("GET", "/api/telemetry?ip=10.0.0.1", headers={
+                "Authorization": "Bearer s3cret", "X-Titan-User": "admin", "X-Titan-Password": password})
+            resp = conn.getresponse()
+            conns.append(conn)
+            return json.loads(resp.fp.readline()[6:])
+
+        conns = []
+        try:
+            self.assertEqual(first_sample("right", conns)["rx_bps"], 1)
+            first_sample("right", conns)
+            first_sample("wrong", conns)
+        finally:
+            for conn in conns:
+                conn.close()
+        # The second client with the same password shares the first poller
+        self.assertEqual([c.args for c in mock_poller.call_args_list],
+                         [("10.0.0.1", "admin", "right"), ("10.0.0.1", "admin", "wrong")])
+
+    def test_request_limit(self):
+        server = ApiServer(max_requests=1)
+        server.start()
+        release = threading.Event()
+
+        async def slow(request):
+            import asyncio
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            return 200, {}
+
+        server._routes.insert(0, ("GET", r"/api/slow", slow))
+        try:
+            results = []
+            worker = threading.Thread(target=lambda: results.append(self._get(server, "/api/slow")))
+            worker.start()
+            time.sleep(0.2)
+            self.assertEqual(self._get(server, "/api/status"), 429)
+            release.set()
+            worker.join(5)
+            self.assertEqual(results, [200])
+        finally:
+            server.stop()
+
+    def _get(self, server, path):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        conn.request("GET", path, headers={"Authorization": f"Bearer {server.token}"})
+        status = conn.getresponse().status
+        conn.close()
+        return status
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import gzip
+import http.client
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+
+from server.asset_server import AssetServer
+import vendor_assets
+
+
+class TestAssetServer(unittest.TestCase):
+    INDEX = "<html><body>" + "Titan Topology " * 200 + "</body></html>"
+
+    def setUp(self):
+        self.assets_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.assets_dir, "index.html"), "w") as f:
+            f.write(self.INDEX)
+        os.makedirs(os.path.join(self.assets_dir, "templates"))
+        with open(os.path.join(self.assets_dir, "templates", "base.j2"), "w") as f:
+            f.write("secret template")
+        self.server = AssetServer(self.assets_dir)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.assets_dir)
+
+    def request(self, path, headers=None, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        conn.request(method, path, headers=headers or {})
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
+    def test_serves_from_memory_with_gzip(self):
+        # Changing the file on disk must not affect the cached copy
+        os.remove(os.path.join(self.assets_dir, "index.html"))
+
+        resp, body = self.request("/index.html", {"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(resp.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode(), self.INDEX)
+        self.assertLess(len(body), len(self.INDEX))
+
+        resp, body = self.request("/")
+        self.assertIsNone(resp.getheader("Content-Encoding"))
+        self.assertEqual(body.decode(), self.INDEX)
+
+    def test_conditional_request_returns_304(self):
+        resp, _ = self.request("/index.html", {"Accept-Encoding": "gzip"})
+        etag = resp.getheader("ETag")
+        self.assertTrue(etag)
+
+        resp, body = self.request("/index.html", {"If-None-Match": etag})
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b"")
+
+        resp, _ = self.request("/index.html", {"If-None-Match": '"deadbeef"'})
+        self.assertEqual(resp.status, 200)
+
+    def test_excluded_and_missing_paths(self):
+        resp, _ = self.request("/templates/base.j2")
+        self.assertEqual(resp.status, 404)
+        resp, _ = self.request("/missing.js")
+        self.assertEqual(resp.status, 404)
+
+    def test_head_and_dynamic_assets(self):
+        self.server.add("/data/list.txt", "example.com\n", cache_control="max-age=60")
+        resp, body = self.request("/data/list.txt", method="HEAD")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(body, b"")
+        self.assertEqual(resp.getheader("Content-Length"), "12")
+        self.assertEqual(resp.getheader("Cache-Control"), "max-age=60")
+
+    def test_vendor_assets_are_immutable(self):
+        os.makedirs(os.path.join(self.assets_dir, "vendor"))
+        with open(os.path.join(self.assets_dir, "vendor", "lib-1.0.min.js"), "w") as f:
+            f.write("var lib = 1;")
+        self.server.load(self.assets_dir)
+
+        resp, _ = self.request("/vendor/lib-1.0.min.js")
+        self.assertEqual(resp.status, 200)
+        self.assertIn("immutable", resp.getheader("Cache-Control"))
+        self.assertTrue(resp.getheader("Content-Type").startswith(("application/javascript", "text/javascript")))
+        resp, _ = self.request("/index.html")
+        self.assertEqual(resp.getheader("Cache-Control"), "no-cache")
+
+    def test_topology_page_uses_local_cytoscape(self):
+        # Field laptops are offline: every script must be a committed, verified local file
+        assets_dir = os.path.join(os.path.dirname(__file__), "..", "assets")
+        with open(os.path.join(assets_dir, "index.html")) as f:
+            html = f.read()
+        scripts = re.findall(r'<script src="([^"]+)"', html)
+        self.assertIn("vendor/cytoscape-", " ".join(scripts))
+        self.assertNotIn("document.write", html)
+        self.assertNotIn("://", " ".join(scripts))
+        for src in scripts:
+            self.assertTrue(os.path.isfile(os.path.join(assets_dir, src)), f"{src} is not in assets/")
+            self.assertIn(os.path.basename(src), vendor_assets.VENDORED)
+        self.assertEqual(vendor_assets.check(), [])
+
+    def test_slow_client_does_not_block(self):
+        # A client that connects and never sends a request holds only its own thread
+        idle = socket.create_connection(("127.0.0.1", self.server.port))
+        try:
+            resp, _ = self.request("/index.html")
+            self.assertEqual(resp.status, 200)
+        finally:
+            idle.close()
+
+    def test_ephemeral_ports_do_not_collide(self):
+        other = AssetServer(self.assets_dir)
+        other.start()
+        try:
+            self.assertNotEqual(other.port, self.server.port)
+            self.assertTrue(other.url("index.html").endswith(f":{other.port}/index.html"))
+        finally:
+            other.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
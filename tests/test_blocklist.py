@@ -0,0 +1,137 @@
+import sys
+import os
+import http.client
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.blocklist import BlocklistCompiler, DEFAULT_FEED_URL, TIERS, tier_for, mirror_url
+from logic.generator import ConfigGenerator
+from server.asset_server import AssetServer
+
+HOSTS = """# StevenBlack style
+127.0.0.1 localhost
+255.255.255.255 broadcasthost
+0.0.0.0 0.0.0.0
+0.0.0.0 ads.example.com
+0.0.0.0 tracker.example.net pixel.example.net # two names on one line
+0.0.0.0 cdn.ads.example.com
+192.168.1.10 printer.lan
+0.0.0.0 ADS.Example.COM.
+"""
+
+ADBLOCK = """[Adblock Plus 2.0]
+! comment
+||tracker.example.net^
+||example.org^$third-party
+@@||allowed.example.com^
+||ads.example.com/path
+"""
+
+
+class TestBlocklistCompiler(unittest.TestCase):
+    def setUp(self):
+        self.compiler = BlocklistCompiler()
+
+    def test_parse_formats(self):
+        self.assertEqual(
+            self.compiler.parse(HOSTS),
+            ["ads.example.com", "tracker.example.net", "pixel.example.net", "cdn.ads.example.com", "ads.example.com"],
+        )
+        self.assertEqual(self.compiler.parse(ADBLOCK), ["tracker.example.net", "example.org"])
+        self.assertEqual(self.compiler.parse("1.2.3.44\nexample\nbad_domain!.com\nsite.example.io\n"), ["site.example.io"])
+
+    def test_dedupe_and_suffix_compression(self):
+        result = self.compiler.compile([HOSTS, ADBLOCK, "www.example.org\nexample.org\n"])
+        # example.org covers nothing listed by name, cdn.ads.example.com is under ads.example.com
+        self.assertNotIn("cdn.ads.example.com", result["domains"])
+        self.assertNotIn("www.example.org", result["domains"])
+        self.assertEqual(result["covered"], 2)
+        self.assertEqual(result["source_count"], 9)
+        # Listed by two feeds: ranked ahead of single-source entries
+        self.assertEqual(result["domains"][:2], ["tracker.example.net", "example.org"])
+        self.assertEqual(sorted(result["domains"]),
+                         ["ads.example.com", "example.org", "pixel.example.net", "tracker.example.net"])
+
+    def test_parent_ranks_with_absorbed_subdomains(self):
+        feeds = ["ad.tracker.com\nads.one.com\n", "ad.tracker.com\nads.one.com\nads.two.com\n",
+                 "tracker.com\nads.two.com\n"]
+        result = self.compiler.compile(feeds)
+        self.assertEqual(result["domains"], ["tracker.com", "ads.one.com", "ads.two.com"])
+        # Cut at two entries: the parent carries ad.tracker.com's two votes into the tier
+        with patch("logic.blocklist.TIERS", [(None, "t", 2)]):
+            top = self.compiler.tiers(result["domains"])
+        self.assertEqual(top["t"], "0.0.0.0 ads.one.com\n0.0.0.0 tracker.com\n")
+        self.assertEqual(result["covered"], 1)
+
+    def test_tiers_respect_budget(self):
+        domains = [f"host{i}.example.com" for i in range(TIERS[0][2] + 10)]
+        tiers = self.compiler.tiers(domains)
+        self.assertEqual(tiers["s"].count("\n"), TIERS[0][2])
+        self.assertEqual(tiers["m"].count("\n"), len(domains))
+        self.assertTrue(tiers["s"].startswith("0.0.0.0 host0.example.com\n"))
+
+    def test_tier_for_model_ram(self):
+        self.assertEqual(tier_for("RB941-2nD"), "s") # 32 MB hAP lite
+        self.assertEqual(tier_for("RBD53iG-5HacD2HnD"), "m")
+        self.assertEqual(tier_for("RB5009UG+S+"), "l")
+        self.assertEqual(tier_for("CCR2116-12G-4S+"), "xl")
+        self.assertEqual(tier_for("unknown"), "s")
+        self.assertEqual(mirror_url("http://10.0.0.5:8080/", "RB5009UG+S+"), "http://10.0.0.5:8080/adlist/l.txt")
+
+
+class TestBlocklistMirror(unittest.TestCase):
+    def setUp(self):
+        self.server = AssetServer()
+        self.counts = BlocklistCompiler().publish(self.server, ["ads.example.com", "tracker.example.net"])
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def request(self, path, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
+    def test_conditional_get(self):
+        self.assertEqual(self.counts["s"], 2)
+        resp, body = self.request("/adlist/s.txt")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(body, b"0.0.0.0 ads.example.com\n0.0.0.0 tracker.example.net\n")
+        last_modified = resp.getheader("Last-Modified")
+        self.assertTrue(last_modified)
+
+        resp, body = self.request("/adlist/s.txt", {"If-Modified-Since": last_modified})
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b"")
+        resp, _ = self.request("/adlist/s.txt", {"If-None-Match": resp.getheader("ETag")})
+        self.assertEqual(resp.status, 304)
+
+        # Republishing the same list keeps the validators; a new list does not match
+        BlocklistCompiler().publish(self.server, ["tracker.example.net", "ads.example.com"])
+        resp, _ = self.request("/adlist/s.txt", {"If-Modified-Since": last_modified})
+        self.assertEqual(resp.status, 304)
+        BlocklistCompiler().publish(self.server, ["ads.example.com"])
+        resp, _ = self.request("/adlist/s.txt", {"If-None-Match": '"0000"'})
+        self.assertEqual(resp.status, 200)
+
+
+class TestAdblockTemplate(unittest.TestCase):
+    BASE = {"admin_user": "admin", "admin_pass": "pass", "lan_ip": "192.168.88.1", "adblock_enabled": True}
+
+    def test_mirror_url_by_model(self):
+        script = ConfigGenerator().generate(dict(self.BASE, adblock_mirror="http://10.0.0.5:8080", model="RB941-2nD"))
+        self.assertIn('/ip dns adlist add url="http://10.0.0.5:8080/adlist/s.txt";', script)
+
+    def test_public_feed_fallback(self):
+        script = ConfigGenerator().generate(dict(self.BASE))
+        self.assertIn(f'/ip dns adlist add url="{DEFAULT_FEED_URL}";', script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(SRC_DIR)
+
+import cli
+
+
+def run_cli(*argv):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        code = cli.main(list(argv))
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestCLI(unittest.TestCase):
+    def test_no_gui_or_engine_imports(self):
+        # Headless mode must never pay for Flet; engines load per command
+        code = "import sys, cli; print(sorted(m for m in ('flet', 'paramiko', 'scapy', 'jinja2') if m in sys.modules))"
+        out = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "[]")
+
+    def test_generate_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            context_path = os.path.join(tmp, "site.json")
+            output_path = os.path.join(tmp, "setup.rsc")
+            with open(context_path, "w") as f:
+                json.dump({"lan_ip": "10.1.1.1", "admin_pass": "secret"}, f)
+
+            code, lines = run_cli("generate", "--context", context_path, "--output", output_path)
+            self.assertEqual(code, 0)
+            self.assertEqual(lines[0]["event"], "generated")
+            with open(output_path) as f:
+                self.assertIn("10.1.1.1", f.read())
+
+    def test_missing_context_is_reported(self):
+        code, lines = run_cli("generate", "--context", "/nonexistent/site.json")
+        self.assertEqual(code, 1)
+        self.assertEqual(lines[0]["event"], "error")
+
+    @patch("logic.auditor.RouterAuditor")
+    def test_audit_emits_one_line_per_target(self, mock_auditor):
+        mock_auditor.return_value.run_compliance_scan.side_effect = lambda ip, user, password: {
+            "target_ip": ip, "passed": ip != "10.0.0.2", "checks": []
+        }
+        with patch.dict(os.environ, {"TITAN_PASSWORD": "envpass"}):
+            code, lines = run_cli("audit", "10.0.0.1", "10.0.0.2")
+
+        self.assertEqual(code, 1)
+        self.assertEqual([l["target_ip"] for l in lines if l["event"] == "audit"], ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(lines[-1], {"event": "audit_complete", "targets": 2, "failed": 1})
+        mock_auditor.return_value.run_compliance_scan.assert_any_call("10.0.0.1", "admin", "envpass")
+
+    def test_engine_prints_do_not_corrupt_stdout(self):
+        def noisy(ip, user, password):
+            print("SSH Connection Error: timeout")
+            return {"target_ip": ip, "passed": True, "checks": []}
+
+        with patch("logic.auditor.RouterAuditor") as mock_auditor:
+            mock_auditor.return_value.run_compliance_scan.side_effect = noisy
+            code, lines = run_cli("audit", "10.0.0.1")
+        self.assertEqual(code, 0)
+        self.assertEqual([l["event"] for l in lines], ["audit", "audit_complete"])
+
+    def test_deploy_reports_interrupted_rollouts(self):
+        from logic.deployer import DeployEvent
+        from logic.journal import DeploymentJournal
+
+        async def fake_deploy(self, **kwargs):
+            yield DeployEvent("done", "Deployment Successful!")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            journal_path = os.path.join(tmp, "journal.jsonl")
+            script_path = os.path.join(tmp, "setup.rsc")
+            with open(script_path, "w") as f:
+                f.write("/system identity set name=t\n")
+            with DeploymentJournal(journal_path) as journal:
+                journal.record("10.0.0.9", "scheduled", ts=0) # Left by a run that crashed long ago
+
+            with patch("logic.journal.DeploymentJournal", lambda: DeploymentJournal(journal_path)), \
+                 patch("logic.deployer.Deployer.deploy_configuration_async", fake_deploy):
+                code, lines = run_cli("deploy", "192.168.88.1", "--script", script_path,
+                                      "--target-lan-ip", "10.1.1.1", "--password", "x")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(lines[0]["event"], "interrupted")
+        self.assertEqual((lines[0]["device"], lines[0]["previous"], lines[0]["action"]), ("10.0.0.9", "scheduled", "verify"))
+        self.assertEqual(lines[-1]["phase"], "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
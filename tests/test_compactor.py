@@ -0,0 +1,212 @@
+import sys
+import os
+import re
+import ipaddress
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.compactor import ScriptCompactor
+from logic.generator import ConfigGenerator
+from logic.ipam import IPAM
+
+
+# --- Minimal RouterOS evaluator for the expressions the compactor emits ---
+class Num(int):
+    def __add__(self, other):
+        return other.__radd__(self) if isinstance(other, Ip) else Num(int(self) + int(other))
+    def __sub__(self, other):
+        return Num(int(self) - int(other))
+    def __mul__(self, other):
+        return Num(int(self) * int(other))
+    def __matmul__(self, other):
+        return str(self) + str(other)
+    def __rmatmul__(self, other):
+        return str(other) + str(self)
+
+class Ip(int):
+    def __add__(self, other):
+        return Ip(int(self) + int(other))
+    __radd__ = __add__
+    def __sub__(self, other):
+        return Ip(int(self) - int(other))
+    def __str__(self):
+        return str(ipaddress.IPv4Address(int(self)))
+    def __matmul__(self, other):
+        return str(self) + str(other)
+    def __rmatmul__(self, other):
+        return str(other) + str(self)
+
+class Str(str):
+    def __matmul__(self, other):
+        return Str(self + str(other))
+
+TOKEN = re.compile(r'"([^"]*)"|(\d+\.\d+\.\d+\.\d+)|(\d+)|\$(\w+)|(\s*\.\s+)|([()+*\-\s])')
+
+def ros_eval(expr, env):
+    python = []
+    for m in TOKEN.finditer(expr):
+        if m.group(1) is not None:
+            python.append(f"Str({m.group(1)!r})")
+        elif m.group(2):
+            python.append(f"Ip({int(ipaddress.IPv4Address(m.group(2)))})")
+        elif m.group(3):
+            python.append(f"Num({m.group(3)})")
+        elif m.group(4):
+            python.append(f"_{m.group(4)}")
+        elif m.group(5):
+            python.append(" @ ")
+        else:
+            python.append(m.group(6))
+    return str(eval("".join(python), {"Num": Num, "Ip": Ip, "Str": Str}, {f"_{k}": v for k, v in env.items()}))
+
+def split_args(line):
+    """Whitespace split outside quotes and parentheses."""
+    tokens, current, depth, quoted = [], "", 0, False
+    for ch in line:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "()":
+            depth += 1 if ch == "(" else -1
+        elif ch == " " and not quoted and depth == 0:
+            if current:
+                tokens.append(current)
+            current = ""
+            continue
+        current += ch
+    return tokens + [current] if current else tokens
+
+def ros_value(literal):
+    return Ip(int(ipaddress.IPv4Address(literal))) if "." in literal else Num(int(literal))
+
+def absolute_commands(script):
+    """Every top-level command with its menu resolved, loops unrolled (what /import would run)."""
+    compactor = ScriptCompactor()
+    out, menu = [], None
+    lines = script.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip().rstrip(";").strip()
+        i += 1
+        if not line or line.startswith("#"):
+            continue
+        loop = re.match(r':for i from=0 to=(\d+) do=\{$|:foreach (i,)?v in=\{([^}]*)\} do=\{$', line)
+        if loop:
+            body = []
+            while lines[i].strip() != "}":
+                body.append(lines[i].strip())
+                i += 1
+            i += 1
+            if loop.group(1):
+                envs = [{"i": Num(n)} for n in range(int(loop.group(1)) + 1)]
+            else:
+                envs = [{"i": Num(n), "v": ros_value(v)} for n, v in enumerate(loop.group(3).split(";"))]
+            for env in envs:
+                for cmd in body:
+                    tokens = []
+                    for token in split_args(cmd):
+                        key, sep, value = token.partition("=")
+                        if sep and value[:1] in "($":
+                            token = key + "=" + ros_eval(value, env)
+                        tokens.append(token)
+                    out.append(" ".join(tokens))
+            continue
+        words = line.split()
+        if line.startswith("/") and all(re.match(r'^/?[a-z0-9-]+$', w) for w in words) and i < len(lines) \
+                and lines[i].strip()[:1] not in ("/", ":", "#", ""):
+            menu = line
+            continue
+        if line.startswith("/") or line.startswith(":") or line.startswith("}") or menu is None:
+            out.append(" ".join(compactor._split(line) or [line]))
+        else:
+            out.append(menu + " " + " ".join(compactor._split(line)))
+    return out
+
+
+class TestScriptCompactor(unittest.TestCase):
+    def setUp(self):
+        self.compactor = ScriptCompactor()
+
+    def assertEquivalent(self, script, **kwargs):
+        compacted = self.compactor.compact(script, **kwargs)
+        self.assertEqual(absolute_commands(compacted), absolute_commands(script))
+        return compacted
+
+    def test_groups_consecutive_commands(self):
+        script = (
+            "/ip firewall nat add chain=srcnat action=masquerade out-interface=ether1;\n"
+            "/ip firewall nat add chain=dstnat action=dst-nat protocol=tcp dst-port=80;\n"
+            "# comment\n"
+            "/ip address add address=10.0.0.1/24 interface=ether2\n"
+        )
+        compacted = self.assertEquivalent(script)
+        self.assertEqual(compacted.count("/ip firewall nat"), 1)
+        self.assertIn("\nadd chain=dstnat action=dst-nat protocol=tcp dst-port=80\n", compacted)
+        self.assertIn("# comment", compacted)
+        self.assertNotIn("# comment", self.compactor.compact(script, strip_comments=True))
+
+    def test_blocks_and_unknown_commands_are_verbatim(self):
+        block = (
+            ':if ([/user find name="admin"] != "") do={\n'
+            '    /user set admin disabled=yes\n'
+            '    /user set admin disabled=yes\n'
+            '}'
+        )
+        script = "/system reboot\n" + block + "\n:log info \"done\"\n"
+        compacted = self.compactor.compact(script)
+        self.assertIn(block, compacted)
+        self.assertIn("/system reboot\n", compacted)
+
+    def test_for_loop(self):
+        script = "".join(
+            f"/interface vlan add interface=bridge name=vlan{v} vlan-id={v}\n"
+            f"/ip address add address=10.128.{v - 100}.1/24 interface=vlan{v} comment=\"Site 7\"\n"
+            for v in range(100, 300)
+        )
+        compacted = self.assertEquivalent(script)
+        self.assertIn(":for i from=0 to=199 do={", compacted)
+        self.assertLess(len(compacted), len(script) // 20)
+
+    def test_foreach_over_irregular_values(self):
+        vlans = [10, 20, 35, 40, 41, 99, 120, 300, 301]
+        script = "".join(f"/interface vlan add interface=bridge name=vlan{v} vlan-id={v}\n" for v in vlans)
+        compacted = self.assertEquivalent(script)
+        self.assertIn(":foreach v in={10;20;35;40;41;99;120;300;301} do={", compacted)
+
+    def test_irregular_runs_and_quoted_numbers_stay_unrolled(self):
+        # Two independent irregular values cannot share one :foreach
+        script = "".join(f"/ip route add dst-address=10.{v * v % 251}.0.0/16 gateway=10.0.{v * 3 % 17}.1\n" for v in range(20))
+        script += "".join(f"/queue simple add name=\"q{v}\" max-limit=1M/1M\n" for v in range(20))
+        compacted = self.assertEquivalent(script)
+        self.assertNotIn(":for", compacted)
+        self.assertEqual(compacted.count("\nadd "), 40)
+
+    def test_generated_templates_stay_equivalent(self):
+        gen = ConfigGenerator(ipam=IPAM())
+        contexts = [
+            {"lan_ip": "192.168.88.1", "admin_pass": "x", "wifi_ssid": "t", "wifi_pass": "12345678", "voip_enabled": True},
+            {"scenario_mode": "branch", "wan1_ip": "1.1.1.1/24", "wan1_gateway": "1.1.1.254", "wan2_interface": "lte1",
+             "vlan_ids": [str(v) for v in (10, 20, 30, 45, 50, 60, 70, 80, 90, 100)], "site_id": "branch-7"},
+            {"scenario_mode": "wisp", "mgmt_ip": "10.0.0.0/24", "ospf_area": "0.0.0.0",
+             "qos_tiers": [{"name": "basic", "download": "10M", "upload": "2M"}],
+             "qos_subscribers": [{"address": f"100.64.0.{n}", "tier": "basic"} for n in range(1, 200)]},
+        ]
+        for ctx in contexts:
+            ctx["generation_date"] = "2025-01-01 00:00:00"
+            script = gen.generate(dict(ctx))
+            self.assertEquivalent(script)
+            self.assertEquivalent(script, strip_comments=True)
+
+    def test_branch_20k_vlans(self):
+        ctx = {
+            "scenario_mode": "branch", "wan1_ip": "1.1.1.1/24", "wan1_gateway": "1.1.1.1", "wan2_interface": "lte1",
+            "vlan_ids": [str(i) for i in range(1, 20001)], "site_id": "big",
+        }
+        gen = ConfigGenerator(ipam=IPAM())
+        full = gen.generate(dict(ctx))
+        compacted = gen.generate(dict(ctx), compact=True)
+        self.assertLess(len(compacted) * 100, len(full))
+        self.assertIn(":for i from=0 to=19999 do={", compacted)
+
+if __name__ == "__main__":
+    unittest.main()
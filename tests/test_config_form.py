@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.config_form import ConfigForm
+
+
+class TestConfigForm(unittest.TestCase):
+    def test_defaults_are_valid(self):
+        form = ConfigForm(admin_pass="secret123")
+        self.assertEqual(form.validate(), {})
+        context = form.to_context()
+        self.assertEqual(context["lan_ip"], "192.168.88.1")
+        self.assertEqual(context["scenario_mode"], "simple")
+        self.assertEqual(context["vlan_ids"], [])
+
+    def test_static_wan_and_branch_validation(self):
+        form = ConfigForm(admin_pass="secret123", wan_type="static", wan_ip="203.0.113.5",
+                          wan_subnet="40", scenario_mode="branch", vlan_ids="10, 20, 5000, x")
+        errors = form.validate()
+        self.assertIn("wan_gateway", errors)
+        self.assertIn("wan_subnet", errors)
+        self.assertIn("5000", errors["vlan_ids"])
+        self.assertNotIn("wan_ip", errors)
+        self.assertIn("site_id", errors)
+
+        form.set("wan_gateway", "203.0.113.1")
+        form.set("site_id", "branch-01")
+        form.set("wan_subnet", 29)
+        form.set("vlan_ids", "10, 20,")
+        self.assertEqual(form.validate(), {})
+        context = form.to_context()
+        self.assertEqual(context["vlan_ids"], ["10", "20"])
+        self.assertEqual(context["wan1_gateway"], "203.0.113.1")
+        self.assertEqual(context["site_id"], "branch-01")
+
+    def test_set_coerces_types(self):
+        form = ConfigForm()
+        form.set("hotspot_enabled", 1)
+        form.set("bgp_asn", 65001)
+        form.set("wifi_ssid", None)
+        self.assertIs(form.hotspot_enabled, True)
+        self.assertEqual(form.bgp_asn, "65001")
+        self.assertEqual(form.wifi_ssid, "")
+        with self.assertRaises(AttributeError):
+            form.set("not_a_field", "x")
+
+
+if __name__ == "__main__":
+    unittest.main()
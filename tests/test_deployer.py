@@ -0,0 +1,315 @@
+import asyncio
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.deployer import Deployer, DeployEvent
+
+
+def make_mock_client():
+    """SSH client double: flash count 0, empty stderr, SFTP records uploaded bytes."""
+    client = MagicMock()
+    client.exec_command.return_value = (
+        None,
+        MagicMock(read=lambda: b"0"),
+        MagicMock(read=lambda: b""),
+    )
+    sftp = client.open_sftp.return_value
+    sftp.uploaded = bytearray()
+
+    def fake_put(local_path, remote_path, callback=None):
+        with open(local_path, "rb") as f:
+            return fake_putfo(f, remote_path, callback=callback)
+
+    def fake_putfo(fl, remote_path, file_size=0, callback=None):
+        data = fl.read()
+        sftp.uploaded += data
+        if callback:
+            callback(len(data) // 2, len(data))
+            callback(len(data), len(data))
+
+    remote_file = MagicMock()
+    remote_file.__enter__.return_value = remote_file
+    remote_file.write.side_effect = lambda data: sftp.uploaded.extend(data)
+
+    sftp.put.side_effect = fake_put
+    sftp.putfo.side_effect = fake_putfo
+    sftp.open.return_value = remote_file
+    return client
+
+
+class TestDeployer(unittest.TestCase):
+    SCRIPT = "/system identity set name=test\n" * 100
+
+    def _collect(self, deployer, script=None):
+        async def run():
+            return [ev async for ev in deployer.deploy_configuration_async(
+                "192.168.88.1", "admin", "", script or self.SCRIPT, "192.168.88.1"
+            )]
+        return asyncio.run(run())
+
+    async def _online(self, *args, **kwargs):
+        return True
+
+    def test_async_events_success(self):
+        deployer = Deployer()
+        client = make_mock_client()
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            events = self._collect(deployer)
+
+        self.assertTrue(all(isinstance(ev, DeployEvent) for ev in events))
+        phases = [ev.phase for ev in events]
+        self.assertEqual(phases[0], "connect")
+        self.assertEqual(phases[-1], "done")
+        for phase in ("storage", "upload", "schedule", "wait"):
+            self.assertIn(phase, phases)
+
+        upload = [ev for ev in events if ev.phase == "upload" and ev.bytes_sent]
+        self.assertEqual(upload[-1].bytes_sent, upload[-1].bytes_total)
+        self.assertEqual(upload[-1].bytes_total, len(self.SCRIPT))
+        self.assertEqual(bytes(client.open_sftp.return_value.uploaded), self.SCRIPT.encode())
+
+        # Scheduler armed with the detected (non-flash) path
+        cmds = [c.args[0] for c in client.exec_command.call_args_list]
+        self.assertTrue(any("name=TITAN_DEPLOY" in c and "file=setup.rsc" in c for c in cmds))
+
+    def test_rollback_transaction(self):
+        deployer = Deployer()
+        client = make_mock_client()
+
+        async def run():
+            return [ev async for ev in deployer.deploy_configuration_async(
+                "192.168.88.1", "admin", "", self.SCRIPT, "10.0.0.1",
+                confirm_user="titan_admin", confirm_password="secret"
+            )]
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client) as connect, \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            events = asyncio.run(run())
+
+        phases = [ev.phase for ev in events]
+        self.assertLess(phases.index("snapshot"), phases.index("schedule"))
+        self.assertLess(phases.index("wait"), phases.index("confirm"))
+        self.assertEqual(phases[-1], "done")
+
+        cmds = [c.args[0] for c in client.exec_command.call_args_list]
+        backup = next(i for i, c in enumerate(cmds) if "/system backup save" in c)
+        arm = next(i for i, c in enumerate(cmds) if "scheduler add" in c and "TITAN_ROLLBACK" in c)
+        deploy = next(i for i, c in enumerate(cmds) if "scheduler add" in c and "TITAN_DEPLOY" in c)
+        self.assertLess(backup, arm)
+        self.assertLess(arm, deploy)
+        self.assertIn("/system backup load name=titan_pre_deploy.backup", cmds[arm])
+        # Disarmed after confirming with the new credentials on the new address
+        self.assertIn('remove [find name="TITAN_ROLLBACK"]', cmds[-1])
+        connect.assert_called_with("10.0.0.1", "titan_admin", "secret")
+
+    def test_rollback_left_armed_when_confirm_fails(self):
+        deployer = Deployer()
+        client = make_mock_client()
+
+        def connect(ip, user, password):
+            if ip == "10.0.0.1":
+                raise OSError("Authentication failed")
+            return client
+
+        async def run():
+            return [ev async for ev in deployer.deploy_configuration_async(
+                "192.168.88.1", "admin", "", self.SCRIPT, "10.0.0.1"
+            )]
+
+        with patch.object(deployer, "_create_ssh_client", side_effect=connect), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            events = asyncio.run(run())
+
+        self.assertEqual(events[-1].phase, "failed")
+        self.assertIn("restore is armed", events[-1].message)
+        self.assertIn("192.168.88.1", events[-1].message)
+
+    def test_streamed_chunks_upload(self):
+        deployer = Deployer()
+        deployer.STREAM_CHUNK_SIZE = 64
+        client = make_mock_client()
+        chunks = (line + "\n" for line in self.SCRIPT.splitlines())
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            events = self._collect(deployer, script=chunks)
+
+        self.assertEqual(events[-1].phase, "done")
+        sftp = client.open_sftp.return_value
+        sftp.put.assert_not_called()
+        self.assertEqual(bytes(sftp.uploaded), self.SCRIPT.encode())
+        self.assertGreater(sftp.open.return_value.write.call_count, 1)
+
+    def test_path_and_bytes_payloads(self):
+        deployer = Deployer()
+        fd, path = tempfile.mkstemp(suffix=".rsc")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.SCRIPT)
+        try:
+            for script in (pathlib.Path(path), self.SCRIPT.encode()):
+                client = make_mock_client()
+                with patch.object(deployer, "_create_ssh_client", return_value=client), \
+                     patch.object(deployer, "_probe_ssh", side_effect=self._online):
+                    events = self._collect(deployer, script=script)
+                self.assertEqual(events[-1].phase, "done")
+                self.assertEqual(bytes(client.open_sftp.return_value.uploaded), self.SCRIPT.encode())
+        finally:
+            os.remove(path)
+
+    def test_path_string_is_rejected(self):
+        deployer = Deployer()
+        fd, path = tempfile.mkstemp(suffix=".rsc")
+        os.close(fd)
+        try:
+            for script in (path, "missing/setup.rsc"):
+                with patch.object(deployer, "_create_ssh_client") as connect:
+                    events = self._collect(deployer, script=script)
+                connect.assert_not_called()
+                self.assertEqual(events[-1].phase, "failed")
+                self.assertIn("pathlib.Path", events[-1].message)
+        finally:
+            os.remove(path)
+
+        # One-line scripts are still scripts
+        client = make_mock_client()
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            events = self._collect(deployer, script="/import file=setup.rsc")
+        self.assertEqual(events[-1].phase, "done")
+        self.assertEqual(bytes(client.open_sftp.return_value.uploaded), b"/import file=setup.rsc")
+
+    def test_async_events_failure(self):
+        deployer = Deployer()
+        with patch.object(deployer, "_create_ssh_client", side_effect=OSError("unreachable")):
+            events = self._collect(deployer)
+
+        self.assertEqual(events[-1].phase, "failed")
+        self.assertIn("unreachable", events[-1].message)
+
+    def test_cancellation_closes_session(self):
+        deployer = Deployer()
+        client = make_mock_client()
+        order = []
+        aborted = threading.Event()
+
+        def stalled_putfo(fl, remote_path, file_size=0, callback=None):
+            # Blocks like a slow link until the session is closed under it
+            order.append("upload")
+            aborted.wait(5)
+
+        def close():
+            order.append("close")
+            aborted.set()
+
+        client.open_sftp.return_value.putfo.side_effect = stalled_putfo
+        client.close.side_effect = close
+
+        async def run():
+            async def consume():
+                async for ev in deployer.deploy_configuration_async(
+                    "192.168.88.1", "admin", "", self.SCRIPT, "192.168.88.1"
+                ):
+                    pass
+
+            task = asyncio.ensure_future(consume())
+            while "upload" not in order:
+                await asyncio.sleep(0.01)
+            order.append("cancel")
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client):
+            asyncio.run(run())
+
+        self.assertEqual(order, ["upload", "cancel", "close"])
+        self.assertNotIn("TITAN_DEPLOY", str(client.exec_command.call_args_list))
+
+    def test_cancellation_while_waiting(self):
+        deployer = Deployer()
+        client = make_mock_client()
+        order = []
+        client.close.side_effect = lambda: order.append("close")
+
+        async def offline(*args, **kwargs):
+            order.append("probe")
+            return False
+
+        async def run():
+            async def consume():
+                async for ev in deployer.deploy_configuration_async(
+                    "192.168.88.1", "admin", "", self.SCRIPT, "192.168.88.1"
+                ):
+                    if ev.phase == "wait" and "probe" in order:
+                        order.append("cancel")
+                        task.cancel()
+
+            task = asyncio.ensure_future(consume())
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=offline):
+            asyncio.run(run())
+
+        # The session is released before waiting starts; cancelling stops the probing
+        self.assertEqual(order, ["close", "probe", "cancel"])
+
+    def test_timeout_is_a_failure(self):
+        deployer = Deployer(journal=MagicMock())
+        deployer.AVAILABILITY_TIMEOUT = 0.05
+        deployer.POLL_INTERVAL = 0.01
+        client = make_mock_client()
+
+        async def offline(*args, **kwargs):
+            return False
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=offline):
+            events = self._collect(deployer)
+            ok = deployer.deploy_configuration("192.168.88.1", "admin", "", self.SCRIPT, "192.168.88.1")
+
+        self.assertFalse(ok)
+        self.assertEqual(events[-1].phase, "failed")
+        self.assertIn("Timed out", events[-1].message)
+        states = [c.args[1] for c in deployer.journal.record.call_args_list]
+        self.assertEqual(states[-1], "failed")
+
+    def test_sync_wrapper_reports_status(self):
+        deployer = Deployer()
+        client = make_mock_client()
+        messages = []
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            ok = deployer.deploy_configuration(
+                "192.168.88.1", "admin", "", self.SCRIPT, "192.168.88.1",
+                status_callback=messages.append
+            )
+
+        self.assertTrue(ok)
+        self.assertEqual(messages[-1], "Deployment Successful!")
+
+    def test_sync_wrapper_inside_running_loop(self):
+        deployer = Deployer()
+        client = make_mock_client()
+
+        async def handler():
+            return deployer.deploy_configuration("192.168.88.1", "admin", "", self.SCRIPT, "192.168.88.1")
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=self._online):
+            self.assertTrue(asyncio.run(handler()))
+
+
+if __name__ == "__main__":
+    unittest.main()
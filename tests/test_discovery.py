@@ -85,5 +85,62 @@ class TestDiscovery(unittest.TestCase):
         self.assertEqual(n['version'], "7.15.3")
         self.assertEqual(n['ip'], "192.168.88.1")
 
+    def test_bounded_scan_reports_progress(self):
+        scanner = MNDP_Scanner()
+        with patch('discovery.mndp_scanner.sniff') as mock_sniff:
+            scanner.start_scan(duration=5)
+            scanner._sniff_thread.join(2)
+        self.assertEqual(mock_sniff.call_args.kwargs["timeout"], 5)
+        # sniff() returning on its timeout completes the scan
+        progress = scanner.get_progress()
+        self.assertFalse(progress["running"])
+        self.assertEqual(progress["fraction"], 1.0)
+
+    def test_generation_tracks_changes(self):
+        scanner = MNDP_Scanner()
+        scanner.running = True
+        info = {"mac": "aa", "identity": "R1", "version": "7.15"}
+        scanner._parse_mndp_payload = MagicMock(return_value=info)
+        packet = MagicMock()
+        packet.__contains__ = MagicMock(return_value=True)
+        packet.__getitem__ = MagicMock(return_value=MagicMock(dport=5678, src="10.0.0.1", payload=b""))
+
+        scanner._process_packet(packet)
+        first = scanner.generation
+        scanner._parse_mndp_payload = MagicMock(return_value=dict(info))
+        scanner._process_packet(packet) # Repeat announcement
+        self.assertEqual(scanner.generation, first)
+
+    def make_neighbors(self, scanner, subnet_sizes):
+        for s, size in enumerate(subnet_sizes):
+            for h in range(size):
+                mac = f"00:00:00:00:{s:02x}:{h:02x}"
+                scanner.neighbors[mac] = {"mac": mac, "identity": f"R{s}-{h}", "version": "7.15", "ip": f"10.0.{s}.{h + 1}"}
+
+    def test_topology_groups_by_subnet(self):
+        scanner = MNDP_Scanner()
+        self.make_neighbors(scanner, [3, 2])
+        elements = scanner.get_topology_elements(health={"10.0.0.1": "down"})
+        ids = {e["data"]["id"]: e["data"] for e in elements}
+
+        self.assertTrue(ids["subnet:10.0.0.0/24"]["cluster"])
+        self.assertEqual(ids["00:00:00:00:00:00"]["parent"], "subnet:10.0.0.0/24")
+        self.assertEqual(ids["00:00:00:00:00:00"]["health"], "down")
+        # PC links to each subnet, not to every device
+        edges = [e["data"] for e in elements if "source" in e["data"]]
+        self.assertEqual(sorted(e["target"] for e in edges), ["subnet:10.0.0.0/24", "subnet:10.0.1.0/24"])
+
+    def test_topology_aggregates_largest_subnets(self):
+        scanner = MNDP_Scanner()
+        self.make_neighbors(scanner, [50, 5, 5])
+        elements = scanner.get_topology_elements(max_nodes=20)
+        ids = {e["data"]["id"]: e["data"] for e in elements}
+
+        self.assertEqual(ids["agg:10.0.0.0/24"]["count"], 50)
+        self.assertNotIn("subnet:10.0.0.0/24", ids)
+        self.assertIn("subnet:10.0.1.0/24", ids)
+        devices = [d for d in ids.values() if "parent" in d]
+        self.assertEqual(len(devices), 10)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,183 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from logic.generator import ConfigGenerator
+
+if np is not None:
+    from logic.firewall_sim import FirewallSimulator, ACCEPT, CHAINS, STATES, PROTOCOLS
+
+BASE = {
+    "admin_user": "admin", "admin_pass": "pass", "lan_ip": "192.168.88.1",
+    "vpn_enabled": True, "wg_interface_ip": "10.10.10.1/24", "dns_redirect": True,
+}
+
+
+def render(**overrides):
+    return ConfigGenerator().generate(dict(BASE, **overrides))
+
+
+def reference_verdict(sim, flow):
+    """Scalar first-match evaluation of the filter table (no NAT), for cross-checking."""
+    lists = {name: {sim.interfaces.index(iface) for iface in sim.list_members(name)} for name in sim.interface_lists}
+    for rule in sim.rules:
+        if rule.table != "filter" or rule.chain != CHAINS[flow["chain"]]:
+            continue
+        props = rule.properties
+        if "connection-state" in props and STATES[flow["state"]] not in props["connection-state"].split(","):
+            continue
+        if "protocol" in props and PROTOCOLS[props["protocol"]] != flow["protocol"]:
+            continue
+        if "dst-port" in props and flow["dst_port"] != int(props["dst-port"]):
+            continue
+        if "in-interface-list" in props and flow["in_interface"] not in lists[props["in-interface-list"]]:
+            continue
+        if "out-interface-list" in props and flow["out_interface"] not in lists[props["out-interface-list"]]:
+            continue
+        return 0 if rule.action == "drop" else 1
+    return 1
+
+
+@unittest.skipUnless(np is not None, "NumPy is not installed")
+class TestFirewallSimulator(unittest.TestCase):
+    def test_wan_reaches_input_only_through_wireguard_and_ping(self):
+        sim = FirewallSimulator(render())
+        flows = sim.make_flows(200000, seed=1, chain="input", in_interface="WAN", state="new")
+        result = sim.check(flows, allow=lambda f: ((f["protocol"] == 17) & (f["dst_port"] == 51820)) | (f["protocol"] == 1))
+        self.assertEqual(result["violations"], 0)
+        self.assertGreater(result["accepted"], 0)
+
+        # Without the ICMP exception the simulator finds the ping rule
+        result = sim.check(flows, allow=lambda f: (f["protocol"] == 17) & (f["dst_port"] == 51820))
+        self.assertGreater(result["violations"], 0)
+        self.assertEqual(result["examples"][0]["protocol"], "icmp")
+
+    def test_no_wireguard_without_vpn(self):
+        sim = FirewallSimulator(render(vpn_enabled=False))
+        flows = sim.make_flows(1000, seed=2, chain="input", in_interface="WAN", state="new",
+                               protocol="udp", dst_port=51820)
+        self.assertEqual(sim.check(flows)["violations"], 0)
+
+    def test_matches_scalar_reference(self):
+        sim = FirewallSimulator(render(dns_redirect=False))
+        flows = sim.make_flows(3000, seed=3)
+        flows["protocol"][::3] = 17
+        flows["dst_port"][::5] = 51820
+        verdicts = sim.evaluate(flows)["action"]
+        for i in range(len(verdicts)):
+            flow = {key: int(values[i]) for key, values in flows.items()}
+            self.assertEqual(int(verdicts[i]), reference_verdict(sim, flow), sim.describe(flows, i))
+
+    def test_hit_counts(self):
+        sim = FirewallSimulator(render())
+        flows = sim.make_flows(50000, seed=4)
+        result = sim.evaluate(flows)
+        report = sim.hit_report(result["hits"])
+        # Both filter chains end in a catch-all drop: every flow hits exactly one rule
+        for code, chain in enumerate(CHAINS[:2]):
+            total = sum(r["hits"] for r in report if r["table"] == "filter" and r["chain"] == chain)
+            self.assertEqual(total, int((result["chain"] == code).sum()))
+        shares = [r["share"] for r in report if r["table"] == "filter" and r["chain"] == "input"]
+        self.assertAlmostEqual(sum(shares), 1.0)
+
+        suggestions = sim.suggest_order(result["hits"])
+        self.assertTrue(suggestions)
+        first = suggestions[0]
+        self.assertGreater(first["hits"], first["above_hits"])
+        self.assertEqual(sorted(s["hits"] for s in suggestions)[::-1], [s["hits"] for s in suggestions])
+        by_rule = {s["rule"]: s for s in suggestions}
+        comments = {r.comment: r.index for r in sim.rules if r.chain == "input"}
+        # Established/related never overlaps 'Drop Invalid'; 'Drop All WAN Input' must stay below WireGuard
+        self.assertTrue(by_rule[comments["Accept Established/Related"]]["safe"])
+        self.assertFalse(by_rule[comments["Drop All WAN Input"]]["safe"])
+
+    def test_dns_redirect_goes_to_input(self):
+        sim = FirewallSimulator(render())
+        flows = sim.make_flows(100, seed=5, chain="forward", in_interface="LAN-Bridge", out_interface="WAN",
+                               protocol="udp", dst_port=53, state="new")
+        result = sim.evaluate(flows)
+        self.assertTrue((result["chain"] == CHAINS.index("input")).all())
+        self.assertTrue((result["action"] == ACCEPT).all()) # Allow Management from LAN
+        redirect = [r for r in sim.rules if r.action == "redirect" and r.properties["protocol"] == "udp"][0]
+        self.assertEqual(result["hits"][redirect.index], 100)
+
+    def test_survival_bogons_dropped_on_wan_only(self):
+        script = ConfigGenerator().generate({"scenario_mode": "survival"})
+        sim = FirewallSimulator(script, interfaces={"ether1": [], "ether2": []})
+        self.assertTrue(any("limit" in w for w in sim.warnings))
+        bogon = sim.make_flows(1000, seed=6, chain="forward", src="198.18.2.3", in_interface="ether1", state="new")
+        self.assertEqual(sim.check(bogon)["accepted"], 0)
+        # The modem in front of a DHCP WAN is private space and must stay reachable
+        upstream = sim.make_flows(1000, seed=6, chain="forward", src="192.168.1.1", in_interface="ether1",
+                                  protocol="tcp", state="new")
+        self.assertEqual(sim.check(upstream)["accepted"], 1000)
+        lan = sim.make_flows(1000, seed=6, chain="input", src="192.168.88.20", in_interface="ether2",
+                             protocol="tcp", state="new")
+        self.assertEqual(sim.check(lan)["accepted"], 1000) # Allow Management LAN
+
+    def test_flows_are_seeded_from_rule_boundaries(self):
+        sim = FirewallSimulator(render())
+        self.assertIn(51820, sim.boundary_values()["dst_port"])
+        self.assertIn(51821, sim.boundary_values()["dst_port"])
+        # A single UDP port is found with every seed, even with few flows
+        for seed in range(40):
+            probe = sim.make_flows(200, seed=seed, chain="input", in_interface="WAN", state="new")
+            self.assertIn(51820, sim.exposed_services(probe, sim.evaluate(probe)).get("udp", []), seed)
+        plain = sim.make_flows(200, seed=0, boundaries=False, protocol="udp")
+        self.assertNotIn(51820, plain["dst_port"]) # Uniform sampling misses it
+
+    def test_unsupported_matchers_resolve_towards_exposure(self):
+        script = "\n".join([
+            "/ip firewall filter",
+            "add chain=input action=accept protocol=tcp dst-port=22 connection-limit=3,32",
+            "add chain=input action=drop protocol=udp limit=10,5:packet",
+            "add chain=input action=drop",
+        ])
+        sim = FirewallSimulator(script, interfaces={"ether1": []})
+        self.assertEqual(len(sim.warnings), 2)
+        self.assertIn("assumed not to match", sim.warnings[1])
+        ssh = sim.make_flows(100, seed=1, chain="input", protocol="tcp", dst_port=22)
+        self.assertEqual(sim.check(ssh)["accepted"], 100) # The accept may fire
+        udp = sim.make_flows(100, seed=1, chain="input", protocol="udp")
+        result = sim.evaluate(udp)
+        self.assertEqual(int(result["hits"][1]), 0) # The rate-limited drop may not
+        self.assertEqual(int(result["hits"][2]), 100)
+
+        # Survival's rate-limited ICMP drop no longer hides ping from the WAN
+        survival = FirewallSimulator(ConfigGenerator().generate({"scenario_mode": "survival"}),
+                                     interfaces={"ether1": [], "ether2": []})
+        ping = survival.make_flows(100, seed=2, chain="input", src="8.8.8.8", in_interface="ether1",
+                                   protocol="icmp", state="new")
+        self.assertEqual(survival.check(ping)["accepted"], 100)
+
+    def test_connection_nat_state(self):
+        script = "\n".join([
+            "/ip firewall nat",
+            "add chain=dstnat action=dst-nat in-interface=ether1 protocol=tcp dst-port=8080 to-addresses=192.168.88.10",
+            "/ip firewall filter",
+            "add chain=forward action=drop connection-nat-state=!dstnat in-interface=ether1",
+        ])
+        sim = FirewallSimulator(script, interfaces={"ether1": [], "ether2": []})
+        self.assertEqual(sim.warnings, [])
+        forwarded = sim.make_flows(50, seed=3, chain="forward", in_interface="ether1", protocol="tcp", dst_port=8080)
+        self.assertEqual(sim.check(forwarded)["accepted"], 50)
+        other = sim.make_flows(50, seed=3, chain="forward", in_interface="ether1", protocol="tcp", dst_port=8081)
+        self.assertEqual(sim.check(other)["accepted"], 0)
+
+    def test_unknown_flow_field(self):
+        sim = FirewallSimulator(render())
+        with self.assertRaises(ValueError):
+            sim.make_flows(10, ttl=3)
+        with self.assertRaises(ValueError):
+            sim.make_flows(10, in_interface="ether9")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 
 sys.path.append(os.path.join(os.getcwd(), "src"))
 
-from logic.generator import ConfigGenerator
+from logic.generator import ConfigGenerator, ConfigRejected
 
 class TestGenerator(unittest.TestCase):
     def setUp(self):
@@ -40,6 +40,7 @@ class TestGenerator(unittest.TestCase):
         ctx['wan2_interface'] = "lte1"
         ctx['vlan_ids'] = ["10", "20"]
         ctx['hq_wg_pubkey'] = "KEY123"
+        ctx['site_id'] = "branch-01"
 
         script = self.gen.generate(ctx)
         self.assertIn("Scenario A", script)
@@ -84,5 +85,70 @@ class TestGenerator(unittest.TestCase):
         self.assertIn("Hotspot Portal", script)
         self.assertIn("/ip hotspot profile add", script)
 
+    def test_fasttrack_default(self):
+        script = self.gen.generate(self.base_ctx.copy())
+        self.assertIn("action=fasttrack-connection", script)
+        self.assertNotIn("hw-offload=yes", script)
+        # FastTrack must come before the slow-path accept
+        self.assertLess(script.index("fasttrack-connection"), script.index('chain=forward action=accept connection-state=established'))
+
+    def test_fasttrack_hw_offload_on_l3hw_model(self):
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "CRS326-24G-2S+"
+        script = self.gen.generate(ctx)
+        self.assertIn("hw-offload=yes", script)
+        self.assertIn("l3-hw-offloading=yes", script)
+
+    def test_fasttrack_excluded_by_blocking_features(self):
+        for key, value in (("voip_enabled", True), ("hotspot_enabled", True), ("qos_type", "simple"), ("qos_type", "cake")):
+            ctx = self.base_ctx.copy()
+            ctx[key] = value
+            script = self.gen.generate(ctx)
+            self.assertNotIn("action=fasttrack-connection", script, key)
+            self.assertIn("FastTrack disabled", script)
+
+    def test_rejects_cpu_bound_features_on_switch(self):
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "CRS326-24G-2S+"
+        ctx['qos_type'] = "cake"
+        with self.assertRaises(ConfigRejected) as cm:
+            self.gen.generate(ctx)
+        self.assertIn("CPU", cm.exception.errors[0])
+
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "hAP-unknown-board"
+        ctx['container_enabled'] = True
+        self.gen.generate(ctx) # Unknown models are not checked
+
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "RB750Gr3"
+        ctx['container_enabled'] = True
+        with self.assertRaises(ConfigRejected):
+            self.gen.generate(ctx)
+
+    def test_model_aware_queue_and_wifi(self):
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "RB750Gr3" # MMIPS: no CAKE, no radio
+        ctx['qos_type'] = "cake"
+        script = self.gen.generate(ctx)
+        self.assertIn("kind=fq-codel", script)
+        self.assertNotIn("kind=cake", script)
+        self.assertIn("WiFi skipped", script)
+        self.assertEqual(len(self.gen.last_warnings), 2)
+        self.assertNotIn('qos_queue_kind', ctx) # The caller's context is not touched
+
+        ctx = self.base_ctx.copy()
+        ctx['model'] = "RB5009UG+S+IN"
+        ctx['qos_type'] = "cake"
+        script = self.gen.generate(ctx)
+        self.assertIn("kind=cake", script)
+
+    def test_generate_stream_matches_render(self):
+        ctx = self.base_ctx.copy()
+        ctx['generation_date'] = "2025-01-01 00:00:00"
+        chunks = list(self.gen.generate_stream(ctx))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), self.gen.generate(ctx))
+
 if __name__ == "__main__":
     unittest.main()
@@ -39,6 +39,7 @@ class GrandMasterSimulation(unittest.TestCase):
             "wan1_gateway": "1.1.1.1",
             "wan2_interface": "lte1",
             "hq_wg_pubkey": "KEY",
+            "site_id": "gms",
             "vlan_ids": [str(i) for i in range(count)]
         })
 
@@ -0,0 +1,53 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.hardware_db import HardwareDB, HardwareProfile, get_hardware_db
+from logic.hardware_validator import HardwareValidator
+
+
+class TestHardwareDB(unittest.TestCase):
+    def setUp(self):
+        self.db = get_hardware_db()
+
+    def test_exact_and_prefix_lookup(self):
+        self.assertEqual(self.db.lookup("RB5009").name, "RB5009")
+        # Suffixes (RM, IN, UG+S+...) resolve to the longest known prefix
+        self.assertEqual(self.db.lookup("crs326-24g-2s+rm").name, "CRS326-24G-2S+")
+        self.assertEqual(self.db.lookup("RB5009UG+S+IN").name, "RB5009")
+        # Unlisted members fall back to the family entry
+        self.assertEqual(self.db.lookup("CRS354-48G-4S+2Q+").name, "CRS3")
+        self.assertIsNone(self.db.lookup("Unknown-Board"))
+        self.assertIsNone(self.db.lookup(""))
+
+    def test_capabilities(self):
+        self.assertEqual(self.db.lookup("C52iG-5HaxD2HaxD").wireless, "wifiwave2")
+        self.assertEqual(self.db.lookup("RBD52G-5HacD2HnD").wireless, "legacy")
+        self.assertTrue(self.db.lookup("CCR2216-1G-12XS-2XQ").l3hw)
+        self.assertFalse(self.db.lookup("CCR2004-16G-2S+").l3hw)
+        self.assertTrue(self.db.lookup("RB760iGS").weak_cpu)
+        self.assertFalse(self.db.lookup("RB5009").weak_cpu)
+        # hAP ax lite is an ARM64 Qualcomm board, not the MIPS MT7621 of the hEX
+        self.assertEqual(self.db.lookup("L41G-2axD").switch_chip, "IPQ-5010")
+
+    def test_custom_table(self):
+        db = HardwareDB([HardwareProfile("TEST", "router", "arm64", 4, 1024, 128)])
+        self.assertEqual(len(db), 1)
+        self.assertEqual(db.lookup("TEST-1").name, "TEST")
+
+    def test_plan_hardware(self):
+        validator = HardwareValidator()
+        plan = validator.plan_hardware("CRS317-1G-16S+", {"hotspot_enabled": True, "bridge_count": 3})
+        self.assertEqual(len(plan['errors']), 1) # Multi-bridge is fine on CRS3xx, hotspot is not
+
+        plan = validator.plan_hardware("RB4011iGS+RM", {"bridge_count": 2})
+        self.assertIn("PERFORMANCE WARNING", plan['errors'][0])
+
+        plan = validator.plan_hardware("Unknown", {"bridge_count": 5, "container_enabled": True})
+        self.assertEqual(plan['errors'], [])
+        self.assertIsNone(plan['profile'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,6 +29,20 @@ class TestHardwareValidator(unittest.TestCase):
         result = self.validator.validate_bridge_config("RB4011", 1)
         self.assertTrue(result['valid'])
 
+    def test_fasttrack_plan(self):
+        plan = self.validator.plan_fasttrack("CCR2116-12G-4S+", {"qos_type": "none"})
+        self.assertTrue(plan['enabled'])
+        self.assertTrue(plan['hw_offload'])
+
+        plan = self.validator.plan_fasttrack("RB4011iGS+5HacQ2HnD", {})
+        self.assertTrue(plan['enabled'])
+        self.assertFalse(plan['hw_offload'])
+
+        plan = self.validator.plan_fasttrack("CRS326-24G-2S+", {"voip_enabled": True})
+        self.assertFalse(plan['enabled'])
+        self.assertFalse(plan['hw_offload'])
+        self.assertEqual(plan['blockers'], ["VoIP mangle/priority queue"])
+
     def test_tzsp_generation(self):
         cmd = self.validator.generate_tzsp_config("192.168.1.50", "ether1")
         self.assertIn("streaming-server=192.168.1.50", cmd)
@@ -37,7 +51,7 @@ class TestHardwareValidator(unittest.TestCase):
 
     def test_safe_mode_wrapper(self):
         commands = ["/ip address add address=1.1.1.1/24 interface=ether1"]
-        script = self.validator.wrap_in_safe_mode(commands)
+        script = self.validator.wrap_in_safe_mode(commands, "SAFE_MODE_ROLLBACK_test")
 
         # Check for scheduler creation
         self.assertIn("/system scheduler add", script)
@@ -47,12 +61,25 @@ class TestHardwareValidator(unittest.TestCase):
         # Check for command execution
         self.assertIn("/ip address add", script)
 
-        # Check for scheduler removal (success path)
+        # Check for scheduler removal (the restore fires once)
         self.assertIn("/system scheduler remove", script)
 
+        # The restore stays armed: only the caller disarms it, after reconnecting
+        disarm = self.validator.generate_rollback_disarm("TITAN_SAFE")
+        script = self.validator.wrap_in_safe_mode(commands, scheduler_name="TITAN_SAFE")
+        self.assertIn('name="TITAN_SAFE"', script)
+        self.assertNotIn(disarm, script)
+        end = script.index("# --- END CONFIGURATION ---")
+        self.assertNotIn("scheduler remove", script[end:])
+
         # Check for error handling
         self.assertIn(":do {", script)
         self.assertIn("on-error={", script)
 
+        # The safety net restores a snapshot instead of rebooting into the new config
+        self.assertIn("/system backup save name=titan_safe_mode", script)
+        self.assertIn("/system backup load name=titan_safe_mode.backup", script)
+        self.assertLess(script.index("/system backup save"), script.index("/ip address add"))
+
 if __name__ == '__main__':
     unittest.main()
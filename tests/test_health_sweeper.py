@@ -0,0 +1,114 @@
+import asyncio
+import os
+import socket
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from discovery.health_sweeper import HealthSweeper
+from logic.auditor import RouterAuditor
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestHealthSweeper(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(16)
+        self.open_port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_probe_listening_and_refused(self):
+        sweeper = HealthSweeper(probe_timeout=0.5)
+
+        sweeper.PROBE_PORTS = (self.open_port,)
+        up, rtt = asyncio.run(sweeper.probe("127.0.0.1"))
+        self.assertTrue(up)
+        self.assertIsNotNone(rtt)
+
+        # Nothing listening: the host still answers with RST, so it is alive
+        sweeper.PROBE_PORTS = (free_port(),)
+        up, _ = asyncio.run(sweeper.probe("127.0.0.1"))
+        self.assertTrue(up)
+
+    def test_sweep_merges_neighbors_and_inventory(self):
+        scanner = MagicMock()
+        scanner.get_neighbors.return_value = [{"mac": "aa", "ip": "127.0.0.1"}, {"mac": "bb", "ip": "0.0.0.0"}]
+        sweeper = HealthSweeper(scanner=scanner)
+        sweeper.add_device("192.0.2.10")
+
+        async def fake_probe(ip):
+            return ip == "127.0.0.1", 1.0
+
+        with patch.object(sweeper, "probe", side_effect=fake_probe):
+            probed = asyncio.run(sweeper.sweep_once())
+
+        self.assertEqual(probed, 2)
+        self.assertEqual(sweeper.get_health_map(), {"127.0.0.1": "up", "192.0.2.10": "down"})
+        self.assertTrue(sweeper.is_reachable("127.0.0.1"))
+        self.assertFalse(sweeper.is_reachable("192.0.2.10"))
+        self.assertIsNone(sweeper.is_reachable("192.0.2.99"))
+
+    def test_stale_verdict_is_unknown(self):
+        sweeper = HealthSweeper(max_interval=60.0)
+        sweeper.add_device("192.0.2.10")
+
+        async def down(ip):
+            return False, None
+
+        with patch.object(sweeper, "probe", side_effect=down):
+            asyncio.run(sweeper.sweep_once())
+        self.assertFalse(sweeper.is_reachable("192.0.2.10"))
+
+        # A minute later the backed-off 'down' no longer blocks, and the device is due again
+        later = sweeper.get_health("192.0.2.10")["last_checked"] + 60
+        with patch("discovery.health_sweeper.time.time", return_value=later):
+            self.assertIsNone(sweeper.is_reachable("192.0.2.10"))
+        self.assertLessEqual(sweeper.get_health("192.0.2.10")["next_check"], later)
+        self.assertFalse(sweeper.is_reachable("192.0.2.10", max_age=120))
+
+    def test_adaptive_interval(self):
+        sweeper = HealthSweeper(min_interval=2.0, max_interval=8.0)
+        sweeper.add_device("192.0.2.1")
+        states = iter([True, True, True, True, False])
+
+        async def fake_probe(ip):
+            return next(states), None
+
+        intervals = []
+        with patch.object(sweeper, "probe", side_effect=fake_probe):
+            for _ in range(5):
+                asyncio.run(sweeper.sweep_once(force=True))
+                intervals.append(sweeper.get_health("192.0.2.1")["interval"])
+
+        # Stable state backs off up to the cap; a state change resets it
+        self.assertEqual(intervals, [2.0, 4.0, 8.0, 8.0, 2.0])
+
+        # Not due yet -> nothing probed
+        with patch.object(sweeper, "probe", side_effect=fake_probe):
+            self.assertEqual(asyncio.run(sweeper.sweep_once()), 0)
+
+    def test_auditor_fails_fast_on_down_host(self):
+        health = MagicMock()
+        health.is_reachable.return_value = False
+        auditor = RouterAuditor(health=health)
+
+        with patch.object(auditor, "_create_ssh_client") as connect:
+            report = auditor.run_compliance_scan("192.0.2.10", "admin", "")
+
+        connect.assert_not_called()
+        self.assertFalse(report["passed"])
+        self.assertIn("unreachable", report["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
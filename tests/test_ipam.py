@@ -0,0 +1,164 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.ipam import IPAM, SubnetPool
+from logic.generator import ConfigGenerator
+
+
+class TestSubnetPool(unittest.TestCase):
+    def test_keyed_and_lowest_free(self):
+        pool = SubnetPool("vlan", "10.128.0.0/16", 24)
+        self.assertEqual(str(pool.allocate("a")), "10.128.0.0/24")
+        self.assertEqual(str(pool.allocate("b")), "10.128.1.0/24")
+        self.assertEqual(str(pool.allocate("a")), "10.128.0.0/24") # Same key, same subnet
+        pool.release("a")
+        self.assertEqual(str(pool.allocate("c")), "10.128.0.0/24") # Freed slot is reused first
+        self.assertEqual(pool.capacity, 256)
+
+    def test_reserve_and_errors(self):
+        pool = SubnetPool("p2p", "192.0.2.0/29", 30)
+        pool.reserve("core", "192.0.2.0/30")
+        self.assertEqual(str(pool.allocate("edge")), "192.0.2.4/30")
+        with self.assertRaises(ValueError):
+            pool.allocate("one-too-many")
+        with self.assertRaises(ValueError):
+            pool.reserve("other", "192.0.2.0/30") # Taken
+        with self.assertRaises(ValueError):
+            pool.reserve("other", "198.51.100.0/30") # Outside the pool
+        with self.assertRaises(ValueError):
+            SubnetPool("bad", "10.0.0.0/24", 16)
+
+    def test_allocate_many_matches_allocate(self):
+        pool = SubnetPool("p2p", "10.0.0.0/8", 30)
+        pool.allocate("first")
+        pool.reserve("pinned", "10.0.0.8/30")
+        batch = pool.allocate_many(["x", "y", "first", "z"])
+        self.assertEqual(batch, {"x": "10.0.0.4/30", "y": "10.0.0.12/30", "first": "10.0.0.0/30", "z": "10.0.0.16/30"})
+        self.assertEqual(str(pool.allocate("y")), "10.0.0.12/30")
+
+        v6 = SubnetPool("lan6", "fd00::/48", 64)
+        self.assertEqual(v6.allocate_many(["a", "b"]), {"a": "fd00::/64", "b": "fd00:0:0:1::/64"})
+
+    def test_allocate_many_is_all_or_nothing(self):
+        pool = SubnetPool("p2p", "192.0.2.0/28", 30)
+        pool.allocate("core")
+        pool.dirty = False
+        with self.assertRaises(ValueError):
+            pool.allocate_many(["a", "b", "c", "d"]) # Only 3 slots left
+        self.assertIsNone(pool.get("a"))
+        self.assertFalse(pool.dirty)
+        self.assertEqual(pool.allocate_many(["a", "b", "c"]),
+                         {"a": "192.0.2.4/30", "b": "192.0.2.8/30", "c": "192.0.2.12/30"})
+
+    def test_scale(self):
+        pool = SubnetPool("p2p", "10.0.0.0/8", 30)
+        start = time.perf_counter()
+        subnets = pool.allocate_many(range(100000))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(set(subnets.values())), 100000)
+        self.assertEqual(subnets[99999], "10.6.26.124/30")
+        self.assertLess(elapsed, 2.0)
+
+
+class TestIPAM(unittest.TestCase):
+    def test_persistence_is_stable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ipam.json")
+            ipam = IPAM(path)
+            ipam.pool("vlan", "10.128.0.0/9", 24)
+            first = ipam.allocate("vlan", "nyc:vlan10")
+            ipam.allocate("vlan", "nyc:vlan20")
+            ipam.save()
+
+            reloaded = IPAM(path)
+            reloaded.pool("vlan").release("nyc:vlan20")
+            self.assertEqual(reloaded.allocate("vlan", "nyc:vlan10"), first)
+            self.assertEqual(str(reloaded.allocate("vlan", "lon:vlan10")), "10.128.1.0/24")
+            with self.assertRaises(ValueError):
+                reloaded.pool("vlan", "10.0.0.0/8", 24) # Different definition
+
+    def test_processes_sharing_the_file_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ipam.json")
+            # Both opened before either saves, like the GUI and a CLI run side by side
+            first, second = IPAM(path), IPAM(path)
+            ctx = {"scenario_mode": "branch", "vlan_ids": ["10"]}
+            site_a = ConfigGenerator(ipam=first).generate(dict(ctx, site_id="siteA"))
+            site_b = ConfigGenerator(ipam=second).generate(dict(ctx, site_id="siteB"))
+            self.assertIn("address=10.128.0.1/24 interface=vlan10", site_a)
+            self.assertIn("address=10.128.1.1/24 interface=vlan10", site_b)
+            saved = IPAM(path).pool("vlan")
+            self.assertEqual(str(saved.get("siteA:vlan10")), "10.128.0.0/24")
+            self.assertEqual(str(saved.get("siteB:vlan10")), "10.128.1.0/24")
+
+            # Concurrent writers, each with its own IPAM instance
+            def render(site):
+                ConfigGenerator(ipam=IPAM(path)).generate(dict(ctx, site_id=site))
+
+            import threading
+            threads = [threading.Thread(target=render, args=(f"site{i}",)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            saved = IPAM(path).pool("vlan")
+            self.assertEqual(len(saved), 10)
+            self.assertEqual(len({str(saved.get(f"site{i}:vlan10")) for i in range(8)}), 8)
+
+    def test_save_merges_and_detects_conflicts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ipam.json")
+            seed = IPAM(path)
+            seed.pool("vlan", "10.128.0.0/9", 24)
+            seed.allocate("vlan", "old")
+            seed.save()
+
+            first, second, stale = IPAM(path), IPAM(path), IPAM(path)
+            first.allocate("vlan", "a")
+            first.save()
+            second.allocate("vlan", "b") # Slot 1 is free here, but taken by "a" on disk
+            with self.assertRaises(ValueError):
+                second.save()
+
+            releaser = IPAM(path)
+            releaser.pool("vlan").release("old")
+            releaser.save()
+            stale.pool("vlan").reserve("c", "10.128.5.0/24")
+            stale.save()
+            merged = IPAM(path).pool("vlan")
+            self.assertIsNone(merged.get("old")) # A release is not undone by other writers
+            self.assertEqual(str(merged.get("a")), "10.128.1.0/24")
+            self.assertEqual(str(merged.get("c")), "10.128.5.0/24")
+
+    def test_branch_vlans_by_site(self):
+        ipam = IPAM()
+        gen = ConfigGenerator(ipam=ipam)
+        ctx = {"scenario_mode": "branch", "vlan_ids": ["10", "300"], "site_id": "nyc"}
+        script = gen.generate(dict(ctx))
+        self.assertIn("/ip address add address=10.128.0.1/24 interface=vlan10", script)
+        self.assertIn("/ip address add address=10.128.1.1/24 interface=vlan300", script) # Past VLAN 255
+
+        other = gen.generate(dict(ctx, site_id="lon"))
+        self.assertIn("address=10.128.2.1/24 interface=vlan10", other)
+        # Regenerating the first site hands out the same subnets
+        self.assertIn("address=10.128.0.1/24 interface=vlan10", gen.generate(dict(ctx)))
+
+        with self.assertRaises(ValueError): # No shared fallback key space
+            gen.generate(dict(ctx, site_id=""))
+
+    def test_network_filters(self):
+        gen = ConfigGenerator()
+        self.assertEqual(gen._filter_network_start("192.168.88.1"), "192.168.88.10")
+        self.assertEqual(gen._filter_network_end("192.168.88.1"), "192.168.88.254")
+        self.assertEqual(gen._filter_network_base("10.1.2.3/16"), "10.1.0.0")
+        self.assertEqual(gen._filter_network_end("10.1.2.3/16"), "10.1.255.254")
+        self.assertEqual(gen._filter_prefixlen("10.1.2.3/16"), 16)
+        self.assertEqual(gen._filter_ip_interface("10.128.5.0/24"), "10.128.5.1/24")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.journal import DeploymentJournal
+from logic.deployer import Deployer
+from test_deployer import make_mock_client
+
+
+class TestDeploymentJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "journal.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_replay_restores_latest_state(self):
+        with DeploymentJournal(self.path) as journal:
+            journal.record("10.0.0.1", "started")
+            journal.record("10.0.0.1", "scheduled")
+            journal.record("10.0.0.2", "started")
+            journal.record("10.0.0.2", "confirmed")
+
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.latest("10.0.0.1")["state"], "scheduled")
+            self.assertEqual(journal.latest("10.0.0.2")["state"], "confirmed")
+            self.assertIsNone(journal.latest("10.0.0.3"))
+            self.assertEqual([r["state"] for r in journal.history("10.0.0.1")], ["started", "scheduled"])
+            self.assertEqual([r["device"] for r in journal.pending()], ["10.0.0.1"])
+
+    def test_torn_tail_is_dropped(self):
+        with DeploymentJournal(self.path) as journal:
+            journal.record("r1", "started")
+            journal.record("r1", "uploaded")
+        with open(self.path, "ab") as f:
+            f.write(b'{"ts": 1, "device": "r1", "sta')  # Killed mid-write
+
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.latest("r1")["state"], "uploaded")
+            journal.record("r1", "scheduled")
+
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual([r["state"] for r in journal.history("r1")], ["started", "uploaded", "scheduled"])
+
+    def test_corrupt_line_in_the_middle_is_skipped(self):
+        with DeploymentJournal(self.path) as journal:
+            journal.record("r1", "started")
+        with open(self.path, "ab") as f:
+            f.write(b'{"ts": 1, "dev\xff garbage\n')
+        with DeploymentJournal(self.path) as journal:
+            journal.record("r1", "scheduled")
+            journal.record("r2", "started")
+
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(len(journal.corrupt), 1)
+            self.assertEqual([r["state"] for r in journal.history("r1")], ["started", "scheduled"])
+            self.assertEqual(journal.latest("r2")["state"], "started")
+
+    def test_processes_sharing_the_file(self):
+        a = DeploymentJournal(self.path)
+        b = DeploymentJournal(self.path)
+        a.record("r1", "started", ip="192.168.88.1", target="10.0.0.1")
+        b.record("r2", "started", ip="192.168.88.2", target="10.0.0.2")
+        a.record("r1", "uploaded")
+        b.record("r2", "scheduled")
+        self.assertEqual([r["state"] for r in a.history("r1")], ["started", "uploaded"])
+        self.assertEqual([r["state"] for r in b.history("r2")], ["started", "scheduled"])
+        self.assertEqual(a.latest("r2")["state"], "scheduled") # Sees the other writer's records
+
+        with patch("logic.journal.time.time", return_value=time.time() + DeploymentJournal.STALE_AFTER + 1):
+            plan = a.recover()
+        self.assertEqual([(r["device"], r["target"]) for r in plan["redeploy"]], [("r1", "10.0.0.1")])
+        self.assertEqual([(r["device"], r["target"]) for r in plan["verify"]], [("r2", "10.0.0.2")])
+
+        # Compaction in one process does not swallow the other's later appends
+        a.compact()
+        b.record("r3", "started")
+        a.record("r4", "started")
+        self.assertEqual(b.latest("r4")["state"], "started")
+        a.close()
+        b.close()
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.latest("r3")["state"], "started")
+            self.assertEqual(journal.latest("r1")["state"], "interrupted")
+            self.assertEqual(journal.corrupt, [])
+
+    def test_fsync_is_batched(self):
+        with patch("logic.journal.os.fsync") as fsync:
+            journal = DeploymentJournal(self.path, sync_every=10, sync_interval=3600)
+            for i in range(25):
+                journal.record(f"r{i}", "started")
+            self.assertEqual(fsync.call_count, 2)
+            journal.record("r0", "scheduled", sync=True)
+            self.assertEqual(fsync.call_count, 3)
+            journal.close()
+
+    def test_interrupted_plan_and_compaction(self):
+        journal = DeploymentJournal(self.path)
+        for i in range(1000):
+            journal.record(f"r{i}", "started")
+            journal.record(f"r{i}", "uploaded")
+            if i % 2:
+                journal.record(f"r{i}", "scheduled")
+            if i % 4 == 3:
+                journal.record(f"r{i}", "confirmed")
+
+        plan = journal.interrupted()
+        self.assertEqual(len(plan["redeploy"]), 500)
+        self.assertEqual(len(plan["verify"]), 250)
+
+        journal.compact()
+        journal.record("r0", "failed")
+        journal.close()
+
+        with open(self.path) as f:
+            self.assertEqual(sum(1 for _ in f), 1001)
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.latest("r0")["state"], "failed")
+            self.assertEqual(len(journal.interrupted()["verify"]), 250)
+
+    def test_recover_marks_stale_entries_interrupted(self):
+        with DeploymentJournal(self.path) as journal:
+            journal.record("r1", "started", ip="192.168.88.1", target="10.0.0.1")
+            journal.record("r1", "uploaded")
+            journal.record("r2", "started", ip="192.168.88.2", target="10.0.0.2")
+            journal.record("r2", "scheduled")
+            journal.record("r3", "started", ip="192.168.88.3")
+            journal.record("r3", "confirmed")
+
+        # A fresh entry may belong to a deployment still running elsewhere
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.recover(), {"redeploy": [], "verify": []})
+
+        with patch("logic.journal.time.time", return_value=time.time() + DeploymentJournal.STALE_AFTER + 1):
+            with DeploymentJournal(self.path) as journal:
+                plan = journal.recover()
+        self.assertEqual([r["device"] for r in plan["redeploy"]], ["r1"])
+        self.assertEqual([r["device"] for r in plan["verify"]], ["r2"])
+        self.assertEqual(plan["verify"][0]["previous"], "scheduled")
+        self.assertEqual(plan["verify"][0]["target"], "10.0.0.2")
+
+        # Terminal now: the next start has nothing left to recover
+        with DeploymentJournal(self.path) as journal:
+            self.assertEqual(journal.latest("r1")["state"], "interrupted")
+            self.assertEqual(journal.pending(), [])
+            self.assertEqual(journal.recover(stale_after=0), {"redeploy": [], "verify": []})
+
+    def test_deployer_records_transitions(self):
+        journal = DeploymentJournal(self.path)
+        deployer = Deployer(journal=journal)
+        client = make_mock_client()
+
+        async def online(*args, **kwargs):
+            return True
+
+        async def run():
+            return [ev async for ev in deployer.deploy_configuration_async(
+                "192.168.88.1", "admin", "", "/system identity set name=t\n", "10.0.0.1",
+                device_id="branch-7"
+            )]
+
+        with patch.object(deployer, "_create_ssh_client", return_value=client), \
+             patch.object(deployer, "_probe_ssh", side_effect=online):
+            asyncio.run(run())
+        journal.close()
+
+        with DeploymentJournal(self.path) as journal:
+            states = [r["state"] for r in journal.history("branch-7")]
+        self.assertEqual(states, ["started", "uploaded", "snapshot", "scheduled", "online", "confirmed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
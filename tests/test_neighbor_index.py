@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from discovery.neighbor_index import NeighborIndex
+
+
+def make_neighbors(count):
+    return [
+        {"mac": f"00:00:00:00:{i // 256:02x}:{i % 256:02x}", "identity": f"Site{i:04d}-RTR",
+         "ip": f"10.{i // 256}.{i % 256}.1", "version": "7.15.3" if i % 2 else "6.49.10", "uptime": i}
+        for i in range(count)
+    ]
+
+
+class TestNeighborIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NeighborIndex()
+        self.index.rebuild(make_neighbors(5000), health={"10.0.1.1": "down"}, generation=1)
+
+    def test_prefix_filters(self):
+        hits = self.index.query(identity="site01")
+        self.assertEqual(len(hits), 100)
+        self.assertTrue(all(self.index.rows[i]["identity"].startswith("Site01") for i in hits))
+
+        both = self.index.query(identity="site01", version="7")
+        self.assertEqual(len(both), 50)
+        self.assertTrue(all(self.index.rows[i]["version"] == "7.15.3" for i in both))
+
+        self.assertEqual(self.index.query(identity="nomatch"), [])
+
+    def test_sorting(self):
+        by_ip = self.index.window(self.index.query(sort="ip"), 0, 3)
+        self.assertEqual([r["ip"] for r in by_ip], ["10.0.0.1", "10.0.1.1", "10.0.2.1"])
+        self.assertEqual(by_ip[1]["health"], "down")
+
+        # 10.0.10.1 sorts after 10.0.9.1 numerically, not as a string
+        ordered = [self.index.rows[i]["ip"] for i in self.index.query(sort="ip")]
+        self.assertLess(ordered.index("10.0.9.1"), ordered.index("10.0.10.1"))
+
+        newest = self.index.window(self.index.query(sort="uptime", descending=True), 0, 1)[0]
+        self.assertEqual(newest["uptime"], 4999)
+
+        filtered = self.index.query(identity="site000", sort="uptime", descending=True)
+        self.assertEqual([self.index.rows[i]["uptime"] for i in filtered], list(range(9, -1, -1)))
+
+    def test_version_sorts_numerically(self):
+        index = NeighborIndex()
+        versions = ["7.10", "7.9", "", "7.12beta3", "6.49.10", "7.12", "7.10.2"]
+        index.rebuild([{"identity": str(i), "version": v} for i, v in enumerate(versions)])
+        ordered = [index.rows[i]["version"] for i in index.query(sort="version")]
+        self.assertEqual(ordered, ["", "6.49.10", "7.9", "7.10", "7.10.2", "7.12", "7.12beta3"])
+
+    def test_staleness(self):
+        self.assertFalse(self.index.is_stale(1))
+        self.assertTrue(self.index.is_stale(2))
+        with self.assertRaises(ValueError):
+            self.index.order("password")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.qos import QosPlanner
+from logic.generator import ConfigGenerator
+
+TIERS = [
+    {"name": "gold", "download": "50M", "upload": "10M", "priority": 1},
+    {"name": "basic", "download": "10000k", "upload": "2M"},
+]
+
+
+class TestQosPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = QosPlanner()
+
+    def test_rates(self):
+        self.assertEqual(self.planner.parse_rate("1.5M"), 1500000)
+        self.assertEqual(self.planner.format_rate(self.planner.parse_rate("10000k")), "10M")
+        for bad in ("fast", "-1M", "0", "10T"):
+            with self.assertRaises(ValueError):
+                self.planner.parse_rate(bad)
+
+    def test_plan_groups_and_sorts(self):
+        plan = self.planner.plan(TIERS, [
+            {"address": "10.0.0.20", "tier": "gold"},
+            {"address": "10.0.0.3", "tier": "gold"},
+            {"address": "10.0.1.0/29", "tier": "basic"},
+            {"address": "10.0.0.3", "tier": "gold"}, # Duplicate in the same tier is ignored
+        ])
+        self.assertEqual(plan['address_lists']['qos-gold'], ["10.0.0.3", "10.0.0.20"])
+        self.assertEqual(plan['address_lists']['qos-basic'], ["10.0.1.0/29"])
+        self.assertEqual(plan['subscriber_count'], 3)
+        self.assertEqual(plan['tiers'][1]['download'], "10M")
+        self.assertEqual(plan['tiers'][1]['priority'], QosPlanner.DEFAULT_PRIORITY)
+        self.assertEqual(plan['wan_match'], "interface-list=WAN")
+
+    def test_ipv6_subscribers_get_their_own_family(self):
+        subscribers = [
+            {"address": "10.0.0.3", "tier": "gold"},
+            {"address": "2001:db8:10::/56", "tier": "gold"},
+            {"address": "2001:db8::1", "tier": "basic"},
+        ]
+        plan = self.planner.plan(TIERS, subscribers)
+        self.assertEqual(plan['address_lists']['qos-gold'], ["10.0.0.3"])
+        self.assertEqual(plan['address_lists6']['qos-gold'], ["2001:db8:10::/56"])
+        self.assertEqual(plan['tiers'][0]['subscribers'], 2)
+        self.assertEqual([f['name'] for f in plan['families']], ["ip", "ipv6"])
+
+        script = ConfigGenerator().generate({"lan_ip": "192.168.88.1", "admin_pass": "test",
+                                             "qos_tiers": TIERS, "qos_subscribers": subscribers})
+        v4 = script[script.index("/ip firewall address-list"):script.index("/ip firewall mangle")]
+        v6 = script[script.index("/ipv6 firewall address-list"):script.index("/ipv6 firewall mangle")]
+        self.assertIn("address=10.0.0.3", v4)
+        self.assertNotIn("2001:db8", v4)
+        self.assertIn("add list=qos-gold address=2001:db8:10::/56", v6)
+        self.assertIn("add list=qos-basic address=2001:db8::1", v6)
+        self.assertEqual(script.count("action=mark-packet"), 8) # Both families classify
+        self.assertEqual(script.count("kind=pcq"), 4) # Queues stay shared
+
+        v4_only = self.planner.plan(TIERS, subscribers[:1])
+        self.assertEqual([f['name'] for f in v4_only['families']], ["ip"])
+
+    def test_plan_rejects_bad_input(self):
+        cases = [
+            ([], []),
+            ([{"name": "bad name", "download": "1M", "upload": "1M"}], []),
+            (TIERS + [TIERS[0]], []),
+            (TIERS, [{"address": "10.0.0.1", "tier": "platinum"}]),
+            (TIERS, [{"address": "10.0.0.999", "tier": "gold"}]),
+            (TIERS, [{"address": "10.0.0.1", "tier": "gold"}, {"address": "10.0.0.1", "tier": "basic"}]),
+        ]
+        for tiers, subscribers in cases:
+            with self.assertRaises(ValueError):
+                self.planner.plan(tiers, subscribers)
+
+    def test_wisp_tower_scale(self):
+        # 10k subscribers: rules and queues stay per tier, only the address lists grow
+        subscribers = [
+            {"address": f"100.64.{i // 256}.{i % 256}", "tier": "gold" if i % 4 == 0 else "basic"}
+            for i in range(10000)
+        ]
+        ctx = {
+            "scenario_mode": "wisp",
+            "mgmt_ip": "10.0.0.0/24",
+            "ospf_area": "0.0.0.0",
+            "qos_tiers": TIERS,
+            "qos_subscribers": subscribers,
+            "qos_uplink": {"download": "2G", "upload": "1G"},
+        }
+        script = ConfigGenerator().generate(ctx)
+        self.assertEqual(script.count("add list=qos-"), 10000)
+        self.assertEqual(script.count("action=mark-packet"), 4)
+        self.assertEqual(script.count("kind=pcq"), 4)
+        self.assertIn("add name=qos-download parent=global max-limit=2G", script)
+        self.assertIn("out-interface=ether1", script)
+        self.assertNotIn("/queue simple", script)
+
+    def test_base_template_pcq_disables_fasttrack(self):
+        ctx = {
+            "lan_ip": "192.168.88.1",
+            "admin_pass": "test",
+            "qos_type": "cake",
+            "qos_tiers": TIERS,
+            "qos_subscribers": [{"address": "192.168.88.10", "tier": "gold"}],
+        }
+        script = ConfigGenerator().generate(ctx)
+        self.assertIn("/queue tree", script)
+        self.assertIn("in-interface-list=WAN", script)
+        self.assertNotIn("Global-Queue", script)
+        self.assertNotIn("action=fasttrack-connection", script)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import re
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from logic.generator import ConfigGenerator
+from logic.render_profiler import RenderProfile
+
+BASE = {
+    "admin_user": "admin", "admin_pass": "pass", "lan_ip": "192.168.88.1",
+    "vpn_enabled": True, "address_lists": {"blocked": ["203.0.113.0/25", "203.0.113.128/25", "198.51.100.7"]},
+}
+
+
+def strip_date(script):
+    return re.sub(r"Date: .*", "", script)
+
+
+class TestRenderProfiler(unittest.TestCase):
+    def test_profile_covers_templates_loops_and_filters(self):
+        generator = ConfigGenerator(profile=True)
+        generator.generate(dict(BASE))
+        summary = generator.last_profile.summary()
+
+        self.assertIn("routeros_v7_base.j2", summary["templates"])
+        self.assertIn("security_hardening.j2", summary["templates"])
+        self.assertIn("address_lists.j2", summary["templates"])
+        self.assertIn("join", summary["filters"])
+        self.assertGreaterEqual(summary["filters"]["default"]["calls"], 2)
+        self.assertTrue(any(name.startswith("address_lists.j2: list") for name in summary["loops"]))
+        self.assertEqual(set(summary["stages"]), {"generate", "prepare", "render"})
+        self.assertIn("routeros_v7_base.j2", summary["compile"])
+        self.assertAlmostEqual(summary["total_ms"], summary["stages"]["generate"]["total_ms"], places=2)
+        for group in ("templates", "loops", "filters"):
+            for entry in summary[group].values():
+                self.assertLessEqual(entry["self_ms"], entry["total_ms"] + 1e-3)
+
+        # Templates are cached: the second run no longer compiles
+        generator.generate(dict(BASE), compact=True)
+        summary = generator.last_profile.summary()
+        self.assertEqual(summary["compile"], {})
+        self.assertIn("compact", summary["stages"])
+
+    def test_output_unchanged(self):
+        profiled = ConfigGenerator(profile=True).generate(dict(BASE))
+        plain = ConfigGenerator()
+        self.assertEqual(strip_date(profiled), strip_date(plain.generate(dict(BASE))))
+        self.assertIsNone(plain.last_profile)
+        survival = {"scenario_mode": "survival"}
+        self.assertEqual(strip_date(ConfigGenerator(profile=True).generate(dict(survival))),
+                         strip_date(ConfigGenerator().generate(dict(survival))))
+
+    def test_folded_stacks(self):
+        generator = ConfigGenerator(profile=True)
+        generator.generate(dict(BASE))
+        lines = generator.last_profile.folded().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r"^\S+ \d+$")
+        self.assertTrue(any(line.startswith("generate;render;routeros_v7_base.j2;security_hardening.j2;")
+                            for line in lines))
+
+    def test_self_time_excludes_children(self):
+        profile = RenderProfile()
+        profile.enter("generate")
+        profile.add("filter join", 0.5)
+        profile.add("filter join", 0.25)
+        profile.exit()
+        calls, inclusive, own = profile.frames[("generate",)]
+        self.assertEqual(calls, 1)
+        self.assertAlmostEqual(own, inclusive - 0.75)
+        self.assertEqual(profile.summary()["filters"]["join"]["calls"], 2)
+        self.assertIn("generate;filter_join 750000", profile.folded())
+
+
+if __name__ == '__main__':
+    unittest.main()
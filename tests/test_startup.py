@@ -0,0 +1,31 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+
+import startup_bench
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_dependencies_are_lazy(self):
+        # Guards the cold-start path: importing main must not pull in Scapy/paramiko/Jinja2
+        result = startup_bench.measure("main", runs=1)
+        self.assertGreater(result["total_ms"], 0)
+        for package in startup_bench.DEFAULT_FORBIDDEN:
+            self.assertNotIn(package, result["packages"], f"{package} is imported at startup")
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   json.decoder\n"
+            "import time:       400 |        500 | json\n"
+            "import time:      1000 |       1500 | main\n"
+        )
+        result = startup_bench.parse_importtime(stderr, "main")
+        self.assertEqual(result["total_ms"], 1.5)
+        self.assertEqual(result["packages"], {"json": 0.5, "main": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
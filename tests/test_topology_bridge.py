@@ -0,0 +1,91 @@
+import http.client
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from server.asset_server import AssetServer
+from server.topology_bridge import TopologyBridge, encode_element
+
+
+def node(node_id, label="R1", health="up", **extra):
+    data = {"id": node_id, "label": label, "color": "#007acc", "health": health}
+    data.update(extra)
+    return {"data": data}
+
+
+class TestTopologyBridge(unittest.TestCase):
+    def test_encode_drops_info_and_shortens_keys(self):
+        wire = encode_element({"id": "aa", "label": "R1", "health": "down", "parent": "subnet:10.0.0.0/24",
+                               "info": {"ip": "10.0.0.1", "identity": "R1", "version": "7.15"}})
+        self.assertEqual(wire, {"i": "aa", "l": "R1", "h": "d", "p": "subnet:10.0.0.0/24", "a": "10.0.0.1"})
+        self.assertEqual(encode_element({"id": "subnet:x", "cluster": True})["k"], "c")
+
+    def test_publish_emits_deltas(self):
+        bridge = TopologyBridge()
+        frame = bridge.publish([node("PC"), node("aa")])
+        self.assertEqual([e["i"] for e in frame["a"]], ["PC", "aa"])
+
+        # Same state again: nothing to send
+        self.assertIsNone(bridge.publish([node("PC"), node("aa")]))
+
+        frame = bridge.publish([node("PC"), node("aa", health="down"), node("bb")])
+        self.assertEqual(frame["u"], [{"i": "aa", "l": "R1", "c": "#007acc", "h": "d"}])
+        self.assertEqual([e["i"] for e in frame["a"]], ["bb"])
+        self.assertNotIn("r", frame)
+
+        frame = bridge.publish([node("PC"), node("bb")])
+        self.assertEqual(frame, {"q": 3, "r": ["aa"]})
+
+    def test_subscriber_gets_reset_then_deltas(self):
+        bridge = TopologyBridge()
+        bridge.publish([node("PC"), node("aa")])
+        stream = bridge.subscribe(heartbeat=0.05)
+
+        first = json.loads(next(stream).decode().split("data: ", 1)[1])
+        self.assertEqual(first["x"], 1)
+        self.assertEqual(len(first["a"]), 2)
+
+        self.assertEqual(next(stream), b": ping\n\n")
+        bridge.publish([node("PC")])
+        message = next(stream).decode()
+        self.assertTrue(message.startswith("id: 2\n"))
+        self.assertEqual(json.loads(message.split("data: ", 1)[1]), {"q": 2, "r": ["aa"]})
+
+        bridge.close()
+        self.assertEqual(list(stream), [])
+
+    def test_slow_subscriber_is_reset(self):
+        bridge = TopologyBridge(history=2)
+        stream = bridge.subscribe(heartbeat=0.05)
+        next(stream)
+        for i in range(5):
+            bridge.publish([node(f"n{i}")])
+        frame = json.loads(next(stream).decode().split("data: ", 1)[1])
+        self.assertEqual(frame["x"], 1)
+        self.assertEqual([e["i"] for e in frame["a"]], ["n4"])
+
+    def test_stream_over_asset_server(self):
+        bridge = TopologyBridge()
+        bridge.publish([node("PC")])
+        server = AssetServer()
+        server.add_stream("/bridge", bridge.subscribe)
+        server.start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            conn.request("GET", "/bridge")
+            resp = conn.getresponse()
+            self.assertEqual(resp.status, 200)
+            self.assertTrue(resp.getheader("Content-Type").startswith("text/event-stream"))
+            self.assertEqual(resp.readline(), b"id: 1\n")
+            self.assertIn(b'"i":"PC"', resp.readline())
+            conn.close()
+        finally:
+            bridge.close()
+            server.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import sys
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from discovery.tzsp_receiver import TZSPReceiver, PcapRingWriter, decapsulate, classify
+
+
+def ethernet(ethertype, payload=b"", vlan=None):
+    header = b"\x11" * 6 + b"\x22" * 6
+    if vlan is not None:
+        header += struct.pack("!HH", 0x8100, vlan)
+    return header + struct.pack("!H", ethertype) + payload
+
+
+def ipv4(protocol, size=40):
+    return bytes([0x45, 0]) + struct.pack("!H", size) + b"\0" * 5 + bytes([protocol]) + b"\0" * (size - 10)
+
+
+def tzsp(frame, encapsulation=1, tags=b""):
+    return bytes([1, 0]) + struct.pack("!H", encapsulation) + tags + b"\x01" + frame
+
+
+def read_pcapng(path):
+    """Returns [(block type, body)] for every block in a pcapng file."""
+    blocks = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        block_type, length = struct.unpack_from("<II", data, offset)
+        trailer = struct.unpack_from("<I", data, offset + length - 4)[0]
+        assert trailer == length, "block length mismatch"
+        blocks.append((block_type, data[offset + 8:offset + length - 4]))
+        offset += length
+    return blocks
+
+
+class TestDecapsulation(unittest.TestCase):
+    def test_tags_are_skipped(self):
+        frame = ethernet(0x0800, ipv4(6))
+        packet = tzsp(frame, tags=b"\x00\x0a\x04\x00\x00\x00\x07")
+        encapsulation, offset = decapsulate(packet, len(packet))
+        self.assertEqual(encapsulation, 1)
+        self.assertEqual(packet[offset:], frame)
+
+    def test_rejects_garbage(self):
+        for data in (b"", b"\x02\x00\x00\x01\x01", b"\x01\x00\x00\x01\x0a\x30", b"\x01\x00\x00\x01\x00"):
+            self.assertIsNone(decapsulate(data, len(data)))
+
+    def test_classify(self):
+        cases = [
+            (ethernet(0x0800, ipv4(6)), "tcp"),
+            (ethernet(0x0800, ipv4(17), vlan=10), "udp"),
+            (ethernet(0x86DD, b"\x60\0\0\0\0\x08\x3a\x40"), "icmpv6"),
+            (ethernet(0x0806, b"\0" * 28), "arp"),
+            (ethernet(0x88B5), "0x88b5"),
+            (b"\0" * 10, "malformed"),
+        ]
+        for frame, expected in cases:
+            self.assertEqual(classify(frame, 0, len(frame)), expected)
+
+
+class TestTZSPReceiver(unittest.TestCase):
+    def setUp(self):
+        self.capture_dir = tempfile.mkdtemp()
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.sender.close()
+        shutil.rmtree(self.capture_dir)
+
+    def send(self, receiver, packets):
+        for packet in packets:
+            self.sender.sendto(packet, ("127.0.0.1", receiver.port))
+
+    def drain(self, receiver, expected):
+        handled = 0
+        while handled < expected:
+            count = receiver.receive_batch(timeout=2)
+            if not count:
+                break
+            handled += count
+        return handled
+
+    def test_counters_and_pcapng(self):
+        writer = PcapRingWriter(self.capture_dir)
+        receiver = TZSPReceiver(host="127.0.0.1", port=0, writer=writer, batch=16)
+        receiver.bind()
+        try:
+            tcp = tzsp(ethernet(0x0800, ipv4(6, 60)))
+            udp = tzsp(ethernet(0x0800, ipv4(17, 30)))
+            self.send(receiver, [tcp] * 20 + [udp] * 5 + [b"not tzsp"])
+            self.assertEqual(self.drain(receiver, 26), 26)
+        finally:
+            receiver.stop()
+
+        stats = receiver.get_stats()
+        self.assertEqual(stats["packets"], 25)
+        self.assertEqual(stats["malformed"], 1)
+        self.assertEqual(stats["protocols"]["tcp"], {"packets": 20, "bytes": 20 * 74})
+        self.assertEqual(stats["protocols"]["udp"]["packets"], 5)
+        self.assertEqual(stats["sources"], {"127.0.0.1": 25})
+
+        blocks = read_pcapng(writer.files[0])
+        self.assertEqual([b[0] for b in blocks[:2]], [0x0A0D0D0A, 1])
+        linktype, _, snaplen = struct.unpack_from("<HHI", blocks[1][1])
+        self.assertEqual((linktype, snaplen), (1, 65535))
+        self.assertIn(b"127.0.0.1", blocks[1][1])
+        packets = [body for block_type, body in blocks if block_type == 6]
+        self.assertEqual(len(packets), 25)
+        interface, _, _, captured, original = struct.unpack_from("<IIIII", packets[0])
+        self.assertEqual((interface, captured, original), (0, 74, 74))
+        self.assertEqual(packets[0][20:20 + captured], tcp[5:])
+
+    def test_pcap_ring_rotates(self):
+        writer = PcapRingWriter(self.capture_dir, format="pcap", max_bytes=2000, max_files=3)
+        frame = ethernet(0x0800, ipv4(6, 486)) # 500 bytes; 4 records fill a file
+        for n in range(18):
+            writer.write("10.0.0.1", 1, 1700000000000000 + n, frame)
+        writer.write("10.0.0.1", 105, 1700000000000000, b"\0" * 24) # Other link type: skipped
+        writer.close()
+
+        self.assertEqual(len(writer.files), 3)
+        self.assertEqual(sorted(os.listdir(self.capture_dir)), sorted(os.path.basename(p) for p in writer.files))
+        self.assertEqual(writer.skipped, 1)
+        with open(writer.files[-1], "rb") as f:
+            data = f.read()
+        magic, _, _, _, _, _, linktype = struct.unpack_from("<IHHiIII", data)
+        self.assertEqual((magic, linktype), (0xA1B2C3D4, 1))
+        seconds, micros, captured, original = struct.unpack_from("<IIII", data, 24)
+        self.assertEqual((seconds, captured, original), (1700000000, 500, 500))
+        self.assertEqual(len(data), 24 + 2 * (16 + 500))
+
+    def test_background_thread(self):
+        receiver = TZSPReceiver(host="127.0.0.1", port=0)
+        receiver.start()
+        try:
+            self.send(receiver, [tzsp(ethernet(0x0806, b"\0" * 28))] * 3)
+            for _ in range(100):
+                if receiver.get_stats()["packets"] == 3:
+                    break
+                time.sleep(0.02)
+        finally:
+            receiver.stop()
+        self.assertEqual(receiver.get_stats()["protocols"], {"arp": {"packets": 3, "bytes": 3 * 42}})
+
+
+if __name__ == '__main__':
+    unittest.main()
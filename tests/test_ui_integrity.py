@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "s
 
 from ui.wizard import Wizard
 from ui.monitor import TrafficMonitor
+from ui.inventory import DeviceInventory
 
 class TestUIIntegrity(unittest.TestCase):
     def test_wizard_structure(self):
@@ -28,6 +29,21 @@ class TestUIIntegrity(unittest.TestCase):
         self.assertTrue(hasattr(wizard, 'hotspot_chk'), "Wizard should have hotspot_chk")
         self.assertTrue(hasattr(wizard, 'voip_chk'), "Wizard should have voip_chk")
 
+    def test_wizard_scenario_switch_reuses_controls(self):
+        wizard = Wizard()
+        tabs = wizard.tabs
+        controls = wizard.controls
+
+        wizard.scenario_dropdown.value = "branch"
+        wizard.scenario_dropdown.on_change(None)
+
+        # The model follows the widget, the tab tree is not rebuilt
+        self.assertEqual(wizard.form.scenario_mode, "branch")
+        self.assertIs(wizard.tabs, tabs)
+        self.assertIs(wizard.controls, controls)
+        self.assertTrue(wizard.vlan_ids.visible)
+        self.assertFalse(wizard.mgmt_ip.visible)
+
     def test_monitor_structure(self):
         # Instantiate TrafficMonitor
         # It requires args: router_ip, router_user, router_pass
@@ -51,5 +67,20 @@ class TestUIIntegrity(unittest.TestCase):
 
         self.assertTrue(found_chart, "Monitor should contain a LineChart")
 
+    def test_inventory_renders_window_only(self):
+        inventory = DeviceInventory()
+        neighbors = [{"mac": f"m{i}", "identity": f"R{i:05d}", "ip": f"10.0.{i // 250}.{i % 250 + 1}", "version": "7.15"} for i in range(5000)]
+        inventory.refresh(neighbors, generation=1)
+
+        # Only WINDOW row controls exist, the rest is spacer height
+        self.assertEqual(len(inventory.list_view.controls), inventory.WINDOW + 2)
+        self.assertEqual(inventory._bottom_spacer.height, (5000 - inventory.WINDOW) * inventory.ROW_HEIGHT)
+        self.assertIn("5000 of 5000", inventory.count_text.value)
+
+        inventory.identity_filter.value = "R0000"
+        inventory._on_filter(None)
+        self.assertIn("10 of 5000", inventory.count_text.value)
+        self.assertEqual(sum(1 for row in inventory._rows if row.visible), 10)
+
 if __name__ == "__main__":
     unittest.main()
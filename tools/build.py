@@ -2,6 +2,7 @@ import os
 import sys
 import platform
 import subprocess
+import vendor_assets
 
 def build():
     system = platform.system()
@@ -12,6 +13,11 @@ def build():
     
     # Asset Path: assets/ -> assets/
     assets_arg = f"assets{sep}assets"
+
+    # Front-end libraries must be bundled: field laptops are usually offline
+    if not vendor_assets.vendor():
+        print("Build Failed: vendored assets are missing or altered (see above).")
+        return
     
     # PyInstaller Command
     cmd = [
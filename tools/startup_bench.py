@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+
+# Modules that must stay out of the startup path (loaded lazily by their views/actions)
+DEFAULT_FORBIDDEN = ("scapy", "paramiko", "netmiko", "jinja2")
+
+
+def measure(module="main", runs=3):
+    """
+    Imports `module` in fresh interpreters with -X importtime.
+
+    Returns:
+        dict: total_ms (best of `runs`), modules ({name: cumulative_ms} from the best run)
+              and packages ({top-level package: self_ms summed}).
+    """
+    env = os.environ.copy()
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+        result = parse_importtime(proc.stderr, module)
+        if best is None or result["total_ms"] < best["total_ms"]:
+            best = result
+    return best
+
+
+def parse_importtime(stderr, module):
+    modules = {}
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules[name] = int(cumulative_us) / 1000
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + int(self_us) / 1000
+    return {"total_ms": modules.get(module, 0.0), "modules": modules, "packages": packages}
+
+
+def report(result, top=15):
+    lines = [f"Startup import time: {result['total_ms']:.1f} ms", "", "Top packages (self time):"]
+    for name, ms in sorted(result["packages"].items(), key=lambda kv: -kv[1])[:top]:
+        lines.append(f"  {ms:9.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Titan cold-start import time.")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to try; best run is reported")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the import takes longer than this")
+    parser.add_argument("--forbid", nargs="*", default=list(DEFAULT_FORBIDDEN),
+                        help="Top-level packages that must not be imported at startup")
+    parser.add_argument("--json", action="store_true", help="Print the raw measurement as JSON")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    text = json.dumps(result, indent=2) if args.json else report(result)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    failures = []
+    leaked = sorted(p for p in args.forbid if p in result["packages"])
+    if leaked:
+        failures.append(f"Heavy packages imported at startup: {', '.join(leaked)}")
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        failures.append(f"Import time {result['total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
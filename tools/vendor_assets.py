@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+import re
+import sys
+import tarfile
+import urllib.request
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+VENDOR_DIR = os.path.join(PROJECT_ROOT, "assets", "vendor")
+
+# Third-party front-end libraries served locally by the asset server. The files are
+# committed under assets/vendor; this table pins them and records how to rebuild them.
+# File names carry the version so they can be cached as immutable.
+#   source / member: npm tarball and the file inside it the asset is built from
+#   source_sha256:   checksum of that member
+#   global:          the ES module build is wrapped into a classic script that sets window.<global>
+#   sha256:          checksum of the committed asset
+VENDORED = {
+    "cytoscape-3.30.4.js": {
+        "source": "https://registry.npmjs.org/cytoscape/-/cytoscape-3.30.4.tgz",
+        "member": "package/dist/cytoscape.esm.mjs",
+        "source_sha256": "6e46c610725b0dbfbce0db8a5cea6139f79445c688d37574c5e8226299c74dcc",
+        "global": "cytoscape",
+        "sha256": "a252b161a990bffbcf57cbdf5942386b2b7c61a652d20d52643ba3c73f9891a9",
+    },
+}
+
+_EXPORT_DEFAULT = re.compile(r"^export \{ (\w+) as default \};[ \t]*$", re.M)
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def wrap_module(name, spec, module_source):
+    """
+    Turns a self-contained ES module build (no imports, one default export) into a
+    classic script, so the page can load it with a plain <script src> before its
+    own inline code runs.
+    """
+    text = module_source.decode("utf-8")
+    exports = _EXPORT_DEFAULT.findall(text)
+    if len(exports) != 1 or re.search(r"^(import|export) ", _EXPORT_DEFAULT.sub("", text), re.M):
+        raise ValueError(f"{spec['member']} is not a self-contained module with a single default export")
+    body = _EXPORT_DEFAULT.sub(f"window.{spec['global']} = {exports[0]};", text)
+    header = (
+        f"/*! {name}: {spec['member']} from {spec['source']},\n"
+        f"    wrapped as a classic script (window.{spec['global']}) by tools/vendor_assets.py */\n"
+    )
+    return (header + "(function () {\n'use strict';\n" + body + "})();\n").encode("utf-8")
+
+
+def problem(name):
+    """Why assets/vendor/<name> cannot be used (missing or altered), or None if it verifies."""
+    path = os.path.join(VENDOR_DIR, name)
+    if not os.path.exists(path):
+        return f"Missing vendored asset: assets/vendor/{name}"
+    with open(path, "rb") as f:
+        digest = sha256(f.read())
+    if digest != VENDORED[name]["sha256"]:
+        return f"Checksum mismatch: assets/vendor/{name} is {digest}, expected {VENDORED[name]['sha256']}"
+    return None
+
+
+def check():
+    """Returns a problem description for every vendored file that is missing or altered."""
+    return [p for p in map(problem, VENDORED) if p]
+
+
+def _fetch_member(spec):
+    with urllib.request.urlopen(spec["source"], timeout=60) as resp:
+        archive = resp.read()
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+        return tar.extractfile(spec["member"]).read()
+
+
+def vendor(force=False, sources=None):
+    """
+    Rebuilds vendored files that are missing or fail their checksum (all of them with
+    force=True). The module source comes from its npm tarball, or from a local copy
+    given in `sources` ({asset name: path}) on machines without registry access.
+    Returns True if every file is present and verified afterwards.
+    """
+    sources = sources or {}
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    ok = True
+    for name, spec in VENDORED.items():
+        if not force and problem(name) is None:
+            print(f"Vendored: {name}")
+            continue
+        try:
+            if name in sources:
+                with open(sources[name], "rb") as f:
+                    module_source = f.read()
+            else:
+                print(f"Downloading {spec['source']} ({spec['member']})")
+                module_source = _fetch_member(spec)
+            if sha256(module_source) != spec["source_sha256"]:
+                raise ValueError(f"{spec['member']} does not match its pinned checksum")
+            data = wrap_module(name, spec, module_source)
+        except (OSError, KeyError, ValueError, tarfile.TarError) as e:
+            print(f"Error: could not vendor {name}: {e}")
+            ok = False
+            continue
+        if sha256(data) != spec["sha256"]:
+            print(f"Error: rebuilt {name} does not match its pinned checksum")
+            ok = False
+            continue
+        target = os.path.join(VENDOR_DIR, name)
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+        print(f"Vendored: {name}")
+    return ok
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        problems = check()
+        for message in problems:
+            print(message)
+        sys.exit(1 if problems else 0)
+    # NAME=PATH arguments use a local copy of the module source instead of the registry
+    local = dict(arg.split("=", 1) for arg in sys.argv[1:] if "=" in arg)
+    sys.exit(0 if vendor(force="--force" in sys.argv, sources=local) else 1)